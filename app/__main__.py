@@ -1,15 +1,164 @@
-from image_recognizer import ImageRecognizer
+from client import recognize_via_daemon, request_daemon
+
+import sys
 
 import fire
 
-def rec(path):
-    imgRec = ImageRecognizer()
+def _sampling(windows, window_mb):
+    """Sampling policy of ImageRecognizer for CLI options, None if windows is 0"""
+    if not windows:
+        return None
+    from image_recognizer import ImageRecognizer
+
+    return ImageRecognizer.SamplingPolicy(window_size=int(window_mb * 2**20), windows=windows)
+
+def _prefilter(top_k):
+    """Color format prefilter of ImageRecognizer for CLI options, None if top_k is 0"""
+    if not top_k:
+        return None
+    from prefilter import FormatPrefilter
+
+    return FormatPrefilter(top_k=top_k)
+
+def rec(
+    path, local=False, cache=None, backend="keras", quantization="", trace=None, windows=0, window_mb=4, top_k=0
+):
+    """Recognize single file, with recognition daemon if one is running (unless local is set).
+    Options of local models (cache, backend other than keras, quantization) make recognition local too.
+    Locally found results are cached in cache database, if given. Local models are run with
+    given inference backend: keras, tflite or onnx (experimental), tflite models can be quantized to float16.
+    With trace, recognition is local, durations of its stages are added to the result
+    and written to trace file in Chrome trace format. With windows, files bigger than windows
+    of window_mb megabytes are recognized locally from the windows only. With top_k, only top_k color formats
+    ranked best by statistics of the file are checked by the model, locally"""
+    daemon_options = cache is None and backend == "keras" and not quantization
+    if not local and daemon_options and trace is None and not windows and not top_k:
+        data = recognize_via_daemon(path)
+        if data is not None:
+            return data
+    # TensorFlow is imported only when there is no daemon to talk to
+    from batch import result_to_dict
+    from image_recognizer import ImageRecognizer
+    from instrumentation import Instrumentation
+
+    instrumentation = Instrumentation(trace=True) if trace else None
+    imgRec = ImageRecognizer(
+        cache=cache,
+        backend=backend,
+        quantization=quantization,
+        instrumentation=instrumentation,
+        sampling=_sampling(windows, window_mb),
+        prefilter=_prefilter(top_k),
+    )
     data = imgRec.recognize(path)
-    return { "format" : data.color_format, 
-             "format_condifence" : data.color_format_confidence,
-             "img_height" : data.img_height,
-             "img_width" : data.img_width,
-             "resolution_confidence" : data.resolution_confidence}
+    if trace:
+        instrumentation.dump_trace(trace)
+    return result_to_dict(data, timings=trace is not None)
+
+def batch(
+    source=None,
+    workers=0,
+    in_flight=0,
+    cache=None,
+    backend="keras",
+    quantization="",
+    windows=0,
+    window_mb=4,
+    top_k=0,
+):
+    """Recognize files from directory, glob pattern or newline-separated paths on stdin ("-" or no source),
+    writing results as JSON lines. With windows, big files are recognized from windows of them only.
+    With top_k, only top_k color formats ranked best by statistics of a file are checked by the model"""
+    from batch import run_batch
+
+    run_batch(
+        source,
+        workers,
+        in_flight,
+        cache=cache,
+        backend=backend,
+        quantization=quantization,
+        sampling=_sampling(windows, window_mb),
+        prefilter=_prefilter(top_k),
+    )
+
+def serve(socket=None, port=0, cache=None, backend="keras", quantization="", windows=0, window_mb=4, top_k=0):
+    """Run recognition daemon keeping models loaded, on Unix domain socket and optionally on localhost HTTP port.
+    With windows, big files are recognized from windows of them only. With top_k, only top_k color formats
+    ranked best by statistics of a file are checked by the model"""
+    from client import DEFAULT_SOCKET_PATH
+    from server import serve
+
+    serve(
+        socket or DEFAULT_SOCKET_PATH,
+        port,
+        cache=cache,
+        backend=backend,
+        quantization=quantization,
+        sampling=_sampling(windows, window_mb),
+        prefilter=_prefilter(top_k),
+    )
+
+def stream(path, probe_mb=32, cache=None, backend="keras", quantization=""):
+    """Recognize raw video stream of concatenated frames: frame size and color format are found
+    from the leading probe_mb megabytes, then every frame is checked, written as a JSON line"""
+    import json
+
+    from batch import result_to_dict
+    from image_recognizer import ImageRecognizer
+
+    imgRec = ImageRecognizer(cache=cache, backend=backend, quantization=quantization)
+    result, frames = imgRec.recognize_stream(path, probe_size=int(probe_mb * 2**20))
+    frames_n = mismatched = 0
+    for frame in frames:
+        frames_n += 1
+        mismatched += not frame.matches
+        print(
+            json.dumps({"frame": frame.index, "offset": frame.offset, "score": frame.score, "matches": frame.matches})
+        )
+    return {**result_to_dict(result), "frames": frames_n, "mismatched_frames": mismatched}
+
+def convert(backend="tflite", *models):
+    """Convert keras models (by default the ones in image-recognizer-models) for tflite or onnx backend,
+    converted models are written next to them"""
+    from glob import glob
+    from os.path import join
+
+    from backend import convert_model
+    from image_recognizer import ImageRecognizer
+
+    for model_path in models or sorted(glob(join(ImageRecognizer.MODELS_FOLDER, "*.h5"))):
+        print(f"{model_path} -> {convert_model(model_path, backend)}")
+
+def quantize(quantization="float16"):
+    """Write float16 quantized tflite versions of both models next to them"""
+    from quantization import quantize_models
+
+    for path in quantize_models(quantization):
+        print(path)
+
+def cache_stats(cache=None):
+    """Print hit/miss statistics of results cache"""
+    from result_cache import ResultCache
+
+    return ResultCache(cache or ResultCache.DEFAULT_PATH).stats()
+
+def stats():
+    """Print request latency histograms of running recognition daemon"""
+    return request_daemon({"command": "stats"})
 
 if __name__ == "__main__":
-    fire.Fire(rec)
+    commands = {
+        "rec": rec,
+        "batch": batch,
+        "serve": serve,
+        "stream": stream,
+        "stats": stats,
+        "convert": convert,
+        "quantize": quantize,
+        "cache_stats": cache_stats,
+    }
+    # python app <path> recognizes single file, as before the other commands were added
+    if len(sys.argv) > 1 and sys.argv[1] not in commands and not sys.argv[1].startswith("-"):
+        sys.argv.insert(1, "rec")
+    fire.Fire(commands)
@@ -0,0 +1,202 @@
+import os
+
+import numpy as np
+from numpy.typing import NDArray
+
+BACKENDS_SUFFIXES = {
+    "keras": ".h5",
+    "tflite": ".tflite",
+    "onnx": ".onnx",
+}
+ONNX_OPSET = 13
+QUANTIZATIONS = ("float16",)
+
+
+class BackendNotAvailable(Exception):
+    pass
+
+
+class Backend:
+    """Model loaded for inference. Called with float32 batch of images, returns confidences for them.
+
+    Packages used by backends are imported only when a model is loaded with them,
+    so choosing one backend does not require the others to be installed.
+    """
+
+    def __call__(self, batch: NDArray) -> NDArray:
+        raise NotImplementedError
+
+
+class KerasBackend(Backend):
+    def __init__(self, model_path: str):
+        from keras import models
+
+        self.model = models.load_model(model_path)
+
+    def __call__(self, batch: NDArray) -> NDArray:
+        # Compiled predict function, calling the model runs it eagerly layer by layer
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class TFLiteBackend(Backend):
+    """TFLite interpreter, float models are run with XNNPACK delegate applied by default.
+    LiteRT interpreter is used when ai_edge_litert package is installed, TensorFlow one otherwise"""
+
+    def __init__(self, model_path: str, num_threads: int = 0):
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+
+        if not os.path.isfile(model_path):
+            raise OSError(f"No TFLite model at {model_path}")
+        try:
+            self.interpreter = Interpreter(
+                model_path=model_path, num_threads=num_threads or os.cpu_count()
+            )
+        except ValueError as e:
+            raise OSError(f"Invalid TFLite model {model_path}: {e}") from e
+        self.input_index = self.interpreter.get_input_details()[0]["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self.input_shape = None
+
+    def __call__(self, batch: NDArray) -> NDArray:
+        # Input is resized only when batch shape changes, as it reallocates all tensors
+        if batch.shape != self.input_shape:
+            self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self.input_shape = batch.shape
+        self.interpreter.set_tensor(self.input_index, np.ascontiguousarray(batch, dtype=np.float32))
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index)
+
+
+class ONNXBackend(Backend):
+    """Experimental, parity is checked on small models only,
+    conversion of the bundled models did not fit in 5 GB of memory"""
+
+    def __init__(self, model_path: str, num_threads: int = 0):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise BackendNotAvailable("onnx backend requires onnxruntime package") from None
+        if not os.path.isfile(model_path):
+            raise OSError(f"No ONNX model at {model_path}")
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        try:
+            self.session = onnxruntime.InferenceSession(
+                model_path, options, providers=["CPUExecutionProvider"]
+            )
+        except Exception as e:
+            raise OSError(f"Invalid ONNX model {model_path}: {e}") from e
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: NDArray) -> NDArray:
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+BACKENDS = {
+    "keras": KerasBackend,
+    "tflite": TFLiteBackend,
+    "onnx": ONNXBackend,
+}
+
+
+def backend_model_path(model_path: str, backend: str, quantization: str = "") -> str:
+    """Path of model converted for given backend, stored next to the keras model
+
+    Args:
+        model_path (str): Path to keras model or to already converted model
+        backend (str): Name of one of BACKENDS
+        quantization (str, optional): One of QUANTIZATIONS, for quantized tflite models. Defaults to "", float model.
+
+    Raises:
+        ValueError: Quantization is not supported by the backend
+
+    Returns:
+        str: Path to model with suffix of the backend (and quantization), keras models paths are returned as they are
+    """
+    if quantization and (backend != "tflite" or quantization not in QUANTIZATIONS):
+        raise ValueError(f"Only tflite models can be quantized, to one of {', '.join(QUANTIZATIONS)}")
+    if backend == "keras":
+        return model_path
+    suffix = f".{quantization}" if quantization else ""
+    return os.path.splitext(model_path)[0] + suffix + BACKENDS_SUFFIXES[backend]
+
+
+def load_backend(model_path: str, backend: str = "keras") -> Backend:
+    """Load model for inference with given backend
+
+    Args:
+        model_path (str): Path to model in format of the backend
+        backend (str, optional): Name of one of BACKENDS. Defaults to "keras".
+
+    Raises:
+        ValueError: Unknown backend
+        BackendNotAvailable: Package needed by the backend is not installed
+        OSError: Model is missing or invalid
+
+    Returns:
+        Backend: Loaded model
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}, expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[backend](model_path)
+
+
+def convert_model(
+    model_path: str,
+    backend: str,
+    output_path: str = "",
+    quantization: str = "",
+) -> str:
+    """Convert keras model for given backend
+
+    Args:
+        model_path (str): Path to keras model
+        backend (str): "tflite" or "onnx"
+        output_path (str, optional): Path to converted model. By default next to the keras model.
+        quantization (str, optional): One of QUANTIZATIONS, tflite models only. Defaults to "", float model.
+            float16 halves the weights, input and output stay float32, so quantized models are called
+            like the float ones.
+
+    Raises:
+        ValueError: Unknown backend or quantization
+        BackendNotAvailable: Package needed by the conversion is not installed
+
+    Returns:
+        str: Path to converted model
+    """
+    if backend not in ("tflite", "onnx"):
+        raise ValueError(f"Models can be converted only for tflite and onnx backends, not {backend}")
+    output_path = output_path or backend_model_path(model_path, backend, quantization)
+    import tensorflow as tf
+    from keras import models
+
+    model = models.load_model(model_path, compile=False)
+    if backend == "tflite":
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        if quantization == "float16":
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.target_spec.supported_types = [tf.float16]
+        with open(output_path, "wb") as file:
+            file.write(converter.convert())
+    else:
+        try:
+            import tf2onnx
+        except ImportError:
+            raise BackendNotAvailable("Conversion to onnx requires tf2onnx package") from None
+        # Batch dimension stays dynamic, so finders can give any number of images at once.
+        # Model is traced as a function, as from_keras does not support all keras versions
+        input_signature = [
+            tf.TensorSpec((None,) + tuple(model.inputs[0].shape[1:]), tf.float32, name="input")
+        ]
+        function = tf.function(lambda batch: model(batch), input_signature=input_signature)
+        tf2onnx.convert.from_function(
+            function, input_signature=input_signature, opset=ONNX_OPSET, output_path=output_path
+        )
+    return output_path
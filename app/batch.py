@@ -0,0 +1,153 @@
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from typing import Iterator, Optional
+
+from image_recognizer import ImageRecognizer
+
+_image_recognizer: Optional[ImageRecognizer] = None
+
+
+def result_to_dict(result: ImageRecognizer.Result, timings: bool = False) -> dict:
+    """Convert recognition result to JSON serializable dictionary
+
+    Args:
+        result (ImageRecognizer.Result): Recognition result
+        timings (bool, optional): Include durations of recognition stages. Defaults to False.
+
+    Returns:
+        dict: Dictionary with found color format, resolution and confidences for them
+    """
+    data = {
+        "format": result.color_format,
+        "format_condifence": float(result.color_format_confidence),
+        "img_height": result.img_height,
+        "img_width": result.img_width,
+        "resolution_confidence": float(result.resolution_confidence),
+        "hypotheses_evaluated": result.hypotheses_evaluated,
+        "bytes_read": result.bytes_read,
+    }
+    if timings:
+        data["timings"] = result.timings
+    return data
+
+
+def iter_paths(source: Optional[str]) -> Iterator[str]:
+    """Iterate over paths of files to recognize
+
+    Args:
+        source (str, optional): Directory (searched recursively), glob pattern,
+         or "-"/None for newline-separated paths read from stdin.
+
+    Returns:
+        Iterator[str]: Paths of files
+    """
+    if source is None or source == "-":
+        for line in sys.stdin:
+            path = line.strip()
+            if path:
+                yield path
+    elif os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                yield os.path.join(root, name)
+    else:
+        for path in sorted(glob.iglob(source, recursive=True)):
+            if os.path.isfile(path):
+                yield path
+
+
+def prefetch(path: str):
+    """Ask OS to read file into page cache in background, so it is ready when worker opens it
+
+    Args:
+        path (str): Path to file
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def _init_worker(recognizer_kwargs: dict):
+    global _image_recognizer
+    # Progress messages of the recognizer would mix with JSON lines on stdout
+    sys.stdout = open(os.devnull, "w")
+    _image_recognizer = ImageRecognizer(**recognizer_kwargs)
+
+
+def _recognize(path: str) -> dict:
+    try:
+        return {"path": path, **result_to_dict(_image_recognizer.recognize(path))}
+    except Exception as e:
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+
+
+def run_batch(
+    source: Optional[str] = None,
+    workers: int = 0,
+    in_flight: int = 0,
+    **recognizer_kwargs,
+):
+    """Recognize many files in a pool of worker processes, each loading models once.
+    Results are written to stdout as JSON lines in order of completion,
+    throughput summary is written to stderr at the end.
+
+    Args:
+        source (str, optional): Directory (searched recursively), glob pattern,
+         or "-"/None for newline-separated paths read from stdin.
+        workers (int, optional): Number of worker processes. By default half of CPUs.
+        in_flight (int, optional): Max number of files submitted to workers and not yet written,
+         next files are prefetched when they are submitted, unless they are sampled. By default 2 per worker.
+        recognizer_kwargs: Arguments for ImageRecognizer in every worker
+    """
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    in_flight = in_flight or 2 * workers
+    start = time.perf_counter()
+    done = errors = 0
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(recognizer_kwargs,),
+    ) as executor:
+        pending = set()
+        paths = iter_paths(source)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < in_flight:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                    break
+                # Sampled files are read only partially, prefetching them whole would defeat it
+                if recognizer_kwargs.get("sampling") is None:
+                    prefetch(path)
+                pending.add(executor.submit(_recognize, path))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                done += 1
+                errors += "error" in record
+                print(json.dumps(record), flush=True)
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Recognized {done} files ({errors} errors) in {elapsed:.2f}s "
+        f"with {workers} workers: {done / elapsed if elapsed else 0:.3f} files/s",
+        file=sys.stderr,
+    )
@@ -0,0 +1,66 @@
+import base64
+import json
+import os
+import socket
+import tempfile
+from typing import Optional, Union
+
+DEFAULT_SOCKET_PATH = os.environ.get(
+    "IMAGE_RECOGNIZER_SOCKET",
+    os.path.join(tempfile.gettempdir(), "image-recognizer.sock"),
+)
+
+
+class DaemonError(Exception):
+    pass
+
+
+def request_daemon(request: dict, socket_path: str = DEFAULT_SOCKET_PATH) -> Optional[dict]:
+    """Send single request to recognition daemon over its Unix domain socket
+
+    Args:
+        request (dict): JSON serializable request
+        socket_path (str, optional): Path to daemon socket. Defaults to DEFAULT_SOCKET_PATH.
+
+    Raises:
+        DaemonError: Daemon failed to handle the request
+
+    Returns:
+        dict | None: Daemon response, None if no daemon is running
+    """
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            with sock.makefile("rwb") as stream:
+                stream.write(json.dumps(request).encode() + b"\n")
+                stream.flush()
+                line = stream.readline()
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None
+    if not line:
+        raise DaemonError("Daemon closed connection without response")
+    response = json.loads(line)
+    if "error" in response:
+        raise DaemonError(response["error"])
+    return response
+
+
+def recognize_via_daemon(
+    raw_img: Union[str, bytes], socket_path: str = DEFAULT_SOCKET_PATH
+) -> Optional[dict]:
+    """Recognize raw image with recognition daemon, if one is running
+
+    Args:
+        raw_img (str | bytes): Path to raw image or its raw bytes
+        socket_path (str, optional): Path to daemon socket. Defaults to DEFAULT_SOCKET_PATH.
+
+    Returns:
+        dict | None: Found color format, resolution and confidences for them, None if no daemon is running
+    """
+    if isinstance(raw_img, str):
+        request = {"path": os.path.abspath(raw_img)}
+    else:
+        request = {"data": base64.b64encode(raw_img).decode("ascii")}
+    return request_daemon(request, socket_path)
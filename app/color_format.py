@@ -1,11 +1,19 @@
 import logging
 import cv2
 import numpy as np
-import tensorflow as tf
 
-from keras import models
+from backend import Backend, load_backend
+from instrumentation import DISABLED, Instrumentation
+from contextlib import ExitStack
+from numpy.typing import NDArray
+from prefilter import FormatPrefilter
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Tuple, Union
 
-from raw_image_data_previewer.app.core import load_image, get_displayable
+from raw_image_data_previewer.app.core import load_image, get_luma
+from raw_image_data_previewer.app.image.image import RawDataContainer, open_raw_data
+
+if TYPE_CHECKING:
+    import tensorflow as tf
 
 COLOR_FORMATS_RATIOS = {
     "RGB24": 3,
@@ -19,33 +27,171 @@ COLOR_FORMATS_RATIOS = {
 }
 
 
+def color_format_image(
+    raw_data: RawDataContainer,
+    color_format: str,
+    width: int,
+    out_width: int,
+    out_height: int,
+    instrumentation: Instrumentation = DISABLED,
+    decimated: bool = False,
+) -> NDArray:
+    """Build model input from the image parsed in a given color format
+
+    Args:
+        raw_data (RawDataContainer): Opened image data
+        color_format (str): Name of color format
+        width (int): Width of the image in pixels of color format
+        out_width (int): Model image width
+        out_height (int): Model image height
+        instrumentation (Instrumentation, optional): Hooks recording durations of stages. Defaults to DISABLED.
+        decimated (bool, optional): Parse only rows and columns of the image needed for model size.
+         Faster, but the model input differs from the one the model was trained on. Defaults to False.
+
+    Returns:
+        NDArray: Luma of the image resized to model size, normalized to [-0.5, 0.5]
+    """
+    img_data = load_image(
+        raw_data,
+        color_format,
+        width,
+        target_size=(out_width, out_height) if decimated else None,
+        instrumentation=instrumentation,
+    )
+    with instrumentation.span("luma", color_format=color_format):
+        img = get_luma(img_data)
+    with instrumentation.span("resize", color_format=color_format):
+        img = cv2.resize(img, (out_width, out_height), interpolation=cv2.INTER_AREA)
+    img = np.expand_dims(img, axis=-1)
+    img = (img / 255) - 0.5
+    return img
+
+
 class ColorFormatFinder:
+    DEFAULT_BATCH_SIZE = 64
+
     class InvalidModel(Exception):
         pass
 
-    def __init__(self, model_path: str, model_img_width: int, model_img_height: int):
-        """Create class object and set keras model
+    def __init__(
+        self,
+        model_path: str,
+        model_img_width: int,
+        model_img_height: int,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        backend: str = "keras",
+        instrumentation: Optional[Instrumentation] = None,
+        prefilter: Optional[FormatPrefilter] = None,
+        decimated_parse: bool = False,
+    ):
+        """Create class object and load model with given inference backend
 
         Args:
             model_path (str): Path to color format model
             model_img_width (int): Model image width
             model_img_height (int): Model image height
+            batch_size (int, optional): Max number of images given to the model at once.
+             Defaults to DEFAULT_BATCH_SIZE.
+            backend (str, optional): Name of one of backend.BACKENDS, model has to be in its format.
+             Defaults to "keras".
+            instrumentation (Instrumentation, optional): Hooks recording durations of parsing, luma, resizing
+             and inference, model calls and batch sizes. Defaults to None, nothing is recorded.
+            prefilter (FormatPrefilter, optional): Statistical prefilter of color formats, only its top_k formats
+             of every image are given to the model by find_color_formats. Defaults to None, all formats are.
+            decimated_parse (bool, optional): Parse only rows and columns of images needed for model size,
+             see color_format_image. Defaults to False.
 
         Raises:
             InvalidModel: Invalid model format
         """
         self.model_img_width = model_img_width
         self.model_img_height = model_img_height
+        self.batch_size = batch_size
+        self.evaluations = 0
+        self.instrumentation = instrumentation or DISABLED
+        self.prefilter = prefilter
+        self.decimated_parse = decimated_parse
         try:
-            self.model: models.Model = models.load_model(model_path)
+            self.model: Backend = load_backend(model_path, backend)
         except OSError:
             logging.error("Given color format model is not valid")
             raise self.InvalidModel("Given color format model is not valid")
 
-    def generate_color_formats_tensor(self, img_path: str, img_width: int) -> tf.Tensor:
+    def color_formats_grid(
+        self, img_width: int, color_formats: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, int]]:
+        """List color formats checked for a given image width, with widths the image is parsed with for them
+
+        Args:
+            img_width (int): Image width
+            color_formats (Sequence[str], optional): Checked color formats, from COLOR_FORMATS_RATIOS.
+             Defaults to None, all of them.
+
+        Returns:
+            List[Tuple[str, int]]: Pairs of color format and width in its pixels, in order of COLOR_FORMATS_RATIOS
+        """
+        return [
+            (color_format, int(img_width / resolution_ratio))
+            for color_format, resolution_ratio in COLOR_FORMATS_RATIOS.items()
+            if color_formats is None or color_format in color_formats
+        ]
+
+    def select_color_formats(self, raw_data: RawDataContainer) -> List[str]:
+        """Select color formats of the image given to the model, the ones kept by prefilter if there is one
+
+        Args:
+            raw_data (RawDataContainer): Opened image data
+
+        Returns:
+            List[str]: Names of color formats, in order of COLOR_FORMATS_RATIOS
+        """
+        if self.prefilter is None:
+            return list(COLOR_FORMATS_RATIOS)
+        with self.instrumentation.span("prefilter"):
+            return self.prefilter.select(raw_data.data_buffer, list(COLOR_FORMATS_RATIOS))
+
+    def color_format_image(self, raw_data: RawDataContainer, color_format: str, width: int) -> NDArray:
+        """Generate representation of the image parsed in a given color format, as the model takes it
+
+        Args:
+            raw_data (RawDataContainer): Opened image data
+            color_format (str): Name of color format
+            width (int): Width of the image in pixels of color format
+
+        Returns:
+            NDArray: Representation of the image
+        """
+        return color_format_image(
+            raw_data,
+            color_format,
+            width,
+            self.model_img_width,
+            self.model_img_height,
+            self.instrumentation,
+            self.decimated_parse,
+        )
+
+    def generate_color_formats_images(
+        self, img_path: Union[str, bytes, RawDataContainer], img_width: int
+    ) -> Iterator[NDArray]:
+        """Generate representations of all color formats for a given image, one by one
+        Args:
+            img_path (str | bytes | RawDataContainer): Path to image, its raw bytes or already opened image data
+            img_width (int): Image width
+
+        Returns:
+            Iterator[NDArray]: Representations of color formats, in order of COLOR_FORMATS_RATIOS
+        """
+        with open_raw_data(img_path) as raw_data:
+            for color_format, width in self.color_formats_grid(img_width):
+                yield self.color_format_image(raw_data, color_format, width)
+
+    def generate_color_formats_tensor(
+        self, img_path: Union[str, bytes, RawDataContainer], img_width: int
+    ) -> "tf.Tensor":
         """Generate a tensor with representations of all color formats for a given image
         Args:
-            img_path (str): Path to image
+            img_path (str | bytes | RawDataContainer): Path to image, its raw bytes or already opened image data
             img_width (int): Image width
 
         Returns:
@@ -54,35 +200,108 @@ class ColorFormatFinder:
         imgs = np.empty(
             shape=(len(COLOR_FORMATS_RATIOS), self.model_img_width, self.model_img_height, 1), dtype=np.float32
         )
-
-        i = 0
-        for color_format, resolution_ratio in COLOR_FORMATS_RATIOS.items():
-            img_data = load_image(img_path, color_format, int(img_width / resolution_ratio))
-            img = get_displayable(img_data)
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            img = cv2.resize(img, (self.model_img_width, self.model_img_height), interpolation=cv2.INTER_AREA)
-            img = np.expand_dims(img, axis=-1)
-            img = (img / 255) - 0.5
+        for i, img in enumerate(self.generate_color_formats_images(img_path, img_width)):
             imgs[i] = img
-            i += 1
+
+        import tensorflow as tf
 
         return tf.convert_to_tensor(imgs)
 
-    def find_color_format(self, img_path: str, img_width: int) -> dict[str, float]:
+    def find_color_format(
+        self, img_path: Union[str, bytes, RawDataContainer], img_width: int
+    ) -> dict[str, float]:
         """Find color format of the image
 
         Args:
-            img_path (str): Path to image
+            img_path (str | bytes | RawDataContainer): Path to image, its raw bytes or already opened image data
             img_width (int): Image width
 
         Returns:
             dict: Dictionary with confidences for the given color format
         """
-        color_formats_tensor = self.generate_color_formats_tensor(img_path, img_width)
-        color_formats_confidences = {}
-        results_tensor = self.model(color_formats_tensor)
-        results_list = list(np.squeeze(results_tensor, axis=-1))
-        color_formats = list(COLOR_FORMATS_RATIOS.keys())
-        for i in range(len(color_formats)):
-            color_formats_confidences[color_formats[i]] = results_list[i]
-        return color_formats_confidences
+        return self.find_color_formats([(img_path, img_width)])[0]
+
+    def find_color_formats(
+        self,
+        requests: Sequence[Tuple[Union[str, bytes, RawDataContainer], int]],
+        batch_size: int = 0,
+    ) -> List[dict[str, float]]:
+        """Find color formats of many images at once. The whole (request x color format) grid
+        is deduplicated first, as different widths of the same image can be parsed with the same width
+        in some color format, then unique representations share model batches. With prefilter, the grid
+        of every image holds only color formats kept by it, selected once per image
+
+        Number of unique representations evaluated is stored in evaluations attribute.
+
+        Args:
+            requests (Sequence[Tuple[str | bytes | RawDataContainer, int]]): Pairs of image and its width
+            batch_size (int, optional): Max number of images given to the model at once.
+             By default batch_size of the object.
+
+        Returns:
+            List[dict]: Dictionaries with confidences for the given color format, for every request,
+             of color formats kept by prefilter only if there is one
+        """
+        with ExitStack() as stack:
+            # Paths and bytes are keyed by value, opened containers (alive in requests) by their id
+            opened = {}
+            color_formats = {}
+            hypotheses = {}
+            requests_hypotheses = []
+            for img_path, img_width in requests:
+                img_key = img_path if isinstance(img_path, (str, bytes)) else id(img_path)
+                if img_key not in opened:
+                    opened[img_key] = stack.enter_context(open_raw_data(img_path))
+                    color_formats[img_key] = self.select_color_formats(opened[img_key])
+                keys = []
+                for color_format, width in self.color_formats_grid(img_width, color_formats[img_key]):
+                    key = (img_key, color_format, width)
+                    hypotheses.setdefault(key, len(hypotheses))
+                    keys.append(key)
+                requests_hypotheses.append(keys)
+
+            confidences = self.predict_hypotheses(
+                [(opened[img_key], color_format, width) for img_key, color_format, width in hypotheses],
+                batch_size,
+            )
+        self.evaluations = len(hypotheses)
+
+        return [
+            {key[1]: confidences[hypotheses[key]] for key in keys}
+            for keys in requests_hypotheses
+        ]
+
+    def predict_hypotheses(
+        self,
+        hypotheses: Sequence[Tuple[RawDataContainer, str, int]],
+        batch_size: int = 0,
+    ) -> NDArray:
+        """Predict confidences of images being in given color formats, with given widths
+
+        Representations are streamed through the model in chunks of batch_size.
+
+        Args:
+            hypotheses (Sequence[Tuple[RawDataContainer, str, int]]): Opened image data, name of color format
+             and width of the image in pixels of color format
+            batch_size (int, optional): Max number of images given to the model at once.
+             By default batch_size of the object.
+
+        Returns:
+            NDArray: Confidences, in order of hypotheses
+        """
+        batch_size = batch_size or self.batch_size
+        batch = np.empty(
+            shape=(min(batch_size, len(hypotheses)), self.model_img_width, self.model_img_height, 1),
+            dtype=np.float32,
+        )
+        predictions = np.empty(len(hypotheses), dtype=np.float32)
+        for start in range(0, len(hypotheses), batch_size):
+            chunk = hypotheses[start : start + batch_size]
+            for i, (raw_data, color_format, width) in enumerate(chunk):
+                batch[i] = self.color_format_image(raw_data, color_format, width)
+            self.instrumentation.model_call("color_format", len(chunk))
+            with self.instrumentation.span("color_format_inference", batch_size=len(chunk)):
+                predictions[start : start + len(chunk)] = np.squeeze(
+                    self.model(batch[: len(chunk)]), axis=-1
+                )
+        return predictions
@@ -1,9 +1,23 @@
+import heapq
 import logging
-from os.path import join, exists
+import os
+import numpy as np
+from os.path import join, exists, getsize
 
-from resolution import ResolutionFinder
-from color_format import ColorFormatFinder
-from dataclasses import dataclass
+from backend import BACKENDS, backend_model_path
+from resolution_search import SearchStrategy, get_search_strategy
+from result_cache import ResultCache
+from sampling import SampledRawData
+from stream import DEFAULT_MAX_ROW_SCORE, Frame, frame_height, iter_frames
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from instrumentation import DISABLED, Instrumentation
+from prefilter import FormatPrefilter
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from raw_image_data_previewer.app.image.image import RawDataContainer, open_raw_data
+
+if TYPE_CHECKING:
+    from resolution import ResolutionFinder
 
 
 class ImageRecognizer:
@@ -15,6 +29,8 @@ class ImageRecognizer:
     DEFAULT_COLOR_FORMAT_MODEL_IMG_WIDTH = 256
     DEFAULT_COLOR_FORMAT_MODEL_IMG_HEIGHT = 256
     RESOLUTION_RESULTS_N = 5
+    RECOGNIZE_MANY_FILES_N = 32
+    STREAM_PROBE_SIZE = 32 * 2**20
 
     DEFAULT_RESOLUTION_MODEL_PATH = join(MODELS_FOLDER, DEFAULT_RESOLUTION_MODEL_NAME)
     DEFAULT_COLOR_FORMAT_MODEL_PATH = join(
@@ -40,6 +56,71 @@ class ImageRecognizer:
         img_height: int = 0
         color_format_confidence: float = 0.0
         resolution_confidence: float = 0.0
+        hypotheses_evaluated: int = 0
+        bytes_read: int = 0
+        timings: Dict[str, float] = field(default_factory=dict)
+
+    # Fields describing a single recognition, not its result, they are not cached
+    RECOGNITION_FIELDS = ("bytes_read", "timings")
+
+    @dataclass
+    class EarlyExitPolicy:
+        """Thresholds for accepting the best (resolution, color format) hypothesis
+        before all resolution candidates are evaluated. Policy fires when all of them are met.
+
+        Args:
+            color_format_confidence (float): Min color format confidence of the best hypothesis
+            resolution_confidence (float): Min resolution confidence of the best hypothesis
+            margin (float): Min difference between color format confidences of the best
+             and the runner-up hypothesis
+        """
+
+        color_format_confidence: float = 0.9
+        resolution_confidence: float = 0.0
+        margin: float = 0.0
+
+        def fires(self, best_result: "ImageRecognizer.Result", runner_up_confidence: float) -> bool:
+            return (
+                best_result.color_format_confidence >= self.color_format_confidence
+                and best_result.resolution_confidence >= self.resolution_confidence
+                and best_result.color_format_confidence - runner_up_confidence >= self.margin
+            )
+
+    @dataclass
+    class SamplingPolicy:
+        """Recognize big files from contiguous windows of them, only the windows are read from disk.
+        Resolution is searched on the windows, its height is extrapolated from the size of the whole file.
+        Files not bigger than all windows together are read whole.
+
+        Args:
+            window_size (int): Size of a single window in bytes
+            windows (int): Number of windows, spread evenly from the beginning to the end of the file
+            positions (Tuple[float, ...], optional): Positions of windows as fractions of the file,
+             0 puts a window at the beginning, 1 at the end. Overrides windows.
+        """
+
+        window_size: int = 4 * 2**20
+        windows: int = 3
+        positions: Optional[Tuple[float, ...]] = None
+
+        def sample(self, source: Union[str, bytes, RawDataContainer]) -> Optional[SampledRawData]:
+            """Take windows of the image, reading only them if it is a file
+
+            Args:
+                source (str | bytes | RawDataContainer): Path to raw image, its raw bytes or opened image data
+
+            Returns:
+                SampledRawData: Windows of the image, None if it is too small to be sampled
+            """
+            windows = self.windows if self.positions is None else len(self.positions)
+            if isinstance(source, str):
+                if getsize(source) <= windows * self.window_size:
+                    return None
+                return SampledRawData.from_file(source, windows, self.window_size, self.positions)
+            data = source.data_buffer if isinstance(source, RawDataContainer) else source
+            if len(data) <= windows * self.window_size:
+                return None
+            return SampledRawData.from_buffer(data, windows, self.window_size, self.positions)
 
     def __init__(
         self,
@@ -49,9 +130,23 @@ class ImageRecognizer:
         resolution_model_img_height: int = DEFAULT_RESOLUTION_MODEL_IMG_HEIGHT,
         color_format_model_img_width: int = DEFAULT_COLOR_FORMAT_MODEL_IMG_WIDTH,
         color_format_model_img_height: int = DEFAULT_COLOR_FORMAT_MODEL_IMG_HEIGHT,
+        use_mmap: bool = True,
+        resolution_batch_size: int = 0,
+        resolution_memory_budget: int = 0,
+        resolution_candidate_taps: int = 0,
+        resolution_search_strategy: Union[str, SearchStrategy] = "exhaustive",
+        cache: Union[None, str, ResultCache] = None,
+        early_exit: Optional[EarlyExitPolicy] = None,
+        backend: str = "keras",
+        quantization: str = "",
+        instrumentation: Optional[Instrumentation] = None,
+        sampling: Optional[SamplingPolicy] = None,
+        prefilter: Optional[FormatPrefilter] = None,
+        decimated_parse: bool = False,
     ):
         """Create class object, set all instance variables, download defaults keras models if needed,
-         create ResolutionFinder and ColorFormatFinder objects
+         create ResolutionFinder and ColorFormatFinder objects. With cache, the finders (and TensorFlow)
+         are loaded only when the first image missing in the cache is recognized
 
         Args:
             resolution_model_path (str, optional): Path to resolution keras model file.
@@ -66,16 +161,56 @@ class ImageRecognizer:
              Defaults to DEFAULT_COLOR_FORMAT_MODEL_IMG_WIDTH.
             color_format_model_img_height (int, optional): Color format keras model image height.
              Defaults to DEFAULT_COLOR_FORMAT_MODEL_IMG_HEIGHT.
+            use_mmap (bool, optional): Memory map recognized files instead of reading them.
+             Defaults to True.
+            resolution_batch_size (int, optional): Max number of resolution candidates given to the model at once.
+             By default ResolutionFinder.DEFAULT_BATCH_SIZE.
+            resolution_memory_budget (int, optional): Max size in bytes of resolution candidates batch.
+             By default ResolutionFinder.DEFAULT_MEMORY_BUDGET.
+            resolution_candidate_taps (int, optional): Build resolution candidates from taps x taps pixels
+             of every box, faster on big files but not exactly as the model was trained, see strided_candidate.
+             Defaults to 0, exact resize.
+            resolution_search_strategy (str | SearchStrategy, optional): Strategy of resolution search
+             or name of one of resolution_search.SEARCH_STRATEGIES. Defaults to "exhaustive".
+            cache (None | str | ResultCache, optional): Cache of results or path to its database.
+             Defaults to None, no caching.
+            early_exit (EarlyExitPolicy, optional): Policy of skipping remaining resolution candidates
+             once the best hypothesis is good enough. Defaults to None, all candidates are evaluated.
+            backend (str, optional): Inference backend, one of backend.BACKENDS. Models for tflite and onnx
+             backends are looked up next to the keras models, with suffix of the backend. Defaults to "keras".
+            quantization (str, optional): Use quantized tflite models, one of backend.QUANTIZATIONS,
+             made with quantization.quantize_models. Defaults to "", float models.
+            instrumentation (Instrumentation, optional): Hooks recording durations of recognition stages,
+             model calls and batch sizes. Durations of stages of recognize are also given in Result.timings.
+             Defaults to None, nothing is recorded.
+            sampling (SamplingPolicy, optional): Recognize big files from windows of them, reading only
+             the windows. Number of bytes read is given in Result.bytes_read. Defaults to None, whole files are used.
+            prefilter (FormatPrefilter, optional): Rank color formats of every image by cheap statistics of its bytes,
+             only top_k of them are checked by the color format model. Defaults to None, all formats are checked.
+            decimated_parse (bool, optional): Parse only rows and columns of images needed for the color format
+             model input. Faster, but model inputs differ slightly from the ones of full parse. Defaults to False.
 
         Raises:
+            ValueError: Unknown backend or quantization not supported by the backend
             self.CustomModelNotFound: Custom model not found
         """
-        self.resolution_model_path = resolution_model_path
-        self.color_format_model_path = color_format_model_path
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend}, expected one of {', '.join(BACKENDS)}")
+        self.backend = backend
+        self.quantization = quantization
+        self.resolution_model_path = backend_model_path(resolution_model_path, backend, quantization)
+        self.color_format_model_path = backend_model_path(color_format_model_path, backend, quantization)
         self.resolution_model_img_width = resolution_model_img_width
         self.resolution_model_img_height = resolution_model_img_height
         self.color_format_model_img_width = color_format_model_img_width
         self.color_format_model_img_height = color_format_model_img_height
+        self.use_mmap = use_mmap
+        self.early_exit = early_exit
+        self.sampling = sampling
+        self.prefilter = prefilter
+        self.decimated_parse = decimated_parse
+        self.instrumentation = instrumentation or DISABLED
+        self.resolution_search_strategy = get_search_strategy(resolution_search_strategy)
 
         if not exists(self.resolution_model_path):
             logging.error("Custom resolution model not found")
@@ -85,54 +220,346 @@ class ImageRecognizer:
             logging.error("Custom resolution model not found")
             raise self.CustomModelNotFound("Custom resolution model not found")
 
+        self.resolution_batch_size = resolution_batch_size
+        self.resolution_memory_budget = resolution_memory_budget
+        self.resolution_candidate_taps = resolution_candidate_taps
+        self.resolution_finder = None
+        self.color_format_finder = None
+
+        self.cache = ResultCache(cache) if isinstance(cache, str) else cache
+        if self.cache is None:
+            self._load_finders()
+        else:
+            self.cache_context = self._cache_context()
+
+    def _load_finders(self):
+        # Imported here, so results found in cache are returned without importing TensorFlow
+        from resolution import ResolutionFinder
+        from color_format import ColorFormatFinder
+
         self.resolution_finder = ResolutionFinder(
             self.resolution_model_path,
             self.resolution_model_img_width,
             self.resolution_model_img_height,
+            self.resolution_batch_size or ResolutionFinder.DEFAULT_BATCH_SIZE,
+            self.resolution_memory_budget or ResolutionFinder.DEFAULT_MEMORY_BUDGET,
+            self.backend,
+            self.instrumentation,
+            self.resolution_candidate_taps,
         )
 
         self.color_format_finder = ColorFormatFinder(
             self.color_format_model_path,
             self.color_format_model_img_width,
             self.color_format_model_img_height,
+            backend=self.backend,
+            instrumentation=self.instrumentation,
+            prefilter=self.prefilter,
+            decimated_parse=self.decimated_parse,
         )
 
-    def recognize(self, raw_img_path: str) -> Result:
+    def _cache_context(self) -> str:
+        strategy = self.resolution_search_strategy
+        return "|".join(
+            [
+                ResultCache.file_fingerprint(self.resolution_model_path),
+                ResultCache.file_fingerprint(self.color_format_model_path),
+                f"{self.resolution_model_img_width}x{self.resolution_model_img_height}",
+                f"{self.color_format_model_img_width}x{self.color_format_model_img_height}",
+                f"{type(strategy).__name__}{sorted(vars(strategy).items())}",
+                str(self.RESOLUTION_RESULTS_N),
+                str(self.resolution_candidate_taps),
+                repr(self.early_exit),
+                repr(self.sampling),
+                repr(self.prefilter),
+                str(self.decimated_parse),
+            ]
+        )
+
+    def _cache_key(self, raw_data: Union[RawDataContainer, SampledRawData]) -> str:
+        if isinstance(raw_data, SampledRawData):
+            content_hash = ResultCache.content_hash(
+                b"".join(raw_data.windows) + f"{raw_data.offsets}{raw_data.size}".encode()
+            )
+        else:
+            content_hash = ResultCache.content_hash(raw_data.data_buffer)
+        return ResultCache.make_key(content_hash, self.cache_context)
+
+    def _open_raw_data(
+        self, source: Union[str, bytes, RawDataContainer], stack: ExitStack
+    ) -> Union[RawDataContainer, SampledRawData]:
+        if self.sampling is not None:
+            sampled = self.sampling.sample(source)
+            if sampled is not None:
+                return sampled
+        return stack.enter_context(open_raw_data(source, mapped=self.use_mmap))
+
+    @staticmethod
+    def _raw_bytes(raw_data: Union[RawDataContainer, SampledRawData]) -> Union[bytes, SampledRawData]:
+        return raw_data if isinstance(raw_data, SampledRawData) else raw_data.data_buffer
+
+    @staticmethod
+    def _rows(
+        raw_data: Union[RawDataContainer, SampledRawData], width: int
+    ) -> Union[bytes, RawDataContainer]:
+        # Color formats of sampled images are checked on whole rows of their windows
+        return raw_data.rows(width) if isinstance(raw_data, SampledRawData) else raw_data
+
+    @staticmethod
+    def _bytes_read(raw_data: Union[RawDataContainer, SampledRawData]) -> int:
+        return raw_data.bytes_read if isinstance(raw_data, SampledRawData) else len(raw_data.data_buffer)
+
+    def recognize(self, raw_img_path: Union[str, bytes, RawDataContainer]) -> Result:
         """Recognize raw image - find correct color format and resolution
 
+        Image file is memory mapped (or read) exactly once and shared by all recognition stages.
+        With sampling, only windows of big files are read.
+
         Args:
-            raw_img_path (str): path to raw image
+            raw_img_path (str | bytes | RawDataContainer): path to raw image, its raw bytes or already opened image data
 
         Returns:
             Result: object of Result class with found color format, resolution and confidences for them
         """
-        print(f"Searching for the top {self.RESOLUTION_RESULTS_N} best resolutions...")
-        resolutions = self.resolution_finder.find_resolution(
-            raw_img_path, best_results=self.RESOLUTION_RESULTS_N
+        instrumentation = self.instrumentation
+        instrumentation.reset_timings()
+        with instrumentation.span("recognize"), ExitStack() as stack:
+            with instrumentation.span("open"):
+                raw_data = self._open_raw_data(raw_img_path, stack)
+            if self.cache is None:
+                result = self._recognize(raw_data)
+            else:
+                with instrumentation.span("cache_lookup"):
+                    key = self._cache_key(raw_data)
+                    cached = self.cache.get(key)
+                if cached is not None:
+                    result = self.Result(**cached)
+                else:
+                    result = self._recognize(raw_data)
+                    self._cache_put(key, result)
+            result.bytes_read = self._bytes_read(raw_data)
+        result.timings = dict(instrumentation.timings)
+        return result
+
+    def recognize_stream(
+        self,
+        raw_img_path: str,
+        probe_size: int = STREAM_PROBE_SIZE,
+        max_row_score: float = DEFAULT_MAX_ROW_SCORE,
+    ) -> Tuple[Result, Iterator[Frame]]:
+        """Recognize raw video stream - file of concatenated frames of the same size and color format
+
+        Color format and width are recognized from the leading probe_size bytes, then height of frames
+        is found by comparing consecutive frames of the probe. Frames are read one by one into a single buffer,
+        every frame is only checked to still have rows of the found width, so memory use does not depend
+        on the length of the stream.
+
+        Args:
+            raw_img_path (str): Path to raw video stream
+            probe_size (int, optional): Number of leading bytes the frame size is found from,
+             has to fit at least two frames. Defaults to STREAM_PROBE_SIZE.
+            max_row_score (float, optional): Max row alignment score of frames matching the found frame size,
+             see stream.row_alignment_score. Defaults to DEFAULT_MAX_ROW_SCORE.
+
+        Returns:
+            Tuple[Result, Iterator[Frame]]: Result for a single frame and iterator of frames of the stream.
+             If no height fits the probe twice, the whole file is a single frame.
+        """
+        from resolution import ResolutionFinder
+
+        with open(raw_img_path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            probe = os.pread(file.fileno(), probe_size, 0)
+        result = self.recognize(probe)
+        result.img_height = frame_height(
+            np.frombuffer(probe, dtype=np.uint8), result.img_width, ResolutionFinder.RESOLUTION_HEIGHTS
         )
+        if not result.img_height:
+            logging.warning("Probe does not fit two frames, stream is recognized as a single image")
+            result.img_height = size // result.img_width
+        frame_size = result.img_width * result.img_height
+        return result, iter_frames(raw_img_path, frame_size, result.img_width, max_row_score)
+
+    def _cache_put(self, key: str, result: Result):
+        self.cache.put(key, {k: v for k, v in asdict(result).items() if k not in self.RECOGNITION_FIELDS})
+
+    def _recognize(self, raw_data: Union[RawDataContainer, SampledRawData]) -> Result:
+        if self.resolution_finder is None:
+            with self.instrumentation.span("load_models"):
+                self._load_finders()
+        print(f"Searching for the top {self.RESOLUTION_RESULTS_N} best resolutions...")
+        with self.instrumentation.span("resolution_search"):
+            resolutions = self.resolution_finder.find_resolutions(
+                [self._raw_bytes(raw_data)],
+                best_results=self.RESOLUTION_RESULTS_N,
+                strategy=self.resolution_search_strategy,
+            )[0]
+        with self.instrumentation.span("color_format_search"):
+            return self._find_best_color_format(raw_data, resolutions)
+
+    def _find_best_color_format(
+        self,
+        raw_data: Union[RawDataContainer, SampledRawData],
+        resolutions: List["ResolutionFinder.FoundedResolution"],
+    ) -> Result:
         best_result = self.Result()
+        evaluated_confidences = []
+
+        if self.early_exit is None:
+            # Whole (resolution x color format) grid goes through the model at once,
+            # as long as it fits in batch size of the finder
+            print(f"Searching for the best color format for {len(resolutions)} resolutions...")
+            grid_confidences = self.color_format_finder.find_color_formats(
+                [(self._rows(raw_data, resolution.width), resolution.width) for resolution in resolutions]
+            )
+            for resolution, color_formats_confidences in zip(resolutions, grid_confidences):
+                self._update_result(best_result, resolution, color_formats_confidences)
+            print("Determining the best result...")
+            return best_result
 
         for resolution in resolutions:
             print(
                 f"Searching for the best color format for {resolution.width}x{resolution.height} resolution..."
             )
             color_formats_confidences = self.color_format_finder.find_color_format(
-                raw_img_path, resolution.width
+                self._rows(raw_data, resolution.width), resolution.width
             )
-            best_color_format = max(
-                color_formats_confidences, key=color_formats_confidences.get
-            )
-            if (
-                color_formats_confidences[best_color_format]
-                > best_result.color_format_confidence
-            ):
-                best_result.color_format = best_color_format
-                best_result.img_width = resolution.width
-                best_result.img_height = resolution.height
-                best_result.color_format_confidence = color_formats_confidences[
-                    best_color_format
-                ]
-                best_result.resolution_confidence = resolution.confidence
+            self._update_result(best_result, resolution, color_formats_confidences)
+            evaluated_confidences += color_formats_confidences.values()
+            if self._exits_early(best_result, evaluated_confidences):
+                print("Best result is good enough, skipping remaining resolutions...")
+                break
 
         print("Determining the best result...")
         return best_result
+
+    def recognize_many(
+        self,
+        raw_imgs: Iterable[Union[str, bytes, RawDataContainer]],
+        batch_size: int = 0,
+    ) -> List[Result]:
+        """Recognize many raw images. Candidates of RECOGNIZE_MANY_FILES_N images at once share model batches,
+         so the models are called less often and with bigger batches than by recognize in a loop
+
+        Args:
+            raw_imgs (Iterable[str | bytes | RawDataContainer]): paths to raw images, their raw bytes
+             or already opened images data
+            batch_size (int, optional): Max number of candidates given to the models at once.
+             By default batch sizes of the finders.
+
+        Returns:
+            List[Result]: objects of Result class for every image, in order of raw_imgs.
+             Their timings are empty, as stages are shared by many images, instrumentation still records them
+        """
+        raw_imgs = list(raw_imgs)
+        results = []
+        for start in range(0, len(raw_imgs), self.RECOGNIZE_MANY_FILES_N):
+            with ExitStack() as stack:
+                raws_data = [
+                    self._open_raw_data(raw_img, stack)
+                    for raw_img in raw_imgs[start : start + self.RECOGNIZE_MANY_FILES_N]
+                ]
+                chunk_results = self._recognize_many_cached(raws_data, batch_size)
+                for raw_data, result in zip(raws_data, chunk_results):
+                    result.bytes_read = self._bytes_read(raw_data)
+                results += chunk_results
+        return results
+
+    def _recognize_many_cached(
+        self, raws_data: List[Union[RawDataContainer, SampledRawData]], batch_size: int
+    ) -> List[Result]:
+        if self.cache is None:
+            return self._recognize_many(raws_data, batch_size)
+        keys = [self._cache_key(raw_data) for raw_data in raws_data]
+        results: List[Optional[ImageRecognizer.Result]] = []
+        for key in keys:
+            cached = self.cache.get(key)
+            results.append(None if cached is None else self.Result(**cached))
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            found = self._recognize_many([raws_data[i] for i in missing], batch_size)
+            for i, result in zip(missing, found):
+                self._cache_put(keys[i], result)
+                results[i] = result
+        return results
+
+    def _recognize_many(
+        self, raws_data: List[Union[RawDataContainer, SampledRawData]], batch_size: int
+    ) -> List[Result]:
+        if self.resolution_finder is None:
+            with self.instrumentation.span("load_models"):
+                self._load_finders()
+        print(f"Searching for the top {self.RESOLUTION_RESULTS_N} best resolutions of {len(raws_data)} images...")
+        with self.instrumentation.span("resolution_search", images=len(raws_data)):
+            resolutions = self.resolution_finder.find_resolutions(
+                [self._raw_bytes(raw_data) for raw_data in raws_data],
+                best_results=self.RESOLUTION_RESULTS_N,
+                strategy=self.resolution_search_strategy,
+                batch_size=batch_size,
+            )
+        with self.instrumentation.span("color_format_search", images=len(raws_data)):
+            return self._find_best_color_formats(raws_data, resolutions, batch_size)
+
+    def _find_best_color_formats(
+        self,
+        raws_data: List[Union[RawDataContainer, SampledRawData]],
+        resolutions: List[List["ResolutionFinder.FoundedResolution"]],
+        batch_size: int,
+    ) -> List[Result]:
+        print(f"Searching for the best color formats of {len(raws_data)} images...")
+        results = [self.Result() for _ in raws_data]
+        evaluated_confidences = [[] for _ in raws_data]
+        # With early exit, candidates of the same rank of all images are evaluated together,
+        # so images can stop after any rank. Otherwise all of them go in one round.
+        ranks = range(self.RESOLUTION_RESULTS_N)
+        rounds = [ranks] if self.early_exit is None else [[rank] for rank in ranks]
+        remaining = list(range(len(raws_data)))
+        for round_ranks in rounds:
+            requests = [
+                (i, resolutions[i][rank])
+                for i in remaining
+                for rank in round_ranks
+                if rank < len(resolutions[i])
+            ]
+            if not requests:
+                break
+            confidences = self.color_format_finder.find_color_formats(
+                [(self._rows(raws_data[i], resolution.width), resolution.width) for i, resolution in requests],
+                batch_size,
+            )
+            for (i, resolution), color_formats_confidences in zip(requests, confidences):
+                self._update_result(results[i], resolution, color_formats_confidences)
+                evaluated_confidences[i] += color_formats_confidences.values()
+            remaining = [
+                i for i in remaining if not self._exits_early(results[i], evaluated_confidences[i])
+            ]
+        return results
+
+    def _exits_early(self, best_result: Result, evaluated_confidences: List[float]) -> bool:
+        if self.early_exit is None:
+            return False
+        top = heapq.nlargest(2, evaluated_confidences)
+        runner_up_confidence = top[1] if len(top) > 1 else 0.0
+        return self.early_exit.fires(best_result, runner_up_confidence)
+
+    def _update_result(
+        self,
+        best_result: Result,
+        resolution: "ResolutionFinder.FoundedResolution",
+        color_formats_confidences: dict[str, float],
+    ):
+        best_result.hypotheses_evaluated += len(color_formats_confidences)
+        best_color_format = max(
+            color_formats_confidences, key=color_formats_confidences.get
+        )
+        if (
+            color_formats_confidences[best_color_format]
+            > best_result.color_format_confidence
+        ):
+            best_result.color_format = best_color_format
+            best_result.img_width = resolution.width
+            best_result.img_height = resolution.height
+            best_result.color_format_confidence = color_formats_confidences[
+                best_color_format
+            ]
+            best_result.resolution_confidence = resolution.confidence
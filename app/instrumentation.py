@@ -0,0 +1,175 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+class LatencyHistogram:
+    """Cumulative histogram of request latencies"""
+
+    DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+    def __init__(self, buckets: List[float] = DEFAULT_BUCKETS):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.sum += seconds
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + [float("inf")], self.counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {"buckets": buckets, "count": cumulative, "sum": self.sum}
+
+
+class MetricsSink:
+    """Receives counters and observations of instrumented code, does nothing with them by default"""
+
+    def increment(self, name: str, value: int = 1):
+        pass
+
+    def observe(self, name: str, value: float):
+        pass
+
+
+class PrometheusMetrics(MetricsSink):
+    """Keeps counters and histograms in memory and exports them in Prometheus text format.
+    Observations named *_seconds go to latency buckets, the other ones (batch sizes) to size buckets"""
+
+    SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+
+    def __init__(self, prefix: str = "image_recognizer"):
+        self.prefix = prefix
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1):
+        with self.lock:
+            self.counters[name] += value
+
+    def observe(self, name: str, value: float):
+        with self.lock:
+            if name not in self.histograms:
+                buckets = LatencyHistogram.DEFAULT_BUCKETS if name.endswith("_seconds") else self.SIZE_BUCKETS
+                self.histograms[name] = LatencyHistogram(buckets)
+            histogram = self.histograms[name]
+        histogram.observe(value)
+
+    def to_prometheus_text(self) -> str:
+        """Export all metrics in Prometheus text exposition format
+
+        Returns:
+            str: Counters as <prefix>_<name>_total, histograms as <prefix>_<name>_bucket/_sum/_count
+        """
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+        for name, value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, histogram in histograms:
+            metric = f"{self.prefix}_{name}"
+            data = histogram.to_dict()
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in data["buckets"].items():
+                le = "+Inf" if bound == "inf" else bound
+                lines.append(f'{metric}_bucket{{le="{le}"}} {count}')
+            lines += [f"{metric}_sum {data['sum']}", f"{metric}_count {data['count']}"]
+        return "\n".join(lines) + "\n"
+
+
+class Instrumentation:
+    """Hooks of recognition stages. Durations of spans are summed per stage in timings,
+    reported to metrics sink as <stage>_seconds observations and, with tracing, kept as Chrome trace events.
+
+    Timings are collected for a single recognition at a time, ImageRecognizer resets them for every image.
+    """
+
+    def __init__(self, sink: Optional[MetricsSink] = None, trace: bool = False):
+        """Create hooks
+
+        Args:
+            sink (MetricsSink, optional): Sink of counters and observations. Defaults to None, no metrics.
+            trace (bool, optional): Keep Chrome trace events of all spans. Defaults to False.
+        """
+        self.sink = sink or MetricsSink()
+        self.trace = trace
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.trace_events: List[dict] = []
+
+    @contextmanager
+    def span(self, name: str, **args) -> Iterator[None]:
+        """Measure duration of a stage
+
+        Args:
+            name (str): Name of stage
+            args: Details of the span shown in trace, e.g. color format
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.timings[name] += end - start
+            self.sink.observe(f"{name}_seconds", end - start)
+            if self.trace:
+                self.trace_events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": start * 1e6,
+                        "dur": (end - start) * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": args,
+                    }
+                )
+
+    def model_call(self, model: str, batch_size: int):
+        """Count model call and record its batch size
+
+        Args:
+            model (str): "resolution" or "color_format"
+            batch_size (int): Number of images given to the model
+        """
+        self.sink.increment(f"{model}_model_calls")
+        self.sink.observe(f"{model}_batch_size", batch_size)
+
+    def reset_timings(self):
+        self.timings = defaultdict(float)
+
+    def dump_trace(self, path: str):
+        """Write trace events in Chrome trace format, viewable in chrome://tracing or Perfetto
+
+        Args:
+            path (str): Path to JSON file
+        """
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, file)
+
+
+class _DisabledInstrumentation(Instrumentation):
+    """Instrumentation used when none is given, its spans only cost a function call"""
+
+    @contextmanager
+    def span(self, name: str, **args) -> Iterator[None]:
+        yield
+
+    def model_call(self, model: str, batch_size: int):
+        pass
+
+
+DISABLED = _DisabledInstrumentation()
@@ -0,0 +1,362 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from raw_image_data_previewer.app.image.color_format import ColorFormat, Endianness, PixelFormat, PixelPlane
+from raw_image_data_previewer.app.parser.common import LAYOUT_UNPACKED
+from raw_image_data_previewer.app.parser.factory import FORMAT_REGISTRY
+
+# Windows of the statistics sample start at multiples of every period of the formats, so byte lanes line up
+SAMPLE_ALIGNMENT = 12
+# Part of bytes of padding bits which may be set, or of alpha bits which may change, e.g. in headers of files
+CONSTANT_TOLERANCE = 0.01
+BYTE_VALUES = np.arange(256, dtype=np.float64)
+BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder="little").astype(np.float64)
+PACKED_YUV_CHROMA_LANES = {
+    PixelFormat.YUYV: (1, 3),
+    PixelFormat.YVYU: (1, 3),
+    PixelFormat.UYVY: (0, 2),
+    PixelFormat.VYUY: (0, 2),
+}
+
+
+@dataclass
+class FormatLayout:
+    """Expected statistics of bits of a color format, over a period of bytes repeating pixel after pixel
+
+    Args:
+        period (int): Bytes between the same bits of neighbouring pixels (or groups of pixels)
+        significance (NDArray): Significance of every bit of the period (bit 0 is the least significant one)
+         in its component, shape (period, 8): from 1/bits for the least significant bit of a component
+         to 1 for its most significant one
+        weights (NDArray): Significance centered within every component, weights of a component sum to 0
+        component (NDArray): Bits of color components, shape (period, 8)
+        zero (NDArray): Bits which are always 0, padding of components stored in wider items, shape (period, 8)
+        alpha (NDArray): Bits of alpha component, expected to be constant, shape (period, 8)
+        chroma_lanes (Tuple[int, ...]): Bytes of the period holding chroma samples of packed YUV formats
+        luma_fraction (float): Part of the data holding the Y plane of planar YUV formats, 1 for other formats
+        chroma (Optional[FormatLayout]): Layout of the rest of the data, holding chroma planes
+    """
+
+    period: int
+    significance: NDArray = field(init=False)
+    weights: NDArray = field(init=False)
+    component: NDArray = field(init=False)
+    zero: NDArray = field(init=False)
+    alpha: NDArray = field(init=False)
+    chroma_lanes: Tuple[int, ...] = ()
+    luma_fraction: float = 1.0
+    chroma: Optional["FormatLayout"] = None
+
+    def __post_init__(self):
+        self.significance = np.zeros((self.period, 8))
+        self.weights = np.zeros((self.period, 8))
+        self.component = np.zeros((self.period, 8), dtype=bool)
+        self.zero = np.zeros((self.period, 8), dtype=bool)
+        self.alpha = np.zeros((self.period, 8), dtype=bool)
+
+    def add_bit(self, byte: int, bit: int, component_bit: int, bits: int, alpha: bool = False):
+        """Mark bit of the period as a bit of a component
+
+        Args:
+            byte (int): Byte of the period
+            bit (int): Bit of the byte
+            component_bit (int): Bit of the component, 0 for its least significant one
+            bits (int): Bits of the component
+            alpha (bool): Whether the component is alpha
+        """
+        if alpha:
+            self.alpha[byte, bit] = True
+        else:
+            self.component[byte, bit] = True
+            self.significance[byte, bit] = (component_bit + 1) / bits
+            self.weights[byte, bit] = (2 * component_bit + 1 - bits) / (2 * bits)
+
+
+def _items_layout(items: Sequence[Tuple[int, bool]], dtype: np.dtype) -> FormatLayout:
+    """Layout of components stored in whole items of dtype, each given by its bits and whether it is alpha"""
+    dtype = np.dtype(dtype)
+    itemsize = dtype.itemsize
+    big_endian = dtype.byteorder == ">" or (dtype.byteorder == "=" and not np.little_endian)
+    layout = FormatLayout(len(items) * itemsize)
+    for item, (bits, alpha) in enumerate(items):
+        for value_bit in range(8 * itemsize):
+            byte = item * itemsize + (itemsize - 1 - value_bit // 8 if big_endian else value_bit // 8)
+            if value_bit >= bits:
+                layout.zero[byte, value_bit % 8] = True
+            else:
+                layout.add_bit(byte, value_bit % 8, value_bit, bits, alpha)
+    return layout
+
+
+def _alpha_component(color_format: ColorFormat) -> Optional[int]:
+    if color_format.pixel_format in (PixelFormat.RGBA, PixelFormat.BGRA):
+        index = 3
+    elif color_format.pixel_format in (PixelFormat.ARGB, PixelFormat.ABGR):
+        index = 0
+    else:
+        return None
+    return index if color_format.bits_per_components[index] else None
+
+
+def format_layout(color_format: ColorFormat) -> FormatLayout:
+    """Derive expected statistics of bits of a color format from its decode plan
+
+    Args:
+        color_format (ColorFormat): Color format
+
+    Returns:
+        FormatLayout: Layout of bits of the format
+    """
+    plan = FORMAT_REGISTRY.plan(color_format)
+    bits_per_components = color_format.bits_per_components
+    if color_format.pixel_plane != PixelPlane.PACKED:
+        layout = _items_layout([(8, False)], np.uint8)
+        layout.luma_fraction = 2 / 3 if color_format.subsampling_vertical == 2 else 1 / 2
+        # Chroma samples of semiplanar formats are interleaved, U and V ones are two bytes apart
+        chroma_planes = 2 if color_format.pixel_plane == PixelPlane.SEMIPLANAR else 1
+        layout.chroma = _items_layout([(8, False)] * chroma_planes, np.uint8)
+        return layout
+    if color_format.pixel_format in PACKED_YUV_CHROMA_LANES:
+        layout = _items_layout([(8, False)] * 4, np.uint8)
+        layout.chroma_lanes = PACKED_YUV_CHROMA_LANES[color_format.pixel_format]
+        return layout
+    if color_format.pixel_format == PixelFormat.MONO:
+        return _items_layout([(bits_per_components[0], False)], plan.dtype)
+    if color_format.pixel_format == PixelFormat.BAYER_RG:
+        # Neighbouring samples of the same color are two samples apart
+        return _items_layout([(bits_per_components[0], False)] * 2, plan.dtype)
+
+    alpha = _alpha_component(color_format)
+    if plan.layout != LAYOUT_UNPACKED:
+        return _items_layout([(bits, i == alpha) for i, bits in enumerate(bits_per_components) if bits], plan.dtype)
+
+    unpacking = plan.unpacking
+    layout = FormatLayout(unpacking.step)
+    for _, component, group_bytes, shift, mask in unpacking.fields:
+        bits = int(mask).bit_length()
+        for component_bit in range(bits):
+            offset = 8 * group_bytes.start + int(shift) + component_bit
+            byte = offset // 8
+            if unpacking.endianness == Endianness.BIG_ENDIAN:
+                byte = unpacking.step - 1 - byte
+            layout.add_bit(byte, offset % 8, component_bit, bits, component == alpha)
+    return layout
+
+
+def aligned_sample(data: NDArray, sample_size: int, windows: int) -> NDArray:
+    """Take windows spread evenly over the data, starting at multiples of SAMPLE_ALIGNMENT
+
+    Args:
+        data (NDArray): Bytes as 1D uint8 array
+        sample_size (int): Max size of all windows together
+        windows (int): Number of windows
+
+    Returns:
+        NDArray: Windows concatenated, the data itself if it is not bigger than sample_size
+    """
+    if data.size <= sample_size:
+        return data[: data.size // SAMPLE_ALIGNMENT * SAMPLE_ALIGNMENT]
+    window_size = sample_size // windows // SAMPLE_ALIGNMENT * SAMPLE_ALIGNMENT
+    starts = np.linspace(0, data.size - window_size, windows).astype(np.int64)
+    starts -= starts % SAMPLE_ALIGNMENT
+    return np.concatenate([data[start : start + window_size] for start in starts])
+
+
+class ByteStatistics:
+    """Histograms of bytes of a sample, computed lazily for every period and cached
+
+    Args:
+        sample (NDArray): Bytes as 1D uint8 array
+    """
+
+    def __init__(self, sample: NDArray):
+        self.sample = sample
+        self._histograms: Dict[int, Tuple[NDArray, NDArray]] = {}
+
+    def histograms(self, period: int) -> Tuple[NDArray, NDArray]:
+        """Histograms of every byte of the period, and of XOR of it with the same byte of the next period
+
+        Args:
+            period (int): Period in bytes
+
+        Returns:
+            Tuple[NDArray, NDArray]: Histograms of values and of their changes, shape (period, 256) each
+        """
+        if period not in self._histograms:
+            changes = self.sample[period:] ^ self.sample[:-period]
+            self._histograms[period] = (
+                np.stack([np.bincount(self.sample[lane::period], minlength=256) for lane in range(period)]),
+                np.stack([np.bincount(changes[lane::period], minlength=256) for lane in range(period)]),
+            )
+        return self._histograms[period]
+
+    def bits(self, period: int) -> Tuple[NDArray, NDArray]:
+        """Density of every bit of the period, and rate of its changes from a period to the next one
+
+        Args:
+            period (int): Period in bytes
+
+        Returns:
+            Tuple[NDArray, NDArray]: Densities and change rates, shape (period, 8) each
+        """
+        values, changes = self.histograms(period)
+        return (
+            values @ BYTE_BITS / np.maximum(values.sum(axis=1, keepdims=True), 1),
+            changes @ BYTE_BITS / np.maximum(changes.sum(axis=1, keepdims=True), 1),
+        )
+
+    def lanes(self, period: int) -> Tuple[NDArray, NDArray]:
+        """Mean and standard deviation of every byte of the period
+
+        Args:
+            period (int): Period in bytes
+
+        Returns:
+            Tuple[NDArray, NDArray]: Means and standard deviations, period values each
+        """
+        values = self.histograms(period)[0]
+        counts = np.maximum(values.sum(axis=1), 1)
+        means = values @ BYTE_VALUES / counts
+        return means, np.sqrt(np.maximum(values @ BYTE_VALUES**2 / counts - means**2, 0))
+
+
+def chroma_score(chroma_mean: float, chroma_std: float, luma_std: float) -> float:
+    """Score of chroma samples of natural images: close to 128 and varying much less than luma
+
+    Returns:
+        float: 1 for constant chroma of 128, below 0 for chroma varying about as much as luma
+    """
+    return 1 - 2 * min(chroma_std / max(luma_std, 1e-6), 1) - abs(chroma_mean - 128) / 64
+
+
+def layout_score(layout: FormatLayout, statistics: ByteStatistics) -> float:
+    """Score how well bits of the data match the layout of a format.
+
+    Bits of natural images change less from a pixel to the next one the more significant they are, so significant
+    bits of components should be smooth at the period of the format and the least significant ones noisy.
+    Padding bits should be 0 and alpha bits constant, up to CONSTANT_TOLERANCE. Significant bits are also
+    smoother at the period of the format than at other periods, which tells apart formats of 8 bit samples.
+
+    Args:
+        layout (FormatLayout): Layout of the format
+        statistics (ByteStatistics): Statistics of the data (of its Y plane for planar formats)
+
+    Returns:
+        float: Score, higher for more plausible formats
+    """
+    density, changes = statistics.bits(layout.period)
+    smoothness = 1 - 2 * changes
+    significance = layout.significance[layout.component]
+    # Constant bits are better explained by padding or alpha than by components
+    varying = np.where(changes < CONSTANT_TOLERANCE, 0, smoothness)
+    level = float(varying[layout.component] @ significance / significance.sum()) if significance.size else 0.0
+    votes = np.concatenate(
+        [
+            (smoothness * layout.weights)[layout.component],
+            1 - 2 * np.minimum(density[layout.zero] / CONSTANT_TOLERANCE, 1),
+            1 - 2 * np.minimum(changes[layout.alpha] / CONSTANT_TOLERANCE, 1),
+        ]
+    )
+    score = level + (float(votes.mean()) if votes.size else 0.0)
+    if layout.chroma_lanes:
+        means, stds = statistics.lanes(layout.period)
+        luma_lanes = [lane for lane in range(layout.period) if lane not in layout.chroma_lanes]
+        chroma = list(layout.chroma_lanes)
+        score += chroma_score(float(means[chroma].mean()), float(stds[chroma].mean()), float(stds[luma_lanes].mean()))
+    return score
+
+
+@dataclass
+class FormatPrefilter:
+    """Rank color formats by cheap statistics of raw bytes, so only the most plausible ones reach the model.
+
+    Every format is scored by layout_score: bit-plane statistics at the period of the format (1, 2, 3 or 4
+    bytes), constancy of its alpha bits and of padding bits, and for YUV formats statistics of chroma samples.
+    All of them are derived from histograms of bytes of a sample of the data, computed once per period.
+
+    Args:
+        top_k (int): Number of best ranked formats which are kept
+        sample_size (int): Max number of bytes statistics are computed from
+        windows (int): Number of windows the sample is taken from, spread evenly over the data
+    """
+
+    top_k: int = 4
+    sample_size: int = 2**18
+    windows: int = 4
+    _layouts: Dict[str, FormatLayout] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def layout(self, color_format: str) -> FormatLayout:
+        """Get layout of a color format, derived once
+
+        Args:
+            color_format (str): Name of color format
+
+        Returns:
+            FormatLayout: Layout of bits of the format
+        """
+        if color_format not in self._layouts:
+            self._layouts[color_format] = format_layout(FORMAT_REGISTRY.color_format(color_format))
+        return self._layouts[color_format]
+
+    def scores(self, raw_data: bytes, color_formats: Sequence[str]) -> Dict[str, float]:
+        """Score color formats of the data
+
+        Args:
+            raw_data (bytes): Raw image data
+            color_formats (Sequence[str]): Names of color formats
+
+        Returns:
+            Dict[str, float]: Scores of color formats, higher for more plausible ones
+        """
+        data = np.frombuffer(raw_data, dtype=np.uint8)
+        statistics: Dict[float, Tuple[ByteStatistics, Optional[ByteStatistics]]] = {}
+        scores = {}
+        for color_format in color_formats:
+            layout = self.layout(color_format)
+            if layout.luma_fraction not in statistics:
+                luma_end = int(data.size * layout.luma_fraction)
+                luma = ByteStatistics(aligned_sample(data[:luma_end], self.sample_size, self.windows))
+                chroma = None
+                if layout.chroma is not None:
+                    chroma = ByteStatistics(aligned_sample(data[luma_end:], self.sample_size, self.windows))
+                statistics[layout.luma_fraction] = (luma, chroma)
+            luma, chroma = statistics[layout.luma_fraction]
+            scores[color_format] = layout_score(layout, luma)
+            if layout.chroma is not None and chroma.sample.size > layout.chroma.period:
+                (chroma_mean,), (chroma_std,) = chroma.lanes(1)
+                (_,), (luma_std,) = luma.lanes(1)
+                scores[color_format] = (
+                    layout.luma_fraction * scores[color_format]
+                    + (1 - layout.luma_fraction) * layout_score(layout.chroma, chroma)
+                    + chroma_score(float(chroma_mean), float(chroma_std), float(luma_std))
+                )
+        return scores
+
+    def rank(self, raw_data: bytes, color_formats: Sequence[str]) -> List[str]:
+        """Rank color formats of the data, from the most plausible one
+
+        Args:
+            raw_data (bytes): Raw image data
+            color_formats (Sequence[str]): Names of color formats
+
+        Returns:
+            List[str]: Color formats, ties keep the order of color_formats
+        """
+        scores = self.scores(raw_data, color_formats)
+        return sorted(color_formats, key=lambda color_format: -scores[color_format])
+
+    def select(self, raw_data: bytes, color_formats: Sequence[str]) -> List[str]:
+        """Keep top_k best ranked color formats of the data
+
+        Args:
+            raw_data (bytes): Raw image data
+            color_formats (Sequence[str]): Names of color formats
+
+        Returns:
+            List[str]: Kept color formats, in order of color_formats
+        """
+        kept = set(self.rank(raw_data, color_formats)[: self.top_k])
+        return [color_format for color_format in color_formats if color_format in kept]
@@ -0,0 +1,28 @@
+from typing import List
+
+from backend import convert_model
+from image_recognizer import ImageRecognizer
+
+
+def quantize_models(
+    quantization: str = "float16",
+    resolution_model_path: str = ImageRecognizer.DEFAULT_RESOLUTION_MODEL_PATH,
+    color_format_model_path: str = ImageRecognizer.DEFAULT_COLOR_FORMAT_MODEL_PATH,
+) -> List[str]:
+    """Write quantized tflite versions of both keras models next to them,
+    where ImageRecognizer looks for them with given quantization
+
+    Args:
+        quantization (str, optional): One of backend.QUANTIZATIONS. Defaults to "float16".
+        resolution_model_path (str, optional): Path to resolution keras model.
+         Defaults to ImageRecognizer.DEFAULT_RESOLUTION_MODEL_PATH.
+        color_format_model_path (str, optional): Path to color format keras model.
+         Defaults to ImageRecognizer.DEFAULT_COLOR_FORMAT_MODEL_PATH.
+
+    Returns:
+        List[str]: Paths to quantized resolution and color format models
+    """
+    return [
+        convert_model(model_path, "tflite", quantization=quantization)
+        for model_path in (resolution_model_path, color_format_model_path)
+    ]
@@ -1,20 +1,31 @@
 """Main functionalities."""
 
-from .image.image import Image, RawDataContainer
-from .image.color_format import AVAILABLE_FORMATS
-from .parser.factory import ParserFactory
+from .image.image import open_raw_data
+from .parser.factory import FORMAT_REGISTRY, ParserFactory
 import cv2 as cv
 import os
+from contextlib import nullcontext
 
 
-def load_image(file_path, color_format, width):
+def load_image(file_path, color_format, width, target_size=None, instrumentation=None):
+    """Parses raw image, only rows and columns needed for target size (width, height) if it is given.
+
+    If instrumentation is given, duration of reading and parsing is recorded in its "parse" span.
+    """
     try:
-        image = Image.from_file(file_path)
-        parser = ParserFactory.create_object(determine_color_format(color_format))
+        format_obj = determine_color_format(color_format)
+        parser = ParserFactory.create_object(format_obj)
     except Exception as e:
         print(type(e).__name__, e)
 
-    image = parser.parse(image.data_buffer, determine_color_format(color_format), width)
+    span = instrumentation.span("parse", color_format=color_format) if instrumentation else nullcontext()
+    with span, open_raw_data(file_path, mapped=False) as raw_data:
+        if target_size is None:
+            image = parser.parse(raw_data.data_buffer, format_obj, width)
+        else:
+            image = parser.parse_decimated(
+                raw_data.data_buffer, format_obj, width, target_size
+            )
 
     return image
 
@@ -28,12 +39,18 @@ def get_displayable(image):
     return parser.get_displayable(image)
 
 
+def get_luma(image):
+
+    if image.color_format is None:
+        raise Exception("Image should be already parsed!")
+    parser = ParserFactory.create_object(image.color_format)
+
+    return parser.get_luma(image)
+
+
 def determine_color_format(format_string):
 
-    if format_string in AVAILABLE_FORMATS.keys():
-        return AVAILABLE_FORMATS[format_string]
-    else:
-        raise NotImplementedError("Provided string is not name of supported format.")
+    return FORMAT_REGISTRY.color_format(format_string)
 
 
 def save_image_as_file(image, file_path):
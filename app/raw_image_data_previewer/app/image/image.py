@@ -1,6 +1,9 @@
 """Support for containing image."""
 
+import mmap
+import os
 import numpy
+from contextlib import contextmanager
 
 
 class RawDataContainer:
@@ -8,6 +11,13 @@ class RawDataContainer:
 
     def __init__(self, data_buffer):
         self.data_buffer = data_buffer
+        self._mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     @classmethod
     def from_file(cls, file_path):
@@ -26,6 +36,77 @@ class RawDataContainer:
                 )
             )
 
+    @classmethod
+    def from_mapped_file(cls, file_path):
+        """Constructs container with read-only, memory mapped file data.
+
+        Data buffer is a memoryview of the mapping, so it can be shared and
+        sliced without copying, and its pages are backed by the OS page cache.
+
+        Keyword arguments:
+
+            file_path: path to file
+        """
+
+        try:
+            with open(file_path, "rb") as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    return cls(b"")
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        except OSError as err:
+            raise Exception(
+                "Error occured while trying to map file {}.\nReason: {}".format(
+                    file_path, err
+                )
+            )
+
+        container = cls(memoryview(mapping))
+        container._mapping = mapping
+        return container
+
+    def close(self):
+        """Releases file mapping, if container holds one.
+
+        Mapping stays open while there are arrays still viewing it,
+        it is then closed when the last of them is garbage collected.
+        """
+
+        if self._mapping is None:
+            return
+        try:
+            self.data_buffer.release()
+            self._mapping.close()
+        except BufferError:
+            pass
+        self._mapping = None
+
+
+@contextmanager
+def open_raw_data(source, mapped=True):
+    """Provides container with raw data from any supported source.
+
+    Data is read from file only if source is a path, containers and
+    bytes-like objects are used as they are.
+
+    Keyword arguments:
+
+        source: path to file, bytes-like object or instance of RawDataContainer
+        mapped: whether file should be memory mapped instead of read
+    """
+
+    if isinstance(source, RawDataContainer):
+        yield source
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield RawDataContainer(source)
+    else:
+        if mapped:
+            container = RawDataContainer.from_mapped_file(source)
+        else:
+            container = RawDataContainer.from_file(source)
+        with container:
+            yield container
+
 
 class Image(RawDataContainer):
     """Container for image data."""
@@ -5,11 +5,111 @@ from ..image.image import Image
 from ..image.color_format import Endianness
 import numpy
 import math
+import functools
+import cv2 as cv
+
+# Part of pixels of every target pixel box (in each direction) which is decoded
+# by decimated parsing. Boxes are sampled with contiguous runs of pixels,
+# so patterns repeating every few pixels or rows are averaged like in full image.
+DECIMATION_FRACTION = 0.5
+
+# Layouts of raw data of decode plans
+LAYOUT_VIEW = "view"  # items of plan dtype, viewed as they are
+LAYOUT_ALPHA = "alpha"  # three byte filled components per pixel, alpha is added
+LAYOUT_UNPACKED = "unpacked"  # components tightly packed in bits
+
+
+class DecodePlan:
+    """Everything parsing and converting needs to know about a color format, derived from it once."""
+
+    def __init__(
+        self,
+        color_format,
+        parser,
+        dtype,
+        items_per_pixel,
+        layout=LAYOUT_VIEW,
+        alpha=None,
+        unpacking=None,
+        channels=None,
+        conversion=None,
+    ):
+        """Constructs DecodePlan instance.
+
+        Keyword arguments:
+
+            color_format: instance of ColorFormat
+            parser: parser instance which compiled the plan
+            dtype: numpy dtype of processed data
+            items_per_pixel: items of processed data per pixel, rows are padded to whole ones
+            layout: LAYOUT_VIEW, LAYOUT_ALPHA or LAYOUT_UNPACKED
+            alpha: (index, value) of alpha added to components of LAYOUT_ALPHA
+            unpacking: instance of UnpackingPlan for LAYOUT_UNPACKED
+            channels: order of channels of displayable image, None if they are kept
+            conversion: cv.cvtColor code converting to displayable image
+        """
+        self.color_format = color_format
+        self.parser = parser
+        self.dtype = numpy.dtype(dtype)
+        self.items_per_pixel = items_per_pixel
+        self.layout = layout
+        self.alpha = alpha
+        self.unpacking = unpacking
+        self.channels = channels
+        self.conversion = conversion
 
 
 class AbstractParser(metaclass=ABCMeta):
     """An abstract data parser"""
 
+    # Pixel rows and columns which have to be decoded together (e.g. YUV macropixels)
+    DECIMATION_UNIT = (1, 1)
+
+    def __init__(self):
+        self._plans = {}
+
+    def plan(self, color_format):
+        """Provides decode plan of color format, compiled on its first use by this parser.
+
+        Plans are cached by color format instance, so it should not be changed once used.
+
+        Keyword arguments:
+
+            color_format: instance of ColorFormat
+
+        Returns: instance of DecodePlan
+        """
+
+        plan = self._plans.get(color_format)
+        if plan is None:
+            plan = self._plans[color_format] = self.compile(color_format)
+        return plan
+
+    def compile(self, color_format):
+        """Derives decode plan of color format, packed RGB-like one with four items per pixel by default.
+
+        Keyword arguments:
+
+            color_format: instance of ColorFormat
+
+        Returns: instance of DecodePlan
+        """
+
+        bits_per_components = color_format.bits_per_components
+        max_value = max(bits_per_components)
+        dtype = numpy.uint8 if max_value <= 8 else numpy.uint16
+        bpcs_set = set(bits_per_components)
+        if max_value % 8 == 0 and bpcs_set == {max_value, 0}:
+            return DecodePlan(color_format, self, dtype, 4, LAYOUT_ALPHA, alpha=(3, 255))
+        if max_value % 8 == 0 and len(bpcs_set) <= 2:
+            return DecodePlan(color_format, self, dtype, 4)
+        unpacking = unpacking_plan(
+            tuple(bits_per_components), color_format.endianness
+        )
+        return DecodePlan(
+            color_format, self, dtype, 4, LAYOUT_UNPACKED, unpacking=unpacking
+        )
+
     @abstractmethod
     def get_displayable(self, image):
         """Provides displayable image data (RGB formatted)
@@ -34,100 +134,408 @@ class AbstractParser(metaclass=ABCMeta):
         Returns: instance of Image processed to chosen format
         """
 
-        max_value = max(color_format.bits_per_components)
-        curr_dtype = None
-        if max_value <= 8:
-            curr_dtype = numpy.uint8
+        plan = self.plan(color_format)
+        row_items = width * plan.items_per_pixel
+        if plan.layout == LAYOUT_VIEW:
+            processed_data = padded_frombuffer(raw_data, plan.dtype, row_items)
+        elif plan.layout == LAYOUT_ALPHA:
+            # Components are copied once, next to alpha, into the result
+            components = padded_frombuffer(raw_data, plan.dtype, width * 3)
+            alpha_index, alpha = plan.alpha
+            processed_data = numpy.empty((components.size // 3, 4), dtype=plan.dtype)
+            processed_data[:, alpha_index] = alpha
+            colors = slice(1, 4) if alpha_index == 0 else slice(0, 3)
+            processed_data[:, colors] = numpy.reshape(components, (-1, 3))
+            processed_data = numpy.reshape(processed_data, processed_data.size)
         else:
-            curr_dtype = numpy.uint16
-
-        data_array = []
-        temp_set = set(color_format.bits_per_components)
-
-        if (
-            len(temp_set) == 1 or len(temp_set) == 2 and not temp_set.add(0)
-        ) and max_value % 8 == 0:
-            raw_data = bytearray(raw_data)
-            if len(raw_data) % numpy.dtype(curr_dtype).alignment != 0:
-                raw_data += (0).to_bytes(
-                    len(raw_data) % numpy.dtype(curr_dtype).alignment,
-                    byteorder="little",
-                )
-            temp = numpy.frombuffer(raw_data, dtype=curr_dtype)
-            data_array = temp
-            if len(temp_set) == 2:
-                if temp.size % (width * 3) != 0:
-                    temp = numpy.concatenate(
-                        (temp, numpy.zeros((width * 3) - (temp.size % (width * 3))))
-                    )
-                temp = numpy.concatenate(
-                    (
-                        numpy.reshape(temp, (int(temp.size / (width * 3)), width, 3)),
-                        numpy.full(
-                            (int(temp.size / (width * 3)), width, 1),
-                            255,
-                            dtype=curr_dtype,
-                        ),
-                    ),
-                    axis=2,
-                )
-                data_array = numpy.reshape(temp, temp.size)
-        else:
-            data_array = self._parse_not_bytefilled(raw_data, color_format)
-
-        processed_data = numpy.array(data_array, dtype=curr_dtype)
-        if processed_data.size % (width * 4) != 0:
-            processed_data = numpy.concatenate(
-                (
-                    processed_data,
-                    numpy.zeros((width * 4) - (processed_data.size % (width * 4))),
-                )
+            processed_data = pad_items(
+                plan.unpacking.unpack(raw_data).ravel().astype(plan.dtype, copy=False),
+                row_items,
             )
+
         return Image(
             raw_data,
             color_format,
             processed_data,
             width,
-            processed_data.size // (width * 4),
+            self._height(processed_data, width, plan),
         )
 
-    def _parse_not_bytefilled(self, raw_data, color_format):
-        """Parses provided raw data to an image - bits per component are not multiple of 8.
+    def _height(self, processed_data, width, plan):
+        """Returns height of image of processed data, which is padded to whole rows."""
+
+        return processed_data.size // (width * plan.items_per_pixel)
+
+    def get_luma(self, image):
+        """Provides luminance of image, computed directly from its components.
+
+        Values are the same as of cv.cvtColor(get_displayable(image), cv.COLOR_BGR2GRAY),
+        which is how color format model inputs are made. This implementation does exactly that,
+        parsers which can compute the same values directly override it.
+
+        Keyword arguments:
+
+            image: processed image object
+
+        Returns: Numpy array of shape (height, width) containing luminance (uint8).
+        """
+
+        return cv.cvtColor(self.get_displayable(image), cv.COLOR_BGR2GRAY)
+
+    def parse_decimated(self, raw_data, color_format, width, target_size):
+        """Parses only pixel rows and columns needed for an image which will be resized to target size.
+
+        Image is split into boxes of pixels which become single pixels of target size.
+        From every box, only a contiguous run of DECIMATION_FRACTION of its rows and columns
+        is decoded, in whole units of the format (DECIMATION_UNIT). Directions in which boxes
+        are smaller than 2 pixels are not decimated. Returned image is of the same color format,
+        only smaller, so get_displayable works on it as usual.
+
+        Resized to target size with area interpolation, it differs from the resized full image
+        by less than 2% of the full range on average for images parsed in their own format,
+        and by less than 5% for data parsed in a wrong format, which looks like noise
+        (checked by tests/test_decimated_parse.py). Layouts which can not be sampled
+        (e.g. pixels not aligned to bytes) are parsed at full resolution.
 
         Keyword arguments:
 
             raw_data: bytes object
             color_format: target instance of ColorFormat
+            width: target width to interpret
+            target_size: (width, height) the image will be resized to
+
+        Returns: instance of Image processed to chosen format
+        """
+
+        decimated = self._decimate(raw_data, color_format, width, target_size)
+        if decimated is None:
+            return self.parse(raw_data, color_format, width)
+        decimated_data, decimated_width = decimated
+        return self.parse(decimated_data, color_format, decimated_width)
+
+    def _bytes_per_pixel(self, color_format):
+        """Returns number of bytes of a single pixel, None if pixels are not aligned to bytes."""
+
+        pixel_bits = sum(color_format.bits_per_components)
+        return pixel_bits // 8 if pixel_bits % 8 == 0 else None
+
+    def _sample(self, width, height, target_size):
+        """Chooses pixel rows and columns of decimated image.
+
+        Returns: tuple of rows and columns indexes, None if image is not bigger than needed
+        """
+
+        unit_rows, unit_cols = self.DECIMATION_UNIT
+        rows = sample_units(height, unit_rows, target_size[1])
+        cols = sample_units(width, unit_cols, target_size[0])
+        if rows.size == height and cols.size == width:
+            return None
+        return rows, cols
+
+    def _decimate(self, raw_data, color_format, width, target_size):
+        """Gathers bytes of sampled pixels of a packed format.
+
+        Returns: tuple of decimated raw data and its width, None if it can not be decimated
+        """
+
+        bytes_per_pixel = self._bytes_per_pixel(color_format)
+        if bytes_per_pixel is None:
+            return None
+        height = len(raw_data) // (width * bytes_per_pixel)
+        sample = self._sample(width, height, target_size)
+        if sample is None:
+            return None
+        rows, cols = sample
+
+        data = numpy.frombuffer(
+            raw_data, dtype=numpy.uint8, count=height * width * bytes_per_pixel
+        ).reshape(height, width, bytes_per_pixel)
+        return data[rows].take(cols, axis=1).tobytes(), cols.size
+
+
+def padded_frombuffer(raw_data, dtype, multiple=1):
+    """Provides items of dtype from raw data, zero padded to a multiple of given number of items.
+
+    Raw data is viewed without copying if it needs no padding. Otherwise it is copied once
+    into a zeroed array of the padded size of dtype. Incomplete trailing item is completed
+    with zero bytes.
+
+    Keyword arguments:
+
+        raw_data: bytes-like object
+        dtype: dtype of items
+        multiple: number of items the size of result is a multiple of
+
+    Returns: 1D numpy array of items, read-only if it views read-only raw data
+    """
+
+    dtype = numpy.dtype(dtype)
+    raw_size = memoryview(raw_data).nbytes
+    items = -(-raw_size // dtype.itemsize)
+    padded_items = -(-items // multiple) * multiple
+    if padded_items * dtype.itemsize == raw_size:
+        return numpy.frombuffer(raw_data, dtype=dtype)
+    data = numpy.zeros(padded_items, dtype=dtype)
+    data.view(numpy.uint8)[:raw_size] = numpy.frombuffer(raw_data, dtype=numpy.uint8)
+    return data
 
-        Returns: properly parsed buffer data (list)
+
+def pad_items(data, multiple):
+    """Pads 1D array with zeros to a multiple of given number of items, in its own dtype.
+
+    Keyword arguments:
+
+        data: 1D numpy array
+        multiple: number of items the size of result is a multiple of
+
+    Returns: data itself if it needs no padding, its padded copy otherwise
+    """
+
+    if data.size % multiple == 0:
+        return data
+    padded = numpy.zeros(-(-data.size // multiple) * multiple, dtype=data.dtype)
+    padded[: data.size] = data
+    return padded
+
+
+def scale_component(component, bits):
+    """Scales component to 0-255 range like get_displayable does, in integers.
+
+    Keyword arguments:
+
+        component: numpy array of component values
+        bits: bits of component
+
+    Returns: numpy array of scaled component (uint8)
+    """
+
+    return (component.astype(numpy.uint32) * 255 // (2**bits - 1)).astype(numpy.uint8)
+
+
+@functools.lru_cache(maxsize=None)
+def scaling_lut(bits, size, scale_first=True):
+    """Builds lookup table scaling component values to 0-255 range.
+
+    Entries are computed in float64 exactly like get_displayable used to scale
+    whole images: (255 * value) / (2**bits - 1), or 255 * (value / (2**bits - 1))
+    if scale_first is not set, then truncated to uint8. Table covers all values
+    of the component dtype, also ones above 2**bits - 1, so scaling through it
+    is bit exact with the float computation. Components of 0 bits (missing alpha)
+    are 255. Tables are cached and read-only.
+
+    Keyword arguments:
+
+        bits: bits of component
+        size: number of entries, 256 or 65536 for uint8 or uint16 components
+        scale_first: whether value is multiplied by 255 before division
+
+    Returns: numpy array of scaled values (uint8)
+    """
+
+    if bits == 0:
+        lut = numpy.full(size, 255, dtype=numpy.uint8)
+    else:
+        values = numpy.arange(size, dtype=numpy.float64)
+        with numpy.errstate(invalid="ignore"):
+            if scale_first:
+                lut = ((255 * values) / (2**bits - 1)).astype(numpy.uint8)
+            else:
+                lut = (255 * (values / (2**bits - 1))).astype(numpy.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+def scale_components(data, bits_per_components, out=None, scale_first=True):
+    """Scales components to 0-255 range through lookup tables, without float copies of data.
+
+    uint8 components go through cv.LUT straight into the result, uint16 ones are
+    looked up with numpy indexing, which allocates only the uint8 result.
+
+    Keyword arguments:
+
+        data: numpy array of uint8 or uint16 components, the last axis holds
+         components of a pixel if bits_per_components has more than one item
+        bits_per_components: bits of every component, or a single int for all of them
+        out: uint8 array of data shape the result is written to, new one by default
+        scale_first: see scaling_lut
+
+    Returns: numpy array of scaled components (uint8)
+    """
+
+    if isinstance(bits_per_components, int):
+        bits_per_components = (bits_per_components,)
+    if data.dtype.kind == "f":
+        # Padded images are promoted to float64, their values are still integers
+        data = data.astype(
+            numpy.uint8 if max(bits_per_components) <= 8 else numpy.uint16
+        )
+    size = 1 << (8 * data.dtype.itemsize)
+    if out is None:
+        out = numpy.empty(data.shape, dtype=numpy.uint8)
+    luts = [scaling_lut(bits, size, scale_first) for bits in bits_per_components]
+
+    if size == 256 and data.flags.c_contiguous and out.flags.c_contiguous:
+        if len(set(bits_per_components)) == 1:
+            cv.LUT(data, luts[0], dst=out)
+            return out
+        if data.ndim == 3 and data.shape[2] == len(luts) <= 4:
+            cv.LUT(data, numpy.stack(luts, axis=-1).reshape(1, size, len(luts)), dst=out)
+            return out
+    if len(set(bits_per_components)) == 1:
+        out[...] = luts[0][data]
+        return out
+    for i, lut in enumerate(luts):
+        out[..., i] = lut[data[..., i]]
+    return out
+
+
+def bgr_to_gray(first, second, third):
+    """Converts three channels to gray, bit exact with cv.COLOR_BGR2GRAY of uint8 images.
+
+    Channels are given in order of displayable image, so the first one gets weight
+    of blue, as in cv.cvtColor(get_displayable(image), cv.COLOR_BGR2GRAY).
+
+    Keyword arguments:
+
+        first, second, third: numpy arrays of channels (uint8)
+
+    Returns: numpy array of luminance (uint8)
+    """
+
+    gray = first.astype(numpy.uint32) * 3735
+    gray += second.astype(numpy.uint32) * 19235
+    gray += third.astype(numpy.uint32) * 9798
+    gray += numpy.uint32(1 << 14)
+    gray >>= numpy.uint32(15)
+    return gray.astype(numpy.uint8)
+
+
+def sample_units(size, unit, boxes, fraction=DECIMATION_FRACTION):
+    """Chooses indexes of a contiguous run of units from the middle of every box.
+
+    Keyword arguments:
+
+        size: number of indexes to choose from
+        unit: number of consecutive indexes chosen together
+        boxes: number of equal boxes splitting indexes
+        fraction: part of every box which is chosen
+
+    Returns: sorted numpy array of chosen indexes, all of them if boxes are smaller than 2 units
+    """
+
+    units = size // unit
+    box = units / max(boxes, 1)
+    if box < 2:
+        return numpy.arange(size)
+    run = math.ceil(box * fraction)
+    starts = (numpy.arange(boxes) * box + (box - run) / 2).astype(int)
+    chosen = (starts[:, None] + numpy.arange(run)).ravel()
+    return (chosen[:, None] * unit + numpy.arange(unit)).ravel()
+
+
+class UnpackingPlan:
+    """Layout of pixels tightly packed in raw data: groups of bytes and shifts and masks of components.
+
+    Data is split into groups of bytes, each holding a whole number of pixels.
+    Every group is an integer of given endianness with the first pixel in its
+    least significant bits and the first component in most significant bits
+    of a pixel.
+    """
+
+    def __init__(self, bits_per_components, endianness):
+        """Constructs UnpackingPlan instance.
+
+        Keyword arguments:
+
+            bits_per_components: tuple of bits of every component, 0 for unused ones
+            endianness: instance of Endianness
         """
 
-        comp_bits = color_format.bits_per_components
-        draft_data = bytearray(raw_data)
-        step = int(math.lcm(sum(comp_bits), 8) / 8)
-        if len(draft_data) % step != 0:
-            draft_data += (0).to_bytes(len(raw_data) % step, byteorder="little")
-        position = 0
-        data_array = []
-        while position + step <= len(draft_data):
-
-            current_bytes = draft_data[position : position + step]
-            temp_number = int.from_bytes(
-                current_bytes,
-                "little"
-                if color_format.endianness == Endianness.LITTLE_ENDIAN
-                else "big",
+        self.bits_per_components = tuple(bits_per_components)
+        self.endianness = endianness
+        pixel_bits = sum(self.bits_per_components)
+        self.step = math.lcm(pixel_bits, 8) // 8
+        self.pixels_per_group = self.step * 8 // pixel_bits
+
+        max_bits = max(self.bits_per_components)
+        self.dtype = numpy.uint8 if max_bits <= 8 else numpy.uint16
+        if max_bits > 16:
+            self.dtype = numpy.uint32
+
+        # (pixel, component, bytes of group holding it, shift, mask)
+        self.fields = []
+        offset = 0
+        for pixel in range(self.pixels_per_group):
+            for i in range(len(self.bits_per_components) - 1, -1, -1):
+                bits = self.bits_per_components[i]
+                first_byte = offset // 8
+                last_byte = min((offset + bits + 7) // 8, self.step)
+                self.fields.append(
+                    (
+                        pixel,
+                        i,
+                        range(first_byte, last_byte),
+                        numpy.uint64(offset % 8),
+                        numpy.uint64(2**bits - 1),
+                    )
+                )
+                offset += bits
+
+    def unpack(self, raw_data):
+        """Unpacks components of pixels, data is zero padded to whole number of groups.
+
+        Keyword arguments:
+
+            raw_data: bytes-like object
+
+        Returns: numpy array of shape (pixels, components), smallest fitting unsigned dtype
+        """
+
+        step = self.step
+        data = numpy.frombuffer(raw_data, dtype=numpy.uint8)
+        groups = (data.size + data.size % step) // step
+        if data.size < groups * step:
+            data = numpy.concatenate(
+                (data, numpy.zeros(groups * step - data.size, dtype=numpy.uint8))
             )
+        data = numpy.reshape(data[: groups * step], (groups, step))
+        if self.endianness != Endianness.LITTLE_ENDIAN:
+            data = data[:, ::-1]
+
+        components = len(self.bits_per_components)
+        result = numpy.empty(
+            (groups, self.pixels_per_group, components), dtype=self.dtype
+        )
+        for pixel, i, group_bytes, shift, mask in self.fields:
+            value = numpy.zeros(groups, dtype=numpy.uint64)
+            for byte in group_bytes:
+                value |= data[:, byte].astype(numpy.uint64) << numpy.uint64(
+                    8 * (byte - group_bytes.start)
+                )
+            value >>= shift
+            value &= mask
+            result[:, pixel, i] = value
+
+        return numpy.reshape(result, (groups * self.pixels_per_group, components))
+
+
+@functools.lru_cache(maxsize=None)
+def unpacking_plan(bits_per_components, endianness):
+    """Provides cached UnpackingPlan of given tuple of bits per components and endianness."""
+
+    return UnpackingPlan(bits_per_components, endianness)
+
+
+def unpack_components(raw_data, bits_per_components, endianness):
+    """Unpacks components of pixels tightly packed in raw data, see UnpackingPlan.
+
+    Keyword arguments:
+
+        raw_data: bytes-like object
+        bits_per_components: tuple of bits of every component, 0 for unused ones
+        endianness: instance of Endianness
+
+    Returns: numpy array of shape (pixels, components), smallest fitting unsigned dtype
+    """
 
-            read_bits = 0
-            while read_bits < step * 8:
-                pixel_arr = []
-                for i in range(3, -1, -1):
-                    data = temp_number & (2 ** comp_bits[i] - 1)
-                    pixel_arr.append(data)
-                    temp_number >>= comp_bits[i]
-                    read_bits += comp_bits[i]
-                data_array += pixel_arr[::-1]
-            position += step
-
-        return data_array
+    return unpacking_plan(tuple(bits_per_components), endianness).unpack(raw_data)
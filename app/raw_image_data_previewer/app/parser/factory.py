@@ -1,55 +1,175 @@
 """Factory returning proper parser"""
 
 from .bayer import ParserBayerRG
-from ..image.color_format import PixelPlane, PixelFormat
+from ..image.color_format import AVAILABLE_FORMATS, PixelPlane, PixelFormat
 from .rgb import ParserARGB, ParserRGBA
 from .yuv import ParserYUV420, ParserYUV420Planar, ParserYUV422, ParserYUV422Planar
 from .grayscale import ParserGrayscale
 
 
-class ParserFactory:
-    """Parser factory"""
+class FormatRegistry:
+    """Color formats by name, with a shared parser instance for each of them.
 
-    @staticmethod
-    def create_object(color_format):
-        """Get parser for provided color format.
+    Parser of a format is looked up once, then parsers compile decode plans of formats
+    on their first use (see AbstractParser.plan), so repeated decoding of a format does
+    no setup work. New formats are registered as plugins with register().
+    """
+
+    PACKED_PARSERS = {
+        PixelFormat.BAYER_RG: ParserBayerRG,
+        PixelFormat.MONO: ParserGrayscale,
+        PixelFormat.RGBA: ParserRGBA,
+        PixelFormat.BGRA: ParserRGBA,
+        PixelFormat.ARGB: ParserARGB,
+        PixelFormat.ABGR: ParserARGB,
+        PixelFormat.YUYV: ParserYUV422,
+        PixelFormat.UYVY: ParserYUV422,
+        PixelFormat.VYUY: ParserYUV422,
+        PixelFormat.YVYU: ParserYUV422,
+    }
+    SEMIPLANAR_PARSERS = {
+        PixelFormat.YUV: ParserYUV420,
+        PixelFormat.YVU: ParserYUV420,
+    }
+    PLANAR_422_PARSERS = {PixelFormat.YUV: ParserYUV422Planar}
+    PLANAR_420_PARSERS = {
+        PixelFormat.YUV: ParserYUV420Planar,
+        PixelFormat.YVU: ParserYUV420Planar,
+    }
+
+    def __init__(self, formats):
+        """Constructs FormatRegistry instance.
 
         Keyword arguments:
+
+            formats: dict of instances of ColorFormat by name, registered formats are added to it
+        """
+        self.formats = formats
+        self._parser_classes = {}
+        self._parsers = {}
+        self._format_parsers = {}
+
+    def register(self, color_format, parser_class=None, replace=False):
+        """Registers color format under its name, with parser class decoding it.
+
+        Keyword arguments:
+
             color_format: instance of ColorFormat
+            parser_class: subclass of AbstractParser, chosen by pixel plane and format if not given
+            replace: whether format of the same name can be replaced
+
+        Returns: parser instance of the format
+        """
+
+        if color_format.name in self.formats and not replace:
+            raise ValueError(f"Color format {color_format.name} is already registered")
+        if parser_class is None:
+            parser_class = self._default_parser_class(color_format)
+        previous = self.formats.get(color_format.name)
+        if previous is not None:
+            self._parser_classes.pop(previous, None)
+            self._format_parsers.pop(previous, None)
+        self.formats[color_format.name] = color_format
+        self._parser_classes[color_format] = parser_class
+        return self.parser(color_format)
+
+    def unregister(self, name):
+        """Removes color format of provided name.
+
+        Keyword arguments:
+
+            name: name of color format
+        """
+
+        color_format = self.formats.pop(name)
+        self._parser_classes.pop(color_format, None)
+        self._format_parsers.pop(color_format, None)
+
+    def parser(self, color_format):
+        """Get parser for provided color format, one instance is shared by formats of its class.
+
+        Keyword arguments:
+
+            color_format: instance of ColorFormat or its name
 
         Returns: instance of parser
         """
+
+        if isinstance(color_format, str):
+            color_format = self.color_format(color_format)
+        parser = self._format_parsers.get(color_format)
+        if parser is None:
+            parser_class = self._parser_classes.get(color_format)
+            if parser_class is None:
+                parser_class = self._default_parser_class(color_format)
+            parser = self._parsers.get(parser_class)
+            if parser is None:
+                parser = self._parsers[parser_class] = parser_class()
+            self._format_parsers[color_format] = parser
+        return parser
+
+    def plan(self, color_format):
+        """Get decode plan of provided color format.
+
+        Keyword arguments:
+
+            color_format: instance of ColorFormat or its name
+
+        Returns: instance of DecodePlan
+        """
+
+        if isinstance(color_format, str):
+            color_format = self.color_format(color_format)
+        return self.parser(color_format).plan(color_format)
+
+    def color_format(self, name):
+        """Get registered color format of provided name.
+
+        Keyword arguments:
+
+            name: name of color format
+
+        Returns: instance of ColorFormat
+        """
+
+        color_format = self.formats.get(name)
+        if color_format is None:
+            raise NotImplementedError("Provided string is not name of supported format.")
+        return color_format
+
+    def _default_parser_class(self, color_format):
         mapping = {}
         if color_format.pixel_plane == PixelPlane.PACKED:
-            mapping = {
-                PixelFormat.BAYER_RG: ParserBayerRG,
-                PixelFormat.MONO: ParserGrayscale,
-                PixelFormat.RGBA: ParserRGBA,
-                PixelFormat.BGRA: ParserRGBA,
-                PixelFormat.ARGB: ParserARGB,
-                PixelFormat.ABGR: ParserARGB,
-                PixelFormat.YUYV: ParserYUV422,
-                PixelFormat.UYVY: ParserYUV422,
-                PixelFormat.VYUY: ParserYUV422,
-                PixelFormat.YVYU: ParserYUV422,
-            }
+            mapping = self.PACKED_PARSERS
         elif color_format.pixel_plane == PixelPlane.SEMIPLANAR:
-            mapping = {
-                PixelFormat.YUV: ParserYUV420,
-                PixelFormat.YVU: ParserYUV420,
-            }
+            mapping = self.SEMIPLANAR_PARSERS
         elif color_format.pixel_plane == PixelPlane.PLANAR:
             if color_format.subsampling_vertical == 1:
-                mapping = {PixelFormat.YUV: ParserYUV422Planar}
+                mapping = self.PLANAR_422_PARSERS
             else:
-                mapping = {
-                    PixelFormat.YUV: ParserYUV420Planar,
-                    PixelFormat.YVU: ParserYUV420Planar,
-                }
+                mapping = self.PLANAR_420_PARSERS
 
         proper_class = mapping.get(color_format.pixel_format)
         if proper_class is None:
             raise NotImplementedError(
                 f"No parser found for {color_format.name} color format"
             )
-        return proper_class()
+        return proper_class
+
+
+FORMAT_REGISTRY = FormatRegistry(AVAILABLE_FORMATS)
+
+
+class ParserFactory:
+    """Parser factory"""
+
+    @staticmethod
+    def create_object(color_format):
+        """Get parser for provided color format.
+
+        Keyword arguments:
+            color_format: instance of ColorFormat
+
+        Returns: instance of parser
+        """
+        return FORMAT_REGISTRY.parser(color_format)
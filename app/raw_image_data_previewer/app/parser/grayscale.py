@@ -1,7 +1,6 @@
 """Parser implementation for grayscale pixel format"""
 
-from ..image.image import Image
-from .common import AbstractParser
+from .common import AbstractParser, DecodePlan, scale_components
 
 import numpy
 import cv2 as cv
@@ -10,16 +9,10 @@ import cv2 as cv
 class ParserGrayscale(AbstractParser):
     """A grayscale implementation of a parser"""
 
-    def parse(self, raw_data, color_format, width):
-        """Parses provided raw data to an image, calculating height from provided width.
+    def compile(self, color_format):
+        """Derives decode plan of color format, a big endian item per pixel.
 
-        Keyword arguments:
-
-            raw_data: bytes object
-            color_format: target instance of ColorFormat
-            width: target width to interpret
-
-        Returns: instance of Image processed to chosen format
+        Returns: instance of DecodePlan
         """
 
         bits_per_gray = color_format.bits_per_components[0]
@@ -29,35 +22,30 @@ class ParserGrayscale(AbstractParser):
         else:
             curr_dtype = ">u2"
 
-        raw_data = bytearray(raw_data)
-        if len(raw_data) % numpy.dtype(curr_dtype).alignment != 0:
-            raw_data += (0).to_bytes(
-                len(raw_data) % numpy.dtype(curr_dtype).alignment, byteorder="little"
-            )
-        processed_data = numpy.frombuffer(raw_data, dtype=curr_dtype)
-        if processed_data.size % width != 0:
-            processed_data = numpy.concatenate(
-                (processed_data, numpy.zeros(width - (processed_data.size % width)))
-            )
-
-        return Image(
-            raw_data, color_format, processed_data, width, processed_data.size // width
+        return DecodePlan(
+            color_format, self, curr_dtype, 1, conversion=cv.COLOR_GRAY2RGB
         )
 
+    def _bytes_per_pixel(self, color_format):
+        return 1 if color_format.bits_per_components[0] <= 8 else 2
+
     def get_displayable(self, image):
         """Provides displayable image data (RGB formatted)
 
         Returns: Numpy array containing displayable data.
         """
-        return_data = image.processed_data
-
-        data_array = numpy.reshape(return_data, (image.height, image.width)).astype(
-            "float"
+        return cv.cvtColor(
+            self.get_luma(image), self.plan(image.color_format).conversion
         )
 
-        data_array[:] = 255 * (
-            data_array[:] / (2 ** image.color_format.bits_per_components[0] - 1)
-        )
+    def get_luma(self, image):
+        """Provides luminance - scaled gray values, without expanding them to RGB.
 
-        return_data = cv.cvtColor(data_array.astype("uint8"), cv.COLOR_GRAY2RGB)
-        return return_data
+        Returns: Numpy array containing luminance.
+        """
+
+        data_array = numpy.reshape(image.processed_data, (image.height, image.width))
+
+        return scale_components(
+            data_array, image.color_format.bits_per_components[0], scale_first=False
+        )
@@ -1,8 +1,7 @@
 """Parser implementation for YUV pixel format"""
 
 from ..image.color_format import PixelFormat
-from ..image.image import Image
-from .common import AbstractParser
+from .common import AbstractParser, DecodePlan
 
 import numpy
 import cv2 as cv
@@ -18,44 +17,62 @@ def normal_round(n):
 class ParserYUV420(AbstractParser):
     """A semi-planar YUV420 implementation of a parser"""
 
-    def parse(self, raw_data, color_format, width):
-        """Parses provided raw data to an image, calculating height from provided width.
+    DECIMATION_UNIT = (2, 2)
 
-        Keyword arguments:
+    CONVERSIONS = {
+        PixelFormat.YUV: cv.COLOR_YUV2RGB_NV12,
+        PixelFormat.YVU: cv.COLOR_YUV2RGB_NV21,
+    }
 
-            raw_data: bytes object
-            color_format: target instance of ColorFormat
-            width: target width to interpret
+    def compile(self, color_format):
+        """Derives decode plan of color format, rows of bytes holding the Y plane followed by chroma.
 
-        Returns: instance of Image processed to chosen format
+        Returns: instance of DecodePlan
         """
 
         max_value = max(color_format.bits_per_components)
-        curr_dtype = numpy.uint8
-
-        data_array = []
-        if len(set(color_format.bits_per_components)) == 2 and max_value % 8 == 0:
-            raw_data = bytearray(raw_data)
-            if len(raw_data) % numpy.dtype(curr_dtype).alignment != 0:
-                raw_data += (0).to_bytes(
-                    len(raw_data) % numpy.dtype(curr_dtype).alignment,
-                    byteorder="little",
-                )
-            data_array = numpy.frombuffer(raw_data, dtype=curr_dtype)
-        else:
+        bpcs_set = set(color_format.bits_per_components)
+        if not (len(bpcs_set) == 2 and max_value % 8 == 0):
             raise NotImplementedError(
                 "Other than 8-bit YUVs are not currently supported"
             )
+        return DecodePlan(
+            color_format,
+            self,
+            numpy.uint8,
+            1,
+            conversion=self.CONVERSIONS.get(color_format.pixel_format),
+        )
 
-        processed_data = numpy.array(data_array, dtype=curr_dtype)
+    def _height(self, processed_data, width, plan):
+        """Returns height of image, two thirds of rows of processed data hold luma."""
 
-        if processed_data.size % width != 0:
-            processed_data = numpy.concatenate(
-                (processed_data, numpy.zeros(width - (processed_data.size % width)))
-            )
+        return normal_round(math.ceil(processed_data.size / width) / 1.5)
 
-        new_height = normal_round(math.ceil(processed_data.size / width) / 1.5)
-        return Image(raw_data, color_format, processed_data, width, new_height)
+    def _decimate(self, raw_data, color_format, width, target_size):
+        """Gathers sampled 2x2 luma blocks and their chroma pairs into smaller image of the same layout.
+
+        Returns: tuple of decimated raw data and its width, None if it can not be decimated
+        """
+
+        if width % 2 != 0:
+            return None
+        height = (2 * len(raw_data) // (3 * width)) // 2 * 2
+        sample = self._sample(width, height, target_size)
+        if sample is None:
+            return None
+        rows, cols = sample
+
+        data = numpy.frombuffer(raw_data, dtype=numpy.uint8, count=height * width * 3 // 2)
+        luma = data[: height * width].reshape(height, width)
+        chroma = data[height * width :].reshape(height // 2, width)
+        decimated = numpy.concatenate(
+            (
+                luma[rows].take(cols, axis=1).ravel(),
+                chroma[rows[::2] // 2].take(cols, axis=1).ravel(),
+            )
+        )
+        return decimated.tobytes(), cols.size
 
     def get_displayable(self, image):
         """Provides displayable image data (RGB formatted)
@@ -64,11 +81,7 @@ class ParserYUV420(AbstractParser):
         """
         return_data = image.processed_data
 
-        conversion_const = None
-        if image.color_format.pixel_format == PixelFormat.YUV:
-            conversion_const = cv.COLOR_YUV2RGB_NV12
-        elif image.color_format.pixel_format == PixelFormat.YVU:
-            conversion_const = cv.COLOR_YUV2RGB_NV21
+        conversion_const = self.plan(image.color_format).conversion
 
         data_array = numpy.reshape(
             return_data, (int(return_data.size / image.width), image.width)
@@ -97,6 +110,38 @@ class ParserYUV420(AbstractParser):
 class ParserYUV420Planar(ParserYUV420):
     """A planar YUV420 implementation of a parser"""
 
+    CONVERSIONS = {
+        PixelFormat.YUV: cv.COLOR_YUV2RGB_I420,
+        PixelFormat.YVU: cv.COLOR_YUV2RGB_YV12,
+    }
+
+    def _decimate(self, raw_data, color_format, width, target_size):
+        """Gathers sampled 2x2 luma blocks and their chroma samples from both chroma planes.
+
+        Returns: tuple of decimated raw data and its width, None if it can not be decimated
+        """
+
+        if width % 2 != 0:
+            return None
+        height = (2 * len(raw_data) // (3 * width)) // 2 * 2
+        sample = self._sample(width, height, target_size)
+        if sample is None:
+            return None
+        rows, cols = sample
+
+        data = numpy.frombuffer(raw_data, dtype=numpy.uint8, count=height * width * 3 // 2)
+        luma = data[: height * width].reshape(height, width)
+        chromas = data[height * width :].reshape(2, height // 2, width // 2)
+        chroma_rows, chroma_cols = rows[::2] // 2, cols[::2] // 2
+        decimated = numpy.concatenate(
+            (
+                luma[rows].take(cols, axis=1).ravel(),
+                chromas[0][chroma_rows].take(chroma_cols, axis=1).ravel(),
+                chromas[1][chroma_rows].take(chroma_cols, axis=1).ravel(),
+            )
+        )
+        return decimated.tobytes(), cols.size
+
     def get_displayable(self, image):
         """Provides displayable image data (RGB formatted)
 
@@ -104,11 +149,7 @@ class ParserYUV420Planar(ParserYUV420):
         """
         return_data = image.processed_data
 
-        conversion_const = None
-        if image.color_format.pixel_format == PixelFormat.YUV:
-            conversion_const = cv.COLOR_YUV2RGB_I420
-        elif image.color_format.pixel_format == PixelFormat.YVU:
-            conversion_const = cv.COLOR_YUV2RGB_YV12
+        conversion_const = self.plan(image.color_format).conversion
 
         data_array = numpy.reshape(
             return_data, (int(return_data.size / image.width), image.width)
@@ -137,53 +178,39 @@ class ParserYUV420Planar(ParserYUV420):
 class ParserYUV422(AbstractParser):
     """A packed YUV422 implementation of a parser"""
 
-    def parse(self, raw_data, color_format, width):
-        """Parses provided raw data to an image, calculating height from provided width.
+    DECIMATION_UNIT = (1, 2)
 
-        Keyword arguments:
+    CONVERSIONS = {
+        PixelFormat.YUYV: cv.COLOR_YUV2RGB_YUYV,
+        PixelFormat.UYVY: cv.COLOR_YUV2RGB_UYVY,
+        PixelFormat.YVYU: cv.COLOR_YUV2RGB_YVYU,
+        # Chroma samples are swapped to UYVY first
+        PixelFormat.VYUY: cv.COLOR_YUV2RGB_UYVY,
+    }
 
-            raw_data: bytes object
-            color_format: target instance of ColorFormat
-            width: target width to interpret
+    def compile(self, color_format):
+        """Derives decode plan of color format, two bytes per pixel.
 
-        Returns: instance of Image processed to chosen format
+        Returns: instance of DecodePlan
         """
-        max_value = max(color_format.bits_per_components)
-        curr_dtype = numpy.uint8
 
-        data_array = []
+        max_value = max(color_format.bits_per_components)
         bpcs_set = set(color_format.bits_per_components)
-        if len(bpcs_set) == 2 or len(bpcs_set) == 1 and max_value % 8 == 0:
-            raw_data = bytearray(raw_data)
-            if len(raw_data) % numpy.dtype(curr_dtype).alignment != 0:
-                raw_data += (0).to_bytes(
-                    len(raw_data) % numpy.dtype(curr_dtype).alignment,
-                    byteorder="little",
-                )
-            data_array = numpy.frombuffer(raw_data, dtype=curr_dtype)
-        else:
+        if not (len(bpcs_set) == 2 or len(bpcs_set) == 1 and max_value % 8 == 0):
             raise NotImplementedError(
                 "Other than 8-bit YUVs are not currently supported"
             )
-
-        processed_data = numpy.array(data_array, dtype=curr_dtype)
-
-        if processed_data.size % (width * 2) != 0:
-            processed_data = numpy.concatenate(
-                (
-                    processed_data,
-                    numpy.zeros((width * 2) - (processed_data.size % (width * 2))),
-                )
-            )
-
-        return Image(
-            raw_data,
+        return DecodePlan(
             color_format,
-            processed_data,
-            width,
-            processed_data.size // (width * 2),
+            self,
+            numpy.uint8,
+            2,
+            conversion=self.CONVERSIONS.get(color_format.pixel_format),
         )
 
+    def _bytes_per_pixel(self, color_format):
+        return 2
+
     def get_displayable(self, image):
         """Provides displayable image data (RGB formatted)
 
@@ -192,15 +219,13 @@ class ParserYUV422(AbstractParser):
         return_data = numpy.reshape(
             image.processed_data.copy(), (image.height, image.width, 2)
         ).astype("uint8")
-        conversion_const = None
-        if image.color_format.pixel_format == PixelFormat.YUYV:
-            conversion_const = cv.COLOR_YUV2RGB_YUYV
-        elif image.color_format.pixel_format == PixelFormat.UYVY:
-            conversion_const = cv.COLOR_YUV2RGB_UYVY
-        elif image.color_format.pixel_format == PixelFormat.YVYU:
-            conversion_const = cv.COLOR_YUV2RGB_YVYU
-        elif image.color_format.pixel_format == PixelFormat.VYUY:
-            conversion_const = cv.COLOR_YUV2RGB_UYVY
+        if return_data.shape[1] % 2 != 0:
+            return_data = numpy.concatenate(
+                (return_data, numpy.zeros((return_data.shape[0], 1, 2), dtype=numpy.uint8)),
+                axis=1,
+            )
+        conversion_const = self.plan(image.color_format).conversion
+        if image.color_format.pixel_format == PixelFormat.VYUY:
             temp = numpy.copy(return_data[:, ::2, 0])
             return_data[:, ::2, 0] = return_data[:, 1::2, 0]
             return_data[:, 1::2, 0] = temp
@@ -210,6 +235,35 @@ class ParserYUV422(AbstractParser):
 
 
 class ParserYUV422Planar(ParserYUV422):
+    CONVERSIONS = {PixelFormat.YUV: cv.COLOR_YUV2RGB_YUYV}
+
+    def _decimate(self, raw_data, color_format, width, target_size):
+        """Gathers sampled pairs of luma samples and their chroma samples from both chroma planes.
+
+        Returns: tuple of decimated raw data and its width, None if it can not be decimated
+        """
+
+        if width % 2 != 0:
+            return None
+        height = len(raw_data) // (2 * width)
+        sample = self._sample(width, height, target_size)
+        if sample is None:
+            return None
+        rows, cols = sample
+
+        data = numpy.frombuffer(raw_data, dtype=numpy.uint8, count=height * width * 2)
+        luma = data[: height * width].reshape(height, width)
+        chromas = data[height * width :].reshape(2, height, width // 2)
+        chroma_cols = cols[::2] // 2
+        decimated = numpy.concatenate(
+            (
+                luma[rows].take(cols, axis=1).ravel(),
+                chromas[0][rows].take(chroma_cols, axis=1).ravel(),
+                chromas[1][rows].take(chroma_cols, axis=1).ravel(),
+            )
+        )
+        return decimated.tobytes(), cols.size
+
     def get_displayable(self, image):
         """Provides displayable image data (RGB formatted)
 
@@ -217,9 +271,7 @@ class ParserYUV422Planar(ParserYUV422):
         """
 
         return_data = numpy.zeros((image.height, image.width, 2)).astype("uint8")
-        conversion_const = None
-        if image.color_format.pixel_format == PixelFormat.YUV:
-            conversion_const = cv.COLOR_YUV2RGB_YUYV
+        conversion_const = self.plan(image.color_format).conversion
 
         data_array = numpy.reshape(
             image.processed_data[: (image.height * image.width)],
@@ -242,5 +294,10 @@ class ParserYUV422Planar(ParserYUV422):
             (image.height, image.width // 2),
         ).astype("uint8")
         return_data[:, 1::2, 1] = chromas_data
+        if return_data.shape[1] % 2 != 0:
+            return_data = numpy.concatenate(
+                (return_data, numpy.zeros((return_data.shape[0], 1, 2), dtype=numpy.uint8)),
+                axis=1,
+            )
         return_data = cv.cvtColor(return_data, conversion_const)
         return return_data
@@ -1,20 +1,134 @@
 import math
 import logging
-import tensorflow as tf
-from tensorflow import keras  # noqa
-from keras import models
 import numpy as np
-from PIL import Image
-from typing import List
+from typing import List, Optional, Sequence, Tuple, Union
 from numpy.typing import NDArray
 from dataclasses import dataclass
 
+from backend import Backend, load_backend
+from instrumentation import DISABLED, Instrumentation
+from raw_image_data_previewer.app.image.image import RawDataContainer, open_raw_data
+from resolution_search import Search, SearchStrategy, get_search_strategy
+from sampling import SampledRawData
+
+
+GATHER_CHUNK_SIZE = 4 * 2**20
+
+
+def _box_taps(size: int, out_size: int, taps: int):
+    """Choose indexes of pixels sampled from each of out_size boxes splitting range of given size
+
+    Args:
+        size (int): Size of the range.
+        out_size (int): Number of boxes.
+        taps (int): Max number of pixels sampled from a single box.
+
+    Returns:
+        Tuple[NDArray, int]: Sorted indexes of sampled pixels and number of pixels sampled from a single box.
+    """
+    taps = max(1, min(taps, size // out_size))
+    edges = np.arange(out_size + 1) * (size / out_size)
+    offsets = (np.arange(taps) + 0.5) * (size / out_size / taps)
+    return (edges[:-1, None] + offsets).astype(np.int64).ravel(), taps
+
+
+def strided_candidate(
+    raw: NDArray, width: int, out_width: int, out_height: int, taps: int = 0
+) -> NDArray:
+    """Build model input from raw bytes interpreted as GRAY8 image with given width,
+    without copying the raw buffer.
+
+    Raw bytes are viewed as (height, width) image sharing their memory. By default the view
+    is resized with PIL bicubic filter, which gives exactly the input the model was trained on.
+    With taps, every output pixel is instead an average of up to taps x taps pixels evenly sampled
+    from its box of the view, so only sampled rows and columns are ever read. This is faster
+    on big files, but inputs differ from the trained ones by about 0.02 on average
+    and up to 0.04 on tests/test_data. Sampled rows are gathered in chunks of at most
+    GATHER_CHUNK_SIZE bytes.
+
+    Args:
+        raw (NDArray): Raw bytes of image as 1D uint8 array.
+        width (int): Width of the candidate image.
+        out_width (int): Model image width.
+        out_height (int): Model image height.
+        taps (int, optional): Max number of pixels sampled along every axis of a box.
+         Defaults to 0, exact resize of the whole view.
+
+    Returns:
+        NDArray: float32 array of shape (out_height, out_width, 1) normalized to [-0.5, 0.5].
+    """
+    height = raw.size // width
+    if not taps:
+        from PIL import Image
+
+        img = Image.frombuffer("L", (width, height), raw[: width * height], "raw", "L", 0, 1)
+        img = np.asarray(img.resize((out_width, out_height))) / 255 - 0.5
+        return np.expand_dims(img.astype(np.float32), axis=-1)
+    view = raw[: width * height].reshape(height, width)
+    rows, rows_taps = _box_taps(height, out_height, taps)
+    cols, cols_taps = _box_taps(width, out_width, taps)
+    img = np.empty((rows.size, cols.size), dtype=np.uint8)
+    chunk = max(1, GATHER_CHUNK_SIZE // width)
+    for start in range(0, rows.size, chunk):
+        img[start : start + chunk] = view[rows[start : start + chunk]][:, cols]
+    img = img.reshape(out_height, rows_taps, out_width, cols_taps)
+    img = img.sum(axis=3, dtype=np.uint32).sum(axis=1, dtype=np.uint32)
+    img = img.astype(np.float32) * np.float32(1 / (255 * rows_taps * cols_taps)) - 0.5
+    return np.expand_dims(img, axis=-1)
+
+
+def windowed_candidate(
+    windows: Sequence[NDArray],
+    width: int,
+    out_width: int,
+    out_height: int,
+    taps: int = 0,
+    offsets: Optional[Sequence[int]] = None,
+) -> NDArray:
+    """Build model input from windows of raw bytes interpreted as GRAY8 image with given width.
+
+    Every window gives a horizontal band of the output, bands are proportional to sizes of windows.
+    With offsets, windows are cut to row boundaries of the whole file first, so every band starts
+    with the first pixel of a row and seams between bands do not break rows.
+    With a single window the result is the same as of strided_candidate.
+
+    Args:
+        windows (Sequence[NDArray]): Windows of raw bytes of image as 1D uint8 arrays.
+        width (int): Width of the candidate image.
+        out_width (int): Model image width.
+        out_height (int): Model image height.
+        taps (int, optional): Max number of pixels sampled along every axis of a box, see strided_candidate.
+         Defaults to 0, exact resize of every band.
+        offsets (Sequence[int], optional): Offsets of windows in the file. Defaults to None, windows are used
+         as they are.
+
+    Returns:
+        NDArray: float32 array of shape (out_height, out_width, 1) normalized to [-0.5, 0.5].
+    """
+    if offsets is not None:
+        windows = [window[-offset % width :] for window, offset in zip(windows, offsets)]
+    # Windows shorter than a single row can not show the image
+    windows = [window for window in windows if window.size >= width] or [max(windows, key=len)]
+    if len(windows) == 1:
+        return strided_candidate(windows[0], width, out_width, out_height, taps)
+    sizes = np.array([window.size for window in windows])
+    bands = np.diff(np.round(np.cumsum(sizes) / sizes.sum() * out_height).astype(int), prepend=0)
+    return np.concatenate(
+        [
+            strided_candidate(window, width, out_width, band, taps)
+            for window, band in zip(windows, bands)
+            if band
+        ]
+    )
+
 
 class ResolutionFinder:
     DEFAULT_MIN_WIDTH = 256
     DEFAULT_MIN_HEIGHT = 256
     DEFAULT_WH_RATIO = 8
     DEFAULT_STEP = 20
+    DEFAULT_BATCH_SIZE = 64
+    DEFAULT_MEMORY_BUDGET = 64 * 2**20
     RESOLUTION_HEIGHTS = [
         120,
         144,
@@ -69,6 +183,9 @@ class ResolutionFinder:
     class InvalidModel(Exception):
         pass
 
+    class MemoryBudgetTooSmall(Exception):
+        pass
+
     @dataclass
     class FoundedResolution:
         width: int
@@ -80,21 +197,51 @@ class ResolutionFinder:
                 return False
             return self.width == __o.width
 
-    def __init__(self, model_path: str, model_img_width: int, model_img_height: int):
+    def __init__(
+        self,
+        model_path: str,
+        model_img_width: int,
+        model_img_height: int,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        backend: str = "keras",
+        instrumentation: Optional[Instrumentation] = None,
+        candidate_taps: int = 0,
+    ):
         """Create class object and model object
 
         Args:
             model_path (str): Path to tensorflow resolution model.
             model_img_width (int): Model image width
             model_img_height (int): Model image height
+            batch_size (int, optional): Max number of candidates given to the model at once.
+             Defaults to DEFAULT_BATCH_SIZE.
+            memory_budget (int, optional): Max size in bytes of candidates batch given to the model at once.
+             Defaults to DEFAULT_MEMORY_BUDGET.
+            backend (str, optional): Name of one of backend.BACKENDS, model has to be in its format.
+             Defaults to "keras".
+            instrumentation (Instrumentation, optional): Hooks recording durations of candidates generation
+             and inference, model calls and batch sizes. Defaults to None, nothing is recorded.
+            candidate_taps (int, optional): Build candidates from taps x taps pixels of every box,
+             see strided_candidate. Defaults to 0, exact resize.
 
         Raises:
             InvalidModel: Invalid model
+            MemoryBudgetTooSmall: Memory budget does not fit a single candidate
         """
         self.model_img_width = model_img_width
         self.model_img_height = model_img_height
+        candidate_size = model_img_width * model_img_height * np.dtype(np.float32).itemsize
+        if memory_budget < candidate_size:
+            raise self.MemoryBudgetTooSmall(
+                f"Memory budget must fit at least one candidate of {candidate_size} bytes"
+            )
+        self.batch_size = max(1, min(batch_size, memory_budget // candidate_size))
+        self.evaluations = 0
+        self.instrumentation = instrumentation or DISABLED
+        self.candidate_taps = candidate_taps
         try:
-            self.model: models.Model = models.load_model(model_path)
+            self.model: Backend = load_backend(model_path, backend)
         except OSError:
             logging.error("Given resolution model is invalid")
             raise self.InvalidModel("Given resolution model is invalid")
@@ -131,16 +278,7 @@ class ResolutionFinder:
             )
         if not max_width:
             max_width = int(math.sqrt(max_wh_ratio * len(raw)))
-        batches = []
-        for batch_width in range(min_width, max_width, step):
-            batch_height = len(raw) // batch_width
-            img = Image.frombytes("L", (batch_width, batch_height), raw)
-            img = img.resize((self.model_img_width, self.model_img_height))
-            img = np.asarray(img)
-            img = np.expand_dims(img, axis=-1)
-            batches.append(tf.convert_to_tensor(img / 255 - 0.5))
-        batches = tf.stack(batches)
-        predictions: NDArray = np.squeeze(self.model(batches), axis=-1)
+        predictions = self.predict_widths(raw, range(min_width, max_width, step))
         result = {}
         for i, prediction in enumerate(predictions):
             result[i * step + min_width] = prediction
@@ -149,36 +287,188 @@ class ResolutionFinder:
             for k, v in sorted(result.items(), key=lambda item: item[1], reverse=True)
         ]
 
+    def predict_widths(self, raw: bytes, widths: Sequence[int]) -> NDArray:
+        """Predict confidences of raw bytes being image with given widths.
+
+        Args:
+            raw (bytes): Raw bytes of image.
+            widths (Sequence[int]): Widths to check.
+
+        Returns:
+            NDArray: Confidences for given widths.
+        """
+        raw_array = np.frombuffer(raw, dtype=np.uint8)
+        return self.predict_candidates([(raw_array, width) for width in widths])
+
+    def predict_candidates(
+        self,
+        candidates: Sequence[Tuple[Union[NDArray, List[NDArray], SampledRawData], int]],
+        batch_size: int = 0,
+    ) -> NDArray:
+        """Predict confidences of raw bytes being image with given width, for many pairs of them.
+
+        Candidates are streamed through the model in chunks of batch_size,
+        so memory usage does not depend on the number of candidates nor on the size of raw bytes.
+
+        Args:
+            candidates (Sequence[Tuple[NDArray | List[NDArray] | SampledRawData, int]]): Pairs of raw bytes
+             as 1D uint8 array (or list of windows of them, or windows aligned by their offsets) and width to check.
+            batch_size (int, optional): Max number of candidates given to the model at once,
+             limited by memory budget. By default batch_size of the object.
+
+        Returns:
+            NDArray: Confidences for given candidates.
+        """
+        batch_size = min(batch_size, self.batch_size) if batch_size else self.batch_size
+        predictions = np.empty(len(candidates), dtype=np.float32)
+        batch = np.empty(
+            (min(batch_size, len(candidates)), self.model_img_height, self.model_img_width, 1),
+            dtype=np.float32,
+        )
+        for start in range(0, len(candidates), batch_size):
+            chunk = candidates[start : start + batch_size]
+            with self.instrumentation.span("resolution_candidates", candidates=len(chunk)):
+                for i, (raw_array, width) in enumerate(chunk):
+                    if isinstance(raw_array, SampledRawData):
+                        batch[i] = windowed_candidate(
+                            [np.frombuffer(window, dtype=np.uint8) for window in raw_array.windows],
+                            width,
+                            self.model_img_width,
+                            self.model_img_height,
+                            self.candidate_taps,
+                            raw_array.offsets,
+                        )
+                    elif isinstance(raw_array, list):
+                        batch[i] = windowed_candidate(
+                            raw_array, width, self.model_img_width, self.model_img_height, self.candidate_taps
+                        )
+                    else:
+                        batch[i] = strided_candidate(
+                            raw_array, width, self.model_img_width, self.model_img_height, self.candidate_taps
+                        )
+            self.instrumentation.model_call("resolution", len(chunk))
+            with self.instrumentation.span("resolution_inference", batch_size=len(chunk)):
+                predictions[start : start + len(chunk)] = np.squeeze(
+                    self.model(batch[: len(chunk)]), axis=-1
+                )
+        return predictions
+
+    def search(
+        self,
+        raw_size: int,
+        best_results: int,
+        strategy: Union[str, SearchStrategy] = "exhaustive",
+    ) -> Search:
+        """Search for resolutions of image with given size of raw data
+
+        Generator yields lists of widths to check and has to be sent
+        dictionaries with model confidences for them.
+
+        Args:
+            raw_size (int): Size of raw data of image.
+            best_results (int): Number of best results to return.
+            strategy (str | SearchStrategy, optional): Search strategy or its name. Defaults to "exhaustive".
+
+        Raises:
+            self.ImageTooSmall: Given image is too small to check.
+
+        Returns:
+            List(FoundedResolution): List of founded resolutions, sorted descending by confidence.
+        """
+        strategy = get_search_strategy(strategy)
+        if raw_size < self.DEFAULT_MIN_WIDTH * self.DEFAULT_MIN_HEIGHT:
+            raise self.ImageTooSmall(
+                f"Image is too small. Required size: {self.DEFAULT_MIN_WIDTH}*{self.DEFAULT_MIN_HEIGHT}"
+                f"\nActual size: {raw_size}"
+            )
+        max_width = int(math.sqrt(self.DEFAULT_WH_RATIO * raw_size))
+        peaks = yield from strategy.coarse(self.DEFAULT_MIN_WIDTH, max_width)
+        result = []
+        for i, (width, _) in enumerate(peaks):
+            if i == best_results:
+                break
+            width, confidence = yield from strategy.refine(width)
+            height = min(self.RESOLUTION_HEIGHTS, key=lambda x: abs(x - raw_size // width))
+            r = self.FoundedResolution(raw_size // height, height, confidence)
+            if r not in result:
+                result.append(r)
+            else:
+                best_results += 1
+        result = sorted(result, key=lambda x: x.confidence, reverse=True)
+        return result
+
     def find_resolution(
-        self, path: str, best_results: int = 3
+        self,
+        path: Union[str, bytes, RawDataContainer],
+        best_results: int = 3,
+        strategy: Union[str, SearchStrategy] = "exhaustive",
     ) -> List[FoundedResolution]:
         """Find resolution of image, from given path
 
+        Number of model evaluations used is stored in evaluations attribute.
+
         Args:
-            path (str): Path to image.
+            path (str | bytes | RawDataContainer): Path to image, its raw bytes or already opened image data.
             best_results (int): Number of best results to return.
+            strategy (str | SearchStrategy, optional): Search strategy or its name. Defaults to "exhaustive".
 
         Returns:
             List(FoundedResolution): List of founded resolutions, sorted descending by confidence.
         """
-        with open(path, "rb") as f:
-            result = []
-            raw = f.read()
-            predictions = self.single_prediction_tour(raw)
-            for i, res in enumerate(predictions):
-                if i == best_results:
-                    break
-                r = self.single_prediction_tour(
-                    raw,
-                    res.width - self.DEFAULT_STEP,
-                    res.width + self.DEFAULT_STEP,
-                    1,
-                )[0]
-                r.height = min(self.RESOLUTION_HEIGHTS, key=lambda x: abs(x - r.height))
-                r.width = len(raw) // r.height
-                if r not in result:
-                    result.append(r)
-                else:
-                    best_results += 1
-            result = sorted(result, key=lambda x: x.confidence, reverse=True)
-            return result
+        with open_raw_data(path) as raw_data:
+            return self.find_resolutions([raw_data.data_buffer], best_results, strategy)[0]
+
+    def find_resolutions(
+        self,
+        raws: Sequence[Union[bytes, SampledRawData]],
+        best_results: int = 3,
+        strategy: Union[str, SearchStrategy] = "exhaustive",
+        batch_size: int = 0,
+    ) -> List[List[FoundedResolution]]:
+        """Find resolutions of many images at once, candidates of all images share model batches
+
+        Images given as windows of raw bytes are checked on the windows only,
+        heights of found resolutions are extrapolated from the size of the whole file.
+        Number of model evaluations used is stored in evaluations attribute.
+
+        Args:
+            raws (Sequence[bytes | SampledRawData]): Raw bytes of images or their windows.
+            best_results (int): Number of best results to return for every image.
+            strategy (str | SearchStrategy, optional): Search strategy or its name. Defaults to "exhaustive".
+            batch_size (int, optional): Max number of candidates given to the model at once.
+             By default batch_size of the object.
+
+        Returns:
+            List(List(FoundedResolution)): Lists of founded resolutions for every image,
+             sorted descending by confidence.
+        """
+        raw_arrays = [raw if isinstance(raw, SampledRawData) else np.frombuffer(raw, dtype=np.uint8) for raw in raws]
+        sizes = [raw.size if isinstance(raw, SampledRawData) else len(raw) for raw in raws]
+        searches = [self.search(size, best_results, strategy) for size in sizes]
+        confidences = [{} for _ in raws]
+        results = [[] for _ in raws]
+        pending = {}
+        for i, search in enumerate(searches):
+            pending[i] = next(search)
+        self.evaluations = 0
+        while pending:
+            requests = [
+                (i, width)
+                for i, widths in pending.items()
+                for width in dict.fromkeys(widths)
+                if width not in confidences[i]
+            ]
+            predictions = self.predict_candidates(
+                [(raw_arrays[i], width) for i, width in requests], batch_size
+            )
+            for (i, width), prediction in zip(requests, predictions):
+                confidences[i][width] = prediction
+            self.evaluations += len(requests)
+            for i, widths in list(pending.items()):
+                try:
+                    pending[i] = searches[i].send({w: confidences[i][w] for w in widths})
+                except StopIteration as stop:
+                    results[i] = stop.value
+                    del pending[i]
+        logging.info(f"Resolution search used {self.evaluations} model evaluations")
+        return results
@@ -0,0 +1,148 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, Generator, List, Tuple, Union
+
+# Searches are generators yielding lists of widths to evaluate and receiving
+# dictionaries with confidences of yielded widths, so a driver can decide how
+# (and with what else) the widths are batched for the model.
+Search = Generator[List[int], Dict[int, float], List[Tuple[int, float]]]
+Refinement = Generator[List[int], Dict[int, float], Tuple[int, float]]
+
+
+class SearchStrategy(ABC):
+    """Strategy of searching widths with the highest resolution model confidence"""
+
+    @abstractmethod
+    def coarse(self, min_width: int, max_width: int) -> Search:
+        """Scan whole range of widths
+
+        Args:
+            min_width (int): Min width to check.
+            max_width (int): Max width to check (exclusive).
+
+        Returns:
+            List[Tuple[int, float]]: Checked widths with their confidences, sorted descending by confidence.
+        """
+
+    @abstractmethod
+    def refine(self, width: int) -> Refinement:
+        """Find the best width in neighbourhood of a width found by coarse scan
+
+        Args:
+            width (int): Width found by coarse scan.
+
+        Returns:
+            Tuple[int, float]: The best width with its confidence.
+        """
+
+    @staticmethod
+    def _ranked(confidences: Dict[int, float]) -> List[Tuple[int, float]]:
+        return sorted(confidences.items(), key=lambda item: item[1], reverse=True)
+
+
+class ExhaustiveSearch(SearchStrategy):
+    """Check every step-th width, then every width around each of the best ones"""
+
+    def __init__(self, step: int = 20, refine_range: int = 20):
+        self.step = step
+        self.refine_range = refine_range
+
+    def coarse(self, min_width: int, max_width: int) -> Search:
+        confidences = yield list(range(min_width, max_width, self.step))
+        return self._ranked(confidences)
+
+    def refine(self, width: int) -> Refinement:
+        confidences = yield list(
+            range(max(1, width - self.refine_range), width + self.refine_range)
+        )
+        return self._ranked(confidences)[0]
+
+
+class MultiScaleSearch(SearchStrategy):
+    """Check widths with a large step, then halve the step around the best ones
+    until step of 1 is reached"""
+
+    def __init__(self, initial_step: int = 80, final_step: int = 20, peaks: int = 8):
+        """
+        Args:
+            initial_step (int, optional): Step of the first scan. Defaults to 80.
+            final_step (int, optional): Step of the last coarse scan. Defaults to 20.
+            peaks (int, optional): Number of the best widths rescanned with a halved step. Defaults to 8.
+        """
+        self.initial_step = initial_step
+        self.final_step = final_step
+        self.peaks = peaks
+
+    def coarse(self, min_width: int, max_width: int) -> Search:
+        step = self.initial_step
+        found = yield list(range(min_width, max_width, step))
+        while step > self.final_step:
+            step = max(self.final_step, step // 2)
+            widths = []
+            for width, _ in self._ranked(found)[: self.peaks]:
+                widths += [
+                    w for w in (width - step, width + step) if min_width <= w < max_width
+                ]
+            found.update((yield widths))
+        return self._ranked(found)
+
+    def refine(self, width: int) -> Refinement:
+        step = self.final_step // 2
+        best = width
+        found = yield [best]
+        while step >= 1:
+            found.update((yield [max(1, best - step), best + step]))
+            best = max(found, key=found.get)
+            step //= 2
+        return best, found[best]
+
+
+class GoldenSectionSearch(ExhaustiveSearch):
+    """Exhaustive coarse scan followed by golden-section search of the peak"""
+
+    INV_PHI = (math.sqrt(5) - 1) / 2
+
+    def refine(self, width: int) -> Refinement:
+        low = max(1, width - self.refine_range)
+        high = width + self.refine_range
+        found = {}
+        while high - low > 3:
+            left = round(high - (high - low) * self.INV_PHI)
+            right = round(low + (high - low) * self.INV_PHI)
+            if left == right:
+                right += 1
+            found.update((yield [left, right]))
+            if found[left] >= found[right]:
+                high = right
+            else:
+                low = left
+        found.update((yield list(range(low, high + 1))))
+        return self._ranked(found)[0]
+
+
+SEARCH_STRATEGIES = {
+    "exhaustive": ExhaustiveSearch,
+    "multiscale": MultiScaleSearch,
+    "golden": GoldenSectionSearch,
+}
+
+
+def get_search_strategy(strategy: Union[str, SearchStrategy]) -> SearchStrategy:
+    """Get search strategy object
+
+    Args:
+        strategy (str | SearchStrategy): Name of one of SEARCH_STRATEGIES or strategy object.
+
+    Raises:
+        ValueError: Unknown strategy name
+
+    Returns:
+        SearchStrategy: Strategy object
+    """
+    if isinstance(strategy, SearchStrategy):
+        return strategy
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(
+            f"Unknown search strategy {strategy}, available: {', '.join(SEARCH_STRATEGIES)}"
+        )
+    return SEARCH_STRATEGIES[strategy]()
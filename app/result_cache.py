@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class ResultCache:
+    """Local cache of recognition results, keyed by content of raw images.
+
+    Results are stored in SQLite database in WAL mode, so the cache can be shared
+    by many processes. The least recently used entries are evicted when there are more than max_entries of them.
+    Hit and miss counters are stored together with results, so they cover all processes using the cache.
+    """
+
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "image-recognizer", "results.sqlite")
+    DEFAULT_MAX_ENTRIES = 100_000
+    TIMEOUT = 30
+
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Open cache database, create it if needed
+
+        Args:
+            path (str, optional): Path to cache database. Defaults to DEFAULT_PATH.
+            max_entries (int, optional): Max number of cached results. Defaults to DEFAULT_MAX_ENTRIES.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(
+            path, timeout=self.TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, result TEXT NOT NULL, last_access REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self.connection.execute(
+                "INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0), ('evictions', 0)"
+            )
+
+    @staticmethod
+    def content_hash(data) -> str:
+        """Hash raw image data
+
+        Args:
+            data (bytes-like): Raw image data
+
+        Returns:
+            str: Hex digest of data
+        """
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+    @staticmethod
+    def file_fingerprint(path: str) -> str:
+        """Fingerprint file by its path, size and modification time, without reading it
+
+        Args:
+            path (str): Path to file
+
+        Returns:
+            str: Fingerprint of file
+        """
+        stat = os.stat(path)
+        return f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    @staticmethod
+    def make_key(content_hash: str, context: str) -> str:
+        """Make cache key from hash of raw image and context of recognition
+
+        Args:
+            content_hash (str): Hash of raw image data
+            context (str): Fingerprint of models and search parameters
+
+        Returns:
+            str: Cache key
+        """
+        return hashlib.blake2b(
+            f"{content_hash}|{context}".encode(), digest_size=20
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Get cached result, count hit or miss
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            dict | None: Cached result or None if there is no such key
+        """
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            row = self.connection.execute(
+                "SELECT result FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            self.connection.execute(
+                "UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._count("hits")
+            return json.loads(row[0])
+
+    def put(self, key: str, result: dict):
+        """Store result, evict the least recently used ones over max_entries
+
+        Args:
+            key (str): Cache key
+            result (dict): JSON serializable result
+        """
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                (key, json.dumps(result, default=lambda value: value.item()), time.time()),
+            )
+            evicted = self.connection.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            if evicted:
+                self._count("evictions", evicted)
+
+    def stats(self) -> dict:
+        """Get statistics of cache, collected by all processes using it
+
+        Returns:
+            dict: Number of hits, misses, evictions and entries and hit rate
+        """
+        with self.lock:
+            stats = dict(self.connection.execute("SELECT name, value FROM stats"))
+            stats["entries"] = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Remove all cached results and reset statistics"""
+        with self.lock, self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute("DELETE FROM results")
+            self.connection.execute("UPDATE stats SET value = 0")
+
+    def close(self):
+        self.connection.close()
+
+    def _count(self, name: str, n: int = 1):
+        self.connection.execute("UPDATE stats SET value = value + ? WHERE name = ?", (n, name))
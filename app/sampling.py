@@ -0,0 +1,118 @@
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def window_offsets(
+    size: int, windows: int, window_size: int, positions: Optional[Sequence[float]] = None
+) -> List[int]:
+    """Choose offsets of windows in a file
+
+    Args:
+        size (int): Size of the file in bytes
+        windows (int): Number of windows, used when positions are not given
+        window_size (int): Size of a single window in bytes
+        positions (Sequence[float], optional): Positions of windows as fractions of the file, 0 puts a window
+         at the beginning, 1 at the end. Defaults to None, windows spread evenly from the beginning to the end.
+
+    Returns:
+        List[int]: Sorted offsets of non-overlapping windows
+    """
+    if positions is None:
+        positions = np.linspace(0, 1, windows) if windows > 1 else [0.0]
+    offsets = sorted({int(min(max(p, 0.0), 1.0) * (size - window_size)) for p in positions})
+    # Overlapping windows are merged into the first of them
+    result = []
+    for offset in offsets:
+        if not result or offset >= result[-1] + window_size:
+            result.append(offset)
+    return result
+
+
+class SampledRawData:
+    """Contiguous windows of a raw image file, read instead of the whole file.
+
+    Resolution is searched on the windows directly, height is extrapolated from the size of the whole file.
+    Color formats are checked on whole rows of all windows stacked together, see rows.
+    """
+
+    def __init__(self, windows: Sequence[bytes], offsets: Sequence[int], size: int):
+        """Create container of windows
+
+        Args:
+            windows (Sequence[bytes]): Bytes of windows
+            offsets (Sequence[int]): Offsets of windows in the file
+            size (int): Size of the whole file in bytes
+        """
+        self.windows = list(windows)
+        self.offsets = list(offsets)
+        self.size = size
+        self._rows: Dict[int, bytes] = {}
+
+    @property
+    def bytes_read(self) -> int:
+        return sum(len(window) for window in self.windows)
+
+    @classmethod
+    def from_file(
+        cls, path: str, windows: int, window_size: int, positions: Optional[Sequence[float]] = None
+    ) -> "SampledRawData":
+        """Read only windows of the file, with a positioned read for every window
+
+        Args:
+            path (str): Path to the file
+            windows (int): Number of windows
+            window_size (int): Size of a single window in bytes
+            positions (Sequence[float], optional): Positions of windows as fractions of the file.
+             Defaults to None, windows spread evenly.
+
+        Returns:
+            SampledRawData: Windows of the file
+        """
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            offsets = window_offsets(size, windows, window_size, positions)
+            return cls([os.pread(file.fileno(), window_size, offset) for offset in offsets], offsets, size)
+
+    @classmethod
+    def from_buffer(
+        cls, data, windows: int, window_size: int, positions: Optional[Sequence[float]] = None
+    ) -> "SampledRawData":
+        """Take windows of data already in memory, without copying
+
+        Args:
+            data (bytes-like): Raw bytes of the whole image
+            windows (int): Number of windows
+            window_size (int): Size of a single window in bytes
+            positions (Sequence[float], optional): Positions of windows as fractions of the data.
+             Defaults to None, windows spread evenly.
+
+        Returns:
+            SampledRawData: Windows of the data
+        """
+        view = memoryview(data).cast("B")
+        offsets = window_offsets(len(view), windows, window_size, positions)
+        return cls([view[offset : offset + window_size] for offset in offsets], offsets, len(view))
+
+    def rows(self, row_size: int) -> bytes:
+        """Whole rows of all windows, for image with rows of given size, stacked together.
+        Windows are cut to row boundaries of the whole file, so every row starts with the first pixel.
+        Rows longer than windows are not cut, the longest window is returned as it is then.
+        Result is kept, requests for the same row size get the same object.
+
+        Args:
+            row_size (int): Size of image row in bytes
+
+        Returns:
+            bytes: Rows of all windows
+        """
+        if row_size not in self._rows:
+            parts = []
+            for offset, window in zip(self.offsets, self.windows):
+                start = -offset % row_size
+                end = (offset + len(window)) // row_size * row_size - offset
+                if end > start:
+                    parts.append(window[start:end])
+            self._rows[row_size] = b"".join(parts) or bytes(max(self.windows, key=len))
+        return self._rows[row_size]
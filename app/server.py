@@ -0,0 +1,211 @@
+import base64
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Union
+
+from batch import result_to_dict
+from client import DEFAULT_SOCKET_PATH
+from image_recognizer import ImageRecognizer
+from instrumentation import Instrumentation, LatencyHistogram, PrometheusMetrics
+
+
+class RecognitionService:
+    """ImageRecognizer kept warm between requests, with latency histograms of requests
+    and metrics of recognition stages"""
+
+    def __init__(self, **recognizer_kwargs):
+        self.metrics = PrometheusMetrics()
+        self.image_recognizer = ImageRecognizer(
+            instrumentation=Instrumentation(self.metrics), **recognizer_kwargs
+        )
+        self.lock = threading.Lock()
+        self.histograms = {"path": LatencyHistogram(), "data": LatencyHistogram()}
+
+    def handle(self, request: dict) -> dict:
+        """Handle single request
+
+        Args:
+            request (dict): {"path": path to raw image}, {"data": base64 encoded raw image}
+             or {"command": "stats"}
+
+        Returns:
+            dict: Recognition result, latency histograms or {"error": message}
+        """
+        if request.get("command") == "stats":
+            return {kind: h.to_dict() for kind, h in self.histograms.items()}
+        if "path" in request:
+            return self.recognize("path", request["path"])
+        if "data" in request:
+            try:
+                raw_img = base64.b64decode(request["data"], validate=True)
+            except ValueError as e:
+                return {"error": f"Invalid data: {e}"}
+            return self.recognize("data", raw_img)
+        return {"error": "Request needs path, data or command"}
+
+    def recognize(self, kind: str, raw_img: Union[str, bytes]) -> dict:
+        """Recognize raw image, recording latency in histogram of given kind of requests
+
+        Args:
+            kind (str): Kind of request, "path" or "data"
+            raw_img (str | bytes): Path to raw image or its raw bytes
+
+        Returns:
+            dict: Recognition result or {"error": message}
+        """
+        start = time.perf_counter()
+        try:
+            with self.lock:
+                return result_to_dict(self.image_recognizer.recognize(raw_img))
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            self.histograms[kind].observe(time.perf_counter() - start)
+
+
+class UnixRequestHandler(socketserver.StreamRequestHandler):
+    """Handles JSON line requests, one JSON line response for each of them"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                response = {"error": f"Invalid request: {e}"}
+            else:
+                response = self.server.service.handle(request)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class HTTPRequestHandler(BaseHTTPRequestHandler):
+    """POST /recognize with raw image or JSON request {"data": ...} as body, GET /stats for latency histograms,
+    GET /metrics for metrics of recognition stages in Prometheus text format.
+    Files are read by path only for requests on the Unix domain socket, protected by its file permissions,
+    not for anyone able to connect to the localhost port"""
+
+    MAX_BODY_SIZE = 256 * 2**20
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = self.server.service.metrics.to_prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path != "/stats":
+            self.send_json(404, {"error": "Not found"})
+            return
+        self.send_json(200, self.server.service.handle({"command": "stats"}))
+
+    def do_POST(self):
+        if self.path != "/recognize":
+            self.send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self.send_json(400, {"error": "Invalid Content-Length"})
+            return
+        if length > self.MAX_BODY_SIZE:
+            self.send_json(413, {"error": f"Body bigger than {self.MAX_BODY_SIZE} bytes"})
+            self.close_connection = True
+            return
+        body = self.rfile.read(length)
+        if self.headers.get("Content-Type") == "application/json":
+            try:
+                request = json.loads(body)
+            except json.JSONDecodeError as e:
+                response = {"error": f"Invalid request: {e}"}
+            else:
+                if isinstance(request, dict) and "path" in request:
+                    response = {"error": "Requests by path are accepted on Unix domain socket only"}
+                else:
+                    response = self.server.service.handle(request)
+        else:
+            response = self.server.service.recognize("data", body)
+        self.send_json(400 if "error" in response else 200, response)
+
+    def send_json(self, code: int, response: dict):
+        body = json.dumps(response).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.info(format, *args)
+
+
+def make_servers(service: RecognitionService, socket_path: str, port: int = 0) -> list:
+    """Bind servers sharing recognition service, stale socket file is replaced,
+    but not a socket of running daemon
+
+    Args:
+        service (RecognitionService): Service handling requests
+        socket_path (str): Path to Unix domain socket
+        port (int, optional): Localhost HTTP port, HTTP server is not created if 0. Defaults to 0.
+
+    Raises:
+        OSError: Another daemon is listening on socket_path or it is not a socket
+
+    Returns:
+        list: Unix domain socket server and optionally HTTP server, not started yet
+    """
+    if os.path.exists(socket_path):
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            raise OSError(f"{socket_path} exists and is not a socket")
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(socket_path)
+        except ConnectionRefusedError:
+            os.remove(socket_path)
+        else:
+            raise OSError(f"Daemon is already running on {socket_path}")
+    unix_server = socketserver.ThreadingUnixStreamServer(socket_path, UnixRequestHandler)
+    unix_server.daemon_threads = True
+    unix_server.service = service
+    servers = [unix_server]
+    if port:
+        http_server = ThreadingHTTPServer(("127.0.0.1", port), HTTPRequestHandler)
+        http_server.daemon_threads = True
+        http_server.service = service
+        servers.append(http_server)
+    return servers
+
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH, port: int = 0, **recognizer_kwargs):
+    """Run recognition daemon on Unix domain socket and, optionally, on localhost HTTP port
+
+    Args:
+        socket_path (str, optional): Path to Unix domain socket. Defaults to DEFAULT_SOCKET_PATH.
+        port (int, optional): Localhost HTTP port, HTTP server is not started if 0. Defaults to 0.
+        recognizer_kwargs: Arguments for ImageRecognizer
+    """
+    service = RecognitionService(**recognizer_kwargs)
+    servers = make_servers(service, socket_path, port)
+    threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in servers]
+    for thread in threads:
+        thread.start()
+    print(f"Serving on {socket_path}" + (f" and http://127.0.0.1:{port}" if port else ""))
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,111 @@
+import os
+from dataclasses import dataclass
+from typing import Iterator, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+DEFAULT_SAMPLED_ROWS = 64
+DEFAULT_MAX_ROW_SCORE = 0.8
+
+
+@dataclass
+class Frame:
+    """Frame of raw video stream
+
+    Args:
+        index (int): Number of the frame in the stream
+        offset (int): Offset of the frame in the file
+        data (memoryview): Bytes of the frame, valid only until the next frame is read
+        score (float): Row alignment score of the frame, see row_alignment_score
+        matches (bool): Frame is whole and its rows are aligned, it still matches the frame size
+    """
+
+    index: int
+    offset: int
+    data: memoryview
+    score: float
+    matches: bool
+
+
+def _sampled_rows(rows_n: int, rows: int) -> NDArray:
+    return np.unique(np.linspace(0, rows_n - 1, min(rows, rows_n)).astype(np.int64))
+
+
+def row_alignment_score(frame: NDArray, row_size: int, rows: int = DEFAULT_SAMPLED_ROWS) -> float:
+    """Check that bytes of the frame form rows of given size, from a few sampled pairs of adjacent rows.
+
+    Score is the mean difference of vertically adjacent bytes divided by the mean difference of bytes
+    of the next row shifted by half a row. Rows of natural images are similar to the next ones, so it is
+    well below 1 for the right row size and close to 1 for a wrong one.
+
+    Args:
+        frame (NDArray): Bytes of the frame as 1D uint8 array
+        row_size (int): Size of row in bytes
+        rows (int, optional): Number of sampled pairs of rows. Defaults to DEFAULT_SAMPLED_ROWS.
+
+    Returns:
+        float: Score, inf if the frame has less than two rows
+    """
+    rows_n = frame.size // row_size
+    if rows_n < 2:
+        return float("inf")
+    view = frame[: rows_n * row_size].reshape(rows_n, row_size)
+    sampled = _sampled_rows(rows_n - 1, rows)
+    upper = view[sampled].astype(np.int16)
+    lower = view[sampled + 1].astype(np.int16)
+    aligned = np.abs(upper - lower).mean()
+    shifted = np.abs(upper - np.roll(lower, row_size // 2, axis=1)).mean()
+    return float(aligned / shifted) if shifted else float(aligned > 0)
+
+
+def frame_height(
+    raw: NDArray, row_size: int, heights: Sequence[int], rows: int = DEFAULT_SAMPLED_ROWS
+) -> int:
+    """Find height of frames of a stream from its leading frames, as consecutive frames are similar.
+
+    For every height fitting the data at least twice, sampled rows of the first frame are compared
+    with the same rows of the next frame. The height with the smallest difference wins, the smallest one
+    of equally good heights (multiples of the frame height give the same difference for a still scene).
+
+    Args:
+        raw (NDArray): Leading bytes of the stream as 1D uint8 array
+        row_size (int): Size of row in bytes
+        heights (Sequence[int]): Heights to check
+        rows (int, optional): Number of sampled rows. Defaults to DEFAULT_SAMPLED_ROWS.
+
+    Returns:
+        int: Height of frames, 0 if no height fits the data twice
+    """
+    heights = sorted(height for height in heights if 2 * height * row_size <= raw.size)
+    if not heights:
+        return 0
+    view = raw[: raw.size // row_size * row_size].reshape(-1, row_size)
+    sampled = _sampled_rows(heights[0], rows)
+    first = view[sampled].astype(np.int16)
+    differences = [np.abs(first - view[sampled + height]).mean() for height in heights]
+    return heights[int(np.argmin(differences))]
+
+
+def iter_frames(
+    path: str, frame_size: int, row_size: int, max_score: float = DEFAULT_MAX_ROW_SCORE
+) -> Iterator[Frame]:
+    """Read the file frame by frame into a single reused buffer, checking rows of every frame
+
+    Args:
+        path (str): Path to the file
+        frame_size (int): Size of frame in bytes
+        row_size (int): Size of row in bytes
+        max_score (float, optional): Max row alignment score of a matching frame. Defaults to DEFAULT_MAX_ROW_SCORE.
+
+    Returns:
+        Iterator[Frame]: Frames of the stream, the last one can be shorter than frame_size
+    """
+    buffer = bytearray(frame_size)
+    array = np.frombuffer(buffer, dtype=np.uint8)
+    with open(path, "rb", buffering=0) as file:
+        size = os.fstat(file.fileno()).st_size
+        for index, offset in enumerate(range(0, size, frame_size)):
+            n = file.readinto(buffer)
+            score = row_alignment_score(array[:n], row_size)
+            yield Frame(index, offset, memoryview(buffer)[:n], score, n == frame_size and score <= max_score)
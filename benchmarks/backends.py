@@ -0,0 +1,106 @@
+"""Compare latency of inference backends on model-sized batches and on whole recognition of a corpus.
+
+Usage:
+    python benchmarks/backends.py [raw files...] [--backends keras tflite onnx]
+        [--batch-sizes 1 8 64] [--repeats N]
+
+Has to be run from the repository root, with models in image-recognizer-models.
+Models for tflite and onnx backends are made with `python app convert tflite|onnx`,
+backends without converted models or packages are skipped.
+"""
+import argparse
+import contextlib
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from backend import BACKENDS, BackendNotAvailable, backend_model_path, load_backend  # noqa: E402
+from image_recognizer import ImageRecognizer  # noqa: E402
+
+
+def time_batches(model, batch_sizes, repeats):
+    timings = {}
+    for batch_size in batch_sizes:
+        batch = np.random.default_rng(0).random(
+            (
+                batch_size,
+                ImageRecognizer.DEFAULT_RESOLUTION_MODEL_IMG_HEIGHT,
+                ImageRecognizer.DEFAULT_RESOLUTION_MODEL_IMG_WIDTH,
+                1,
+            ),
+            dtype=np.float32,
+        ) - 0.5
+        model(batch)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            model(batch)
+        timings[batch_size] = (time.perf_counter() - start) / repeats
+    return timings
+
+
+def time_recognition(backend, files):
+    image_recognizer = ImageRecognizer(backend=backend)
+    results = []
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        image_recognizer.recognize(files[0])
+        start = time.perf_counter()
+        for path in files:
+            result = image_recognizer.recognize(path)
+            results.append((result.color_format, result.img_width))
+    return results, (time.perf_counter() - start) / len(files)
+
+
+def time_backend(backend, files, batch_sizes, repeats):
+    model_path = backend_model_path(ImageRecognizer.DEFAULT_RESOLUTION_MODEL_PATH, backend)
+    try:
+        model = load_backend(model_path, backend)
+    except (BackendNotAvailable, OSError) as e:
+        return str(e), None, None, None
+    timings = time_batches(model, batch_sizes, repeats)
+    del model
+    return None, timings, *time_recognition(backend, files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "files", nargs="*", default=sorted(glob.glob("tests/test_data/*/*.raw"))
+    )
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 64])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    reference = None
+    for backend in args.backends:
+        # Every backend is measured in a fresh process, so models of the previous ones do not take its memory
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            error, timings, results, seconds_per_file = executor.submit(
+                time_backend, backend, args.files, args.batch_sizes, args.repeats
+            ).result()
+        if error:
+            print(f"{backend:8} skipped: {error}")
+            continue
+        if reference is None:
+            reference = results
+        same = sum(a == b for a, b in zip(reference, results))
+        batches = ", ".join(
+            f"batch {size}: {seconds * 1000:.1f} ms ({seconds * 1000 / size:.2f} ms/img)"
+            for size, seconds in timings.items()
+        )
+        print(f"{backend:8} {batches}")
+        print(
+            f"{'':8} recognition: {seconds_per_file:.3f} s/file, "
+            f"same results as {args.backends[0]}: {same}/{len(args.files)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
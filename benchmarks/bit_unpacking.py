@@ -0,0 +1,99 @@
+"""Compare pure Python and vectorized unpacking of not byte-filled formats.
+
+Usage:
+    python benchmarks/bit_unpacking.py [--size-mb N]
+
+Every format is unpacked from the same random buffer with both
+implementations, results are checked to be equal and timings are reported.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from raw_image_data_previewer.app.image.color_format import (  # noqa: E402
+    AVAILABLE_FORMATS,
+    Endianness,
+)
+from raw_image_data_previewer.app.parser.common import unpack_components  # noqa: E402
+
+FORMATS = [
+    "ABGR444",
+    "ABGR555",
+    "RGB565",
+    "RGB332",
+    "GRAY10",
+    "GRAY12",
+    "RG10",
+    "RG12",
+]
+
+
+def legacy_parse_not_bytefilled(raw_data, color_format):
+    """Implementation of AbstractParser._parse_not_bytefilled before vectorization"""
+    comp_bits = color_format.bits_per_components
+    draft_data = bytearray(raw_data)
+    step = int(math.lcm(sum(comp_bits), 8) / 8)
+    if len(draft_data) % step != 0:
+        draft_data += (0).to_bytes(len(raw_data) % step, byteorder="little")
+    position = 0
+    data_array = []
+    while position + step <= len(draft_data):
+
+        current_bytes = draft_data[position : position + step]
+        temp_number = int.from_bytes(
+            current_bytes,
+            "little" if color_format.endianness == Endianness.LITTLE_ENDIAN else "big",
+        )
+
+        read_bits = 0
+        while read_bits < step * 8:
+            pixel_arr = []
+            for i in range(3, -1, -1):
+                data = temp_number & (2 ** comp_bits[i] - 1)
+                pixel_arr.append(data)
+                temp_number >>= comp_bits[i]
+                read_bits += comp_bits[i]
+            data_array += pixel_arr[::-1]
+        position += step
+
+    return data_array
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    raw = np.random.default_rng(0).integers(
+        0, 256, int(args.size_mb * 2**20) + 7, dtype=np.uint8
+    ).tobytes()
+
+    print(f"{'format':<8} {'legacy s':>9} {'vectorized s':>13} {'speedup':>8}")
+    for name in FORMATS:
+        color_format = AVAILABLE_FORMATS[name]
+
+        start = time.perf_counter()
+        expected = legacy_parse_not_bytefilled(raw, color_format)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = unpack_components(
+            raw, color_format.bits_per_components, color_format.endianness
+        ).ravel()
+        vectorized_time = time.perf_counter() - start
+
+        assert np.array_equal(result, np.array(expected)), name
+        print(
+            f"{name:<8} {legacy_time:>9.3f} {vectorized_time:>13.4f} "
+            f"{legacy_time / vectorized_time:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
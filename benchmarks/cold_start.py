@@ -0,0 +1,58 @@
+"""Measure cold start of the CLI: wall time of fresh `python app ...` processes.
+
+Usage:
+    python benchmarks/cold_start.py [raw file] [--backends keras tflite onnx] [--repeats N]
+
+Has to be run from the repository root, with models in image-recognizer-models.
+Every run is a new interpreter, so it pays for imports and model loading like a user does.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from backend import BACKENDS, backend_model_path  # noqa: E402
+from image_recognizer import ImageRecognizer  # noqa: E402
+
+
+def time_command(args, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "app"] + args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        best = min(best, time.perf_counter() - start)
+        if completed.returncode:
+            return None
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("file", nargs="?", default="tests/test_data/RGB24/picture_nr_20_500x375.raw")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = os.path.join(tmp_dir, "cache.sqlite")
+        commands = {"--help": ["--help"]}
+        for backend in args.backends:
+            if os.path.exists(backend_model_path(ImageRecognizer.DEFAULT_RESOLUTION_MODEL_PATH, backend)):
+                commands[f"rec, {backend}"] = ["rec", args.file, "--local", "--backend", backend]
+        # The first run fills the cache, so the measured ones are hits
+        commands["rec, cache hit"] = ["rec", args.file, "--local", "--cache", cache]
+        time_command(commands["rec, cache hit"], 1)
+
+        for name, command in commands.items():
+            seconds = time_command(command, args.repeats)
+            print(f"{name:16} " + ("failed" if seconds is None else f"{seconds:.2f} s"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare two results of benchmarks/stages.py, e.g. of two commits.
+
+Usage:
+    python benchmarks/compare.py base.json new.json [--metric wall_s] [--threshold 0.1] [--fail]
+
+Every stage measured in both files is printed with ratio of new to base value of the metric.
+Changes above threshold are marked as regressions or improvements. With --fail, exit code is 1
+if there is any regression, so the comparison can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ["wall_s", "cpu_s", "peak_tracemalloc_mb", "peak_rss_growth_mb"]
+
+
+def key(result):
+    return (
+        result["stage"],
+        result.get("size") or f"batch {result.get('batch')}",
+        result.get("format") or result.get("backend"),
+    )
+
+
+def load(path):
+    with open(path) as file:
+        data = json.load(file)
+    return data["metadata"], {key(result): result for result in data["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="wall_s", choices=METRICS)
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change reported as significant")
+    parser.add_argument("--fail", action="store_true", help="Exit with 1 if any stage regressed")
+    args = parser.parse_args()
+
+    base_metadata, base = load(args.base)
+    new_metadata, new = load(args.new)
+    print(f"base: {base_metadata.get('commit', '')[:12]} {base_metadata.get('time', '')}")
+    print(f"new:  {new_metadata.get('commit', '')[:12]} {new_metadata.get('time', '')}")
+    print(f"{'stage':22} {'size':>10} {'format':8} {'base':>10} {'new':>10} {'ratio':>7}")
+
+    regressions = 0
+    for stage_key in sorted(base.keys() & new.keys()):
+        old_value, new_value = base[stage_key][args.metric], new[stage_key][args.metric]
+        ratio = new_value / old_value if old_value else float("inf") if new_value else 1.0
+        mark = ""
+        if ratio > 1 + args.threshold:
+            mark = "regression"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            mark = "improvement"
+        print(f"{stage_key[0]:22} {stage_key[1]:>10} {stage_key[2]:8} {old_value:10.4g} {new_value:10.4g} "
+              f"{ratio:6.2f}x {mark}")
+    for name, only in (("base", base.keys() - new.keys()), ("new", new.keys() - base.keys())):
+        if only:
+            print(f"{len(only)} stages measured only in {name}")
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
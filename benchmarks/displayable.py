@@ -0,0 +1,97 @@
+"""Compare get_displayable with lookup tables against the former float64 scaling, per format.
+
+Usage:
+    python benchmarks/displayable.py [--width N] [--height N] [--repeat N]
+
+Every RGB, Bayer and grayscale format is parsed from the same buffer (an upscaled RGB24 test image),
+then displayable image is computed both ways. Reported are the best times, tracemalloc peaks
+and whether results are bit exact.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from raw_image_data_previewer.app.core import get_displayable, load_image  # noqa: E402
+from raw_image_data_previewer.app.image.color_format import AVAILABLE_FORMATS, PixelFormat  # noqa: E402
+
+IMG_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "test_data", "RGB24", "picture_nr_20_500x375.raw"
+)
+CHANNELS_ORDER = {
+    PixelFormat.RGBA: [0, 1, 2, 3],
+    PixelFormat.BGRA: [2, 1, 0, 3],
+    PixelFormat.ARGB: [1, 2, 3, 0],
+    PixelFormat.ABGR: [3, 2, 1, 0],
+}
+LUT_PIXEL_FORMATS = [*CHANNELS_ORDER, PixelFormat.BAYER_RG, PixelFormat.MONO]
+
+
+def float_displayable(image):
+    """get_displayable as it was computed in float64, before lookup tables"""
+    color_format = image.color_format
+    bpcs = color_format.bits_per_components
+    if color_format.pixel_format == PixelFormat.MONO:
+        data = np.reshape(image.processed_data, (image.height, image.width)).astype("float")
+        data[:] = 255 * (data[:] / (2 ** bpcs[0] - 1))
+        return cv2.cvtColor(data.astype("uint8"), cv2.COLOR_GRAY2RGB)
+    if color_format.pixel_format == PixelFormat.BAYER_RG:
+        data = np.reshape(image.processed_data, (image.height, image.width)).astype("float")
+        data[:, :] = (255 * data[:, :]) / (2 ** bpcs[0] - 1)
+        return cv2.cvtColor(data.astype("uint8"), cv2.COLOR_BAYER_BG2RGB)
+    data = np.reshape(image.processed_data.astype("float64"), (image.height, image.width, 4))
+    channels = 4
+    if color_format.pixel_format in (PixelFormat.RGBA, PixelFormat.BGRA) and bpcs[3] == 0:
+        data[:, :, 3] = 255
+        channels = 3
+    for i in range(channels):
+        data[:, :, i] = (255 * data[:, :, i]) / (2 ** bpcs[i] - 1)
+    return data[:, :, CHANNELS_ORDER[color_format.pixel_format]].astype("uint8")
+
+
+def measure(function, repeat):
+    tracemalloc.start()
+    result = function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times), peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=2000)
+    parser.add_argument("--height", type=int, default=1500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", RuntimeWarning)
+
+    img = np.fromfile(IMG_PATH, dtype=np.uint8).reshape(375, 500, 3)
+    raw = cv2.resize(img, (args.width, args.height), interpolation=cv2.INTER_CUBIC).tobytes()
+
+    print(f"{'format':<8} {'float ms':>9} {'lut ms':>7} {'speedup':>8} {'float MB':>9} {'lut MB':>7} {'exact':>6}")
+    for name, color_format in AVAILABLE_FORMATS.items():
+        if color_format.pixel_format not in LUT_PIXEL_FORMATS:
+            continue
+        image = load_image(raw, name, args.width)
+        float_time, float_peak, expected = measure(lambda image=image: float_displayable(image), args.repeat)
+        lut_time, lut_peak, displayable = measure(lambda image=image: get_displayable(image), args.repeat)
+        print(
+            f"{name:<8} {float_time * 1000:>9.2f} {lut_time * 1000:>7.2f} {float_time / lut_time:>7.1f}x "
+            f"{float_peak / 2**20:>9.1f} {lut_peak / 2**20:>7.1f} {str(np.array_equal(expected, displayable)):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare cost of recognition with and without early exit policy on a corpus.
+
+Usage:
+    python benchmarks/early_exit.py [raw files...] [--color-format-confidence X]
+        [--resolution-confidence X] [--margin X]
+
+Has to be run from the repository root, with models in image-recognizer-models.
+"""
+import argparse
+import contextlib
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from image_recognizer import ImageRecognizer  # noqa: E402
+
+
+def run(image_recognizer, files):
+    results = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for path in files:
+            results.append(image_recognizer.recognize(path))
+    return results, (time.perf_counter() - start) / len(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "files", nargs="*", default=sorted(glob.glob("tests/test_data/*/*.raw"))
+    )
+    defaults = ImageRecognizer.EarlyExitPolicy()
+    parser.add_argument("--color-format-confidence", type=float, default=defaults.color_format_confidence)
+    parser.add_argument("--resolution-confidence", type=float, default=defaults.resolution_confidence)
+    parser.add_argument("--margin", type=float, default=defaults.margin)
+    args = parser.parse_args()
+
+    policy = ImageRecognizer.EarlyExitPolicy(
+        args.color_format_confidence, args.resolution_confidence, args.margin
+    )
+    image_recognizer = ImageRecognizer()
+    # Warm up models, so the first measured call does not pay for tracing
+    run(image_recognizer, args.files[:1])
+
+    full, full_time = run(image_recognizer, args.files)
+    image_recognizer.early_exit = policy
+    early, early_time = run(image_recognizer, args.files)
+
+    same = sum(
+        (a.color_format, a.img_width) == (b.color_format, b.img_width)
+        for a, b in zip(full, early)
+    )
+    mean_full = sum(r.hypotheses_evaluated for r in full) / len(full)
+    mean_early = sum(r.hypotheses_evaluated for r in early) / len(early)
+    print(f"policy:                {policy}")
+    print(f"files:                 {len(args.files)}")
+    print(f"hypotheses per file:   {mean_full:.1f} -> {mean_early:.1f}")
+    print(f"seconds per file:      {full_time:.3f} -> {early_time:.3f}")
+    print(f"same results:          {same}/{len(args.files)}")
+
+
+if __name__ == "__main__":
+    main()
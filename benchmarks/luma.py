@@ -0,0 +1,66 @@
+"""Compare gray of get_displayable (former color format model input) with get_luma, per format.
+
+Usage:
+    python benchmarks/luma.py [--width N] [--height N] [--repeat N]
+
+Every format is parsed from the same buffer (an upscaled RGB24 test image), then luminance is
+computed both ways. Reported are the best times of both and mean absolute difference of results,
+in percents of the full range, which has to be 0 for every format.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from raw_image_data_previewer.app.core import (  # noqa: E402
+    get_displayable,
+    get_luma,
+    load_image,
+)
+from raw_image_data_previewer.app.image.color_format import AVAILABLE_FORMATS  # noqa: E402
+
+IMG_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "test_data", "RGB24", "picture_nr_20_500x375.raw"
+)
+
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=2000)
+    parser.add_argument("--height", type=int, default=1500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    img = np.fromfile(IMG_PATH, dtype=np.uint8).reshape(375, 500, 3)
+    raw = cv2.resize(img, (args.width, args.height), interpolation=cv2.INTER_CUBIC).tobytes()
+
+    print(f"{'format':<8} {'displayable ms':>15} {'luma ms':>8} {'speedup':>8} {'difference':>11}")
+    for name in AVAILABLE_FORMATS:
+        image = load_image(raw, name, args.width)
+        gray_time, gray = best_time(
+            lambda image=image: cv2.cvtColor(get_displayable(image), cv2.COLOR_BGR2GRAY), args.repeat
+        )
+        luma_time, luma = best_time(lambda image=image: get_luma(image), args.repeat)
+        difference = np.abs(gray.astype(int) - luma).mean() / 255
+        print(
+            f"{name:<8} {gray_time * 1000:>15.2f} {luma_time * 1000:>8.2f} "
+            f"{gray_time / luma_time:>7.1f}x {difference:>10.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
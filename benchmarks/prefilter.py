@@ -0,0 +1,162 @@
+"""Recall and time of the statistical color format prefilter.
+
+Usage:
+    python benchmarks/prefilter.py [--universe default|all] [--top-k 1 2 4 6 8] [--sample-kb 256] [--synthetic]
+
+Files of tests/test_data are ranked among the color formats of the universe, default being the formats
+the model knows (COLOR_FORMATS_RATIOS) and all being every registered format. recall@k is the part of files
+whose true format is among the k best ranked ones. With --synthetic, every RGB24 test image is also encoded
+into every format of the universe. Formats differing only in order of channels (RGB24 and BGR24...) have
+the same statistics, so they tie and the second one is always ranked one place lower.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from color_format import COLOR_FORMATS_RATIOS  # noqa: E402
+from prefilter import FormatPrefilter  # noqa: E402
+from raw_image_data_previewer.app.image.color_format import (  # noqa: E402
+    AVAILABLE_FORMATS,
+    Endianness,
+    PixelFormat,
+    PixelPlane,
+)
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), "..", "tests", "test_data")
+LABELS = {
+    "RGB24": "RGB24",
+    "abgr444": "ABGR444",
+    "abgr555": "ABGR555",
+    "gray": "GRAY",
+    "rgb332": "RGB332",
+    "rgb565": "RGB565",
+    "rgba32": "RGBA32",
+    "uyvy": "UYVY",
+}
+CHANNELS_ORDER = {
+    PixelFormat.RGBA: [0, 1, 2, 3],
+    PixelFormat.BGRA: [2, 1, 0, 3],
+    PixelFormat.ARGB: [3, 0, 1, 2],
+    PixelFormat.ABGR: [3, 2, 1, 0],
+}
+PACKED_YUV_ORDER = {
+    PixelFormat.YUYV: [0, 1, 2, 3],
+    PixelFormat.UYVY: [1, 0, 3, 2],
+    PixelFormat.YVYU: [0, 3, 2, 1],
+    PixelFormat.VYUY: [3, 0, 1, 2],
+}
+
+
+def read_rgb(path):
+    """Read RGB24 test image, its whole rows (some files are shorter than their resolution)"""
+    width = int(os.path.basename(path).rsplit("_", 1)[1].split("x")[0])
+    data = np.fromfile(path, dtype=np.uint8)
+    return data[: data.size // (width * 3) * width * 3].reshape(-1, width, 3)
+
+
+def widen(data, bits):
+    """Big endian samples of given bits from 8 bit ones, with noise in the added least significant bits"""
+    noise = np.random.default_rng(0).integers(0, 2 ** (bits - 8), data.shape, dtype=np.uint16)
+    return ((data.astype(np.uint16) << (bits - 8)) | noise).astype(">u2").tobytes()
+
+
+def encode(rgb, name):
+    """Encode RGB image (its even part) into color format of given name"""
+    color_format = AVAILABLE_FORMATS[name]
+    rgb = rgb[: rgb.shape[0] // 2 * 2, : rgb.shape[1] // 2 * 2]
+    bits = color_format.bits_per_components
+    pixel_format = color_format.pixel_format
+    if pixel_format == PixelFormat.MONO:
+        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        return gray.tobytes() if bits[0] == 8 else widen(gray, bits[0])
+    if pixel_format == PixelFormat.BAYER_RG:
+        bayer = rgb[:, :, 1].copy()
+        bayer[0::2, 0::2] = rgb[0::2, 0::2, 0]
+        bayer[1::2, 1::2] = rgb[1::2, 1::2, 2]
+        return bayer.tobytes() if bits[0] == 8 else widen(bayer, bits[0])
+    if pixel_format in PACKED_YUV_ORDER:
+        yuv = cv2.cvtColor(rgb, cv2.COLOR_RGB2YUV).astype(np.uint16)
+        y0, y1 = yuv[:, 0::2, 0], yuv[:, 1::2, 0]
+        u = (yuv[:, 0::2, 1] + yuv[:, 1::2, 1] + 1) // 2
+        v = (yuv[:, 0::2, 2] + yuv[:, 1::2, 2] + 1) // 2
+        planes = [y0, u, y1, v]
+        return np.stack([planes[i] for i in PACKED_YUV_ORDER[pixel_format]], axis=-1).astype(np.uint8).tobytes()
+    if color_format.pixel_plane != PixelPlane.PACKED:
+        if color_format.subsampling_vertical == 1:
+            yuv = cv2.cvtColor(rgb, cv2.COLOR_RGB2YUV)
+            u = cv2.resize(yuv[:, :, 1], (rgb.shape[1] // 2, rgb.shape[0]), interpolation=cv2.INTER_AREA)
+            v = cv2.resize(yuv[:, :, 2], (rgb.shape[1] // 2, rgb.shape[0]), interpolation=cv2.INTER_AREA)
+            return yuv[:, :, 0].tobytes() + u.tobytes() + v.tobytes()
+        i420 = cv2.cvtColor(rgb, cv2.COLOR_RGB2YUV_I420)
+        height, width = rgb.shape[:2]
+        y = i420[:height].tobytes()
+        chroma = i420[height:].reshape(2, -1)
+        if pixel_format == PixelFormat.YVU:
+            chroma = chroma[::-1]
+        if color_format.pixel_plane == PixelPlane.PLANAR:
+            return y + chroma.tobytes()
+        return y + chroma.T.tobytes()
+
+    alpha = np.full(rgb.shape[:2] + (1,), 255, dtype=np.uint8)
+    components = np.concatenate([rgb, alpha], axis=2)[:, :, CHANNELS_ORDER[pixel_format]].astype(np.uint32)
+    if all(bpc in (0, 8) for bpc in bits):
+        return components[:, :, [i for i, bpc in enumerate(bits) if bpc]].astype(np.uint8).tobytes()
+    value = np.zeros(rgb.shape[:2], dtype=np.uint32)
+    for i, bpc in enumerate(bits):
+        value = (value << bpc) | (components[:, :, i] >> (8 - bpc))
+    byteorder = "<" if color_format.endianness == Endianness.LITTLE_ENDIAN else ">"
+    return value.astype(f"{byteorder}u{(sum(bits) + 7) // 8}").tobytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--universe", choices=["default", "all"], default="default")
+    parser.add_argument("--top-k", nargs="+", type=int, default=[1, 2, 3, 4, 6, 8])
+    parser.add_argument("--sample-kb", type=int, default=FormatPrefilter.sample_size // 2**10)
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args()
+
+    universe = list(COLOR_FORMATS_RATIOS) if args.universe == "default" else list(AVAILABLE_FORMATS)
+    prefilter = FormatPrefilter(sample_size=args.sample_kb * 2**10)
+    samples = []
+    for directory, label in LABELS.items():
+        for path in sorted(glob.glob(os.path.join(TEST_DATA, directory, "*.raw"))):
+            samples.append((label, os.path.basename(path), lambda path=path: open(path, "rb").read()))
+    if args.synthetic:
+        for path in sorted(glob.glob(os.path.join(TEST_DATA, "RGB24", "*.raw"))):
+            for name in universe:
+                description = f"{os.path.basename(path)} as {name}"
+                samples.append((name, description, lambda path=path, name=name: encode(read_rgb(path), name)))
+
+    ranks, times = {}, []
+    for label, description, load in samples:
+        raw_data = load()
+        start = time.perf_counter()
+        ranking = prefilter.rank(raw_data, universe)
+        times.append(time.perf_counter() - start)
+        ranks.setdefault(label, []).append(ranking.index(label) + 1)
+        if args.verbose:
+            print(f"{description:48} rank {ranking.index(label) + 1:2}  best {ranking[:4]}")
+
+    all_ranks = np.concatenate([np.array(r) for r in ranks.values()])
+    print(f"{len(all_ranks)} files, {len(universe)} formats, {np.mean(times) * 1000:.1f} ms/file "
+          f"(max {np.max(times) * 1000:.1f} ms)")
+    print(f"{'format':8} {'files':>5} {'median':>6} {'worst':>5} " + " ".join(f"{f'@{k}':>5}" for k in args.top_k))
+    for label, label_ranks in [*ranks.items(), ("all", all_ranks)]:
+        label_ranks = np.array(label_ranks)
+        print(
+            f"{label:8} {len(label_ranks):5} {np.median(label_ranks):6g} {label_ranks.max():5} "
+            + " ".join(f"{(label_ranks <= k).mean():5.2f}" for k in args.top_k)
+        )
+
+
+if __name__ == "__main__":
+    main()
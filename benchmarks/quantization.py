@@ -0,0 +1,105 @@
+"""Compare quantized models with the float ones: accuracy on tests/test_data, latency and model size.
+
+Usage:
+    python benchmarks/quantization.py [raw files...] [--variants keras tflite float16] [--repeats N]
+
+Has to be run from the repository root, with models in image-recognizer-models.
+Quantized models are made with `python app quantize float16`, tflite ones with `python app convert tflite`,
+missing variants are skipped. Expected color format and height are taken from directory and file names.
+"""
+import argparse
+import contextlib
+import glob
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from backend import backend_model_path, load_backend  # noqa: E402
+from image_recognizer import ImageRecognizer  # noqa: E402
+
+VARIANTS = {
+    "keras": ("keras", ""),
+    "tflite": ("tflite", ""),
+    "float16": ("tflite", "float16"),
+}
+MODELS = [ImageRecognizer.DEFAULT_RESOLUTION_MODEL_PATH, ImageRecognizer.DEFAULT_COLOR_FORMAT_MODEL_PATH]
+
+
+def expected_result(path):
+    match = re.search(r"(\d+)x(\d+)", os.path.basename(path))
+    return os.path.basename(os.path.dirname(path)).upper(), int(match.group(2)) if match else 0
+
+
+def measure_variant(backend, quantization, files, batch_size, repeats):
+    paths = [backend_model_path(path, backend, quantization) for path in MODELS]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    size = sum(os.path.getsize(path) for path in paths)
+    batch = np.random.default_rng(0).random((batch_size, 256, 256, 1), dtype=np.float32) - 0.5
+    latency = 0.0
+    for path in paths:
+        model = load_backend(path, backend)
+        model(batch)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            model(batch)
+        latency += (time.perf_counter() - start) / repeats / batch_size
+        del model
+
+    image_recognizer = ImageRecognizer(backend=backend, quantization=quantization)
+    results = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for path in files:
+            result = image_recognizer.recognize(path)
+            results.append((result.color_format, result.img_height, result.img_width, result.color_format_confidence))
+    return size, latency, results, (time.perf_counter() - start) / len(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "files", nargs="*", default=sorted(glob.glob("tests/test_data/*/*.raw"))
+    )
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    expected = [expected_result(path) for path in args.files]
+    reference = None
+    print(
+        f"{'variant':8} {'size MB':>8} {'ms/img':>7} {'s/file':>7} {'format':>7} {'height':>7}"
+        f" {'same as ' + args.variants[0]:>14} {'|d conf|':>9}"
+    )
+    for variant in args.variants:
+        # Every variant is measured in a fresh process, so models of the previous ones do not take its memory
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            measured = executor.submit(
+                measure_variant, *VARIANTS[variant], args.files, args.batch_size, args.repeats
+            ).result()
+        if measured is None:
+            print(f"{variant:8} skipped, models not found")
+            continue
+        size, latency, results, seconds_per_file = measured
+        if reference is None:
+            reference = results
+        format_accuracy = np.mean([r[0] == e[0] for r, e in zip(results, expected)])
+        height_accuracy = np.mean([r[1] == e[1] for r, e in zip(results, expected)])
+        same = np.mean([r[:3] == f[:3] for r, f in zip(results, reference)])
+        confidence_diff = np.mean([abs(r[3] - f[3]) for r, f in zip(results, reference)])
+        print(
+            f"{variant:8} {size / 2**20:8.1f} {latency * 1000:7.2f} {seconds_per_file:7.2f}"
+            f" {format_accuracy:7.1%} {height_accuracy:7.1%} {same:14.1%} {confidence_diff:9.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compare throughput of ImageRecognizer.recognize in a loop and ImageRecognizer.recognize_many.
+
+Usage:
+    python benchmarks/recognize_many.py [raw files...] [--batch-size N]
+
+Has to be run from the repository root, with models in image-recognizer-models.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from image_recognizer import ImageRecognizer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "files", nargs="*", default=sorted(glob.glob("tests/test_data/*/*.raw"))
+    )
+    parser.add_argument("--batch-size", type=int, default=0)
+    args = parser.parse_args()
+
+    image_recognizer = ImageRecognizer()
+    # Warm up models, so the first measured call does not pay for tracing
+    image_recognizer.recognize(args.files[0])
+
+    start = time.perf_counter()
+    looped = [image_recognizer.recognize(path) for path in args.files]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = image_recognizer.recognize_many(args.files, batch_size=args.batch_size)
+    many_time = time.perf_counter() - start
+
+    same = sum(
+        (a.color_format, a.img_width) == (b.color_format, b.img_width)
+        for a, b in zip(looped, batched)
+    )
+    print(f"files:              {len(args.files)}")
+    print(f"recognize loop:     {len(args.files) / loop_time:.3f} files/s")
+    print(f"recognize_many:     {len(args.files) / many_time:.3f} files/s")
+    print(f"speedup:            {loop_time / many_time:.2f}x")
+    print(f"same results:       {same}/{len(args.files)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare resolution candidate generation: PIL image copied from raw bytes (the former path),
+exact resize of a view of raw bytes (strided_candidate default) and box sampling (taps=8).
+
+Usage:
+    python benchmarks/resolution_candidates.py [raw files...] [--size-mb N]
+
+For every file, all candidates of the first resolution search tour are built
+with every method, each method in a fresh process, and the wall time and peak
+RSS growth are reported.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from resolution import ResolutionFinder, strided_candidate  # noqa: E402
+
+MODEL_SIZE = 256
+METHODS_TAPS = {"view": 0, "taps": 8}
+DEFAULT_FILES = [
+    "tests/test_data/RGB24/picture_nr_1_640x427.raw",
+    "tests/test_data/rgba32/picture_nr_19_640x427_rgba32.raw",
+    "tests/test_data/uyvy/picture_nr_20_500x375_uyvy.raw",
+]
+
+
+def pil_candidate(raw: bytes, width: int) -> np.ndarray:
+    img = Image.frombytes("L", (width, len(raw) // width), raw)
+    img = img.resize((MODEL_SIZE, MODEL_SIZE))
+    img = np.expand_dims(np.asarray(img), axis=-1)
+    return img / 255 - 0.5
+
+
+def load_raw(path: str, size_mb: int) -> bytes:
+    with open(path, "rb") as f:
+        raw = f.read()
+    if size_mb:
+        raw = (raw * math.ceil(size_mb * 2**20 / len(raw)))[: size_mb * 2**20]
+    return raw
+
+
+def widths(raw: bytes) -> range:
+    max_width = int(math.sqrt(ResolutionFinder.DEFAULT_WH_RATIO * len(raw)))
+    return range(
+        ResolutionFinder.DEFAULT_MIN_WIDTH, max_width, ResolutionFinder.DEFAULT_STEP
+    )
+
+
+def run(method: str, path: str, size_mb: int, queue: multiprocessing.Queue):
+    raw = load_raw(path, size_mb)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if method == "pil":
+        for width in widths(raw):
+            pil_candidate(raw, width)
+    else:
+        raw_array = np.frombuffer(raw, dtype=np.uint8)
+        taps = METHODS_TAPS[method]
+        for width in widths(raw):
+            strided_candidate(raw_array, width, MODEL_SIZE, MODEL_SIZE, taps)
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (after - before) / 1024))
+
+
+def measure(method: str, path: str, size_mb: int):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=run, args=(method, path, size_mb, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    parser.add_argument(
+        "--size-mb", type=int, default=0, help="Tile each file up to this size"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'file':<45} {'MB':>6} {'cands':>6} {'pil s':>8} {'view s':>8} {'taps s':>8} "
+        f"{'pil MB':>8} {'view MB':>8} {'taps MB':>8}"
+    )
+    for path in args.files:
+        raw = load_raw(path, args.size_mb)
+        times, memory = zip(*[measure(method, path, args.size_mb) for method in ["pil", *METHODS_TAPS]])
+        print(
+            f"{os.path.basename(path):<45} {len(raw) / 2**20:>6.1f} {len(widths(raw)):>6} "
+            + " ".join(f"{t:>8.3f}" for t in times)
+            + " "
+            + " ".join(f"{m:>8.1f}" for m in memory)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Compare recognition of big files from windows of them with recognition from whole files:
+accuracy, agreement with full reads, time per file and bytes read.
+
+Usage:
+    python benchmarks/sampling.py [--sizes 4000x3000 8000x6000] [--windows 1 3] [--window-mb 1 4] [--backend keras]
+
+Big RGB24 files are made by upscaling images from tests/test_data, so their resolution is known.
+Page cache of every file is dropped before it is recognized, so reads come from disk.
+Every mode runs in a fresh process. Has to be run from the repository root, with models in image-recognizer-models.
+"""
+import argparse
+import contextlib
+import glob
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from image_recognizer import ImageRecognizer  # noqa: E402
+
+SOURCES = sorted(glob.glob("tests/test_data/RGB24/*.raw"))[:4]
+
+
+def make_big_file(source, size, directory):
+    """Write RGB24 file of given size made by upscaling raw image from tests/test_data"""
+    width, height = map(int, os.path.basename(source).rsplit("_", 1)[1].split(".")[0].split("x"))
+    img = np.fromfile(source, dtype=np.uint8)[: width * height * 3].reshape(height, width, 3)
+    out_width, out_height = map(int, size.split("x"))
+    path = os.path.join(directory, f"{os.path.basename(source)[:-4]}_{size}.raw")
+    cv2.resize(img, (out_width, out_height), interpolation=cv2.INTER_LINEAR).tofile(path)
+    return path, out_width * 3, out_height
+
+
+def drop_page_cache(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def run_mode(files, backend, windows, window_mb):
+    sampling = None
+    if windows:
+        sampling = ImageRecognizer.SamplingPolicy(window_size=int(window_mb * 2**20), windows=windows)
+    image_recognizer = ImageRecognizer(backend=backend, sampling=sampling)
+    results = []
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for path in files:
+            drop_page_cache(path)
+            start = time.perf_counter()
+            result = image_recognizer.recognize(path)
+            results.append(
+                (result.color_format, result.img_width, result.img_height, result.bytes_read,
+                 time.perf_counter() - start)
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["4000x3000", "8000x6000"])
+    parser.add_argument("--windows", nargs="+", type=int, default=[1, 3])
+    parser.add_argument("--window-mb", nargs="+", type=float, default=[1, 4])
+    parser.add_argument("--backend", default="keras")
+    args = parser.parse_args()
+
+    modes = [(0, 0)] + [(windows, mb) for windows in args.windows for mb in args.window_mb]
+    context = get_context("spawn")
+    with tempfile.TemporaryDirectory(dir=".") as tmp_dir:
+        files, expected = [], []
+        for size in args.sizes:
+            for source in SOURCES:
+                path, row_size, height = make_big_file(source, size, tmp_dir)
+                files.append(path)
+                expected.append(("RGB24", row_size, height))
+        total = sum(os.path.getsize(path) for path in files)
+        print(f"{len(files)} files, {total / 2**20:.0f} MB")
+        print(f"{'mode':16} {'s/file':>7} {'MB read':>8} {'format':>7} {'width':>6} {'height':>7} {'agree':>6}")
+
+        reference = None
+        for windows, mb in modes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results = executor.submit(run_mode, files, args.backend, windows, mb).result()
+            if reference is None:
+                reference = results
+            n = len(results)
+            print(
+                f"{'full' if not windows else f'{windows} x {mb:g} MB':16} "
+                f"{sum(r[4] for r in results) / n:7.2f} "
+                f"{sum(r[3] for r in results) / n / 2**20:8.1f} "
+                f"{sum(r[0] == e[0] for r, e in zip(results, expected)) / n:7.0%} "
+                f"{sum(r[1] == e[1] for r, e in zip(results, expected)) / n:6.0%} "
+                f"{sum(r[2] == e[2] for r, e in zip(results, expected)) / n:7.0%} "
+                f"{sum(r[:3] == f[:3] for r, f in zip(results, reference)) / n:6.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Measure every recognition stage separately, over a matrix of image sizes and color formats.
+
+Usage:
+    python benchmarks/stages.py [--sizes 640x480 1920x1080 ...] [--formats RGB24 UYVY ...]
+        [--repeats N] [--backend keras] [--no-models] [--output stages.json]
+
+Parser stages (file read, resolution candidates, parse, get_displayable, resize...) are measured
+for every size and format, model stages once, as model inputs have fixed size. Every cell runs
+in a fresh process. Wall and CPU time are the best of repeats, peak memory is measured in the first
+repeat: tracemalloc peak of Python allocations and growth of peak RSS of the process.
+Results are written as JSON, to be compared between commits with benchmarks/compare.py.
+Model stages need models in image-recognizer-models, run from the repository root.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from color_format import COLOR_FORMATS_RATIOS  # noqa: E402
+from image_recognizer import ImageRecognizer  # noqa: E402
+
+DEFAULT_SIZES = ["640x480", "1920x1080", "4000x3000"]
+SOURCE_IMAGE = "tests/test_data/RGB24/picture_nr_1_640x427.raw"
+MODEL_SIZE = 256
+CANDIDATES_N = 64
+
+
+def measure(function, repeats):
+    """Run function repeats times, return best wall and CPU time and peak memory of the first run"""
+    if repeats < 1:
+        raise ValueError(f"repeats has to be at least 1, not {repeats}")
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    wall, cpu = float("inf"), float("inf")
+    for i in range(repeats):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        function()
+        wall = min(wall, time.perf_counter() - wall_start)
+        cpu = min(cpu, time.process_time() - cpu_start)
+        if i == 0:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    return {
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "peak_tracemalloc_mb": peak / 2**20,
+        "peak_rss_growth_mb": rss_growth / 1024,
+    }
+
+
+def make_raw(size, color_format, directory):
+    """Write raw file of given size in pixels of color format, filled with bytes of a real image"""
+    width, height = map(int, size.split("x"))
+    with open(SOURCE_IMAGE, "rb") as file:
+        source = np.frombuffer(file.read(), dtype=np.uint8)
+    row = int(width * COLOR_FORMATS_RATIOS[color_format])
+    path = os.path.join(directory, f"{color_format}_{size}.raw")
+    np.resize(source, row * height).tofile(path)
+    return path, width, row
+
+
+def parser_stages(path, size, color_format, width, row, repeats):
+    import cv2
+
+    from raw_image_data_previewer.app.core import determine_color_format
+    from raw_image_data_previewer.app.image.image import RawDataContainer
+    from raw_image_data_previewer.app.parser.factory import ParserFactory
+    from resolution import ResolutionFinder, strided_candidate
+
+    fmt = determine_color_format(color_format)
+    parser = ParserFactory.create_object(fmt)
+    raw_data = RawDataContainer.from_file(path)
+    raw = np.frombuffer(raw_data.data_buffer, dtype=np.uint8)
+    max_width = int(np.sqrt(ResolutionFinder.DEFAULT_WH_RATIO * raw.size))
+    widths = np.linspace(ResolutionFinder.DEFAULT_MIN_WIDTH, max_width, CANDIDATES_N, dtype=int)
+    image = parser.parse(raw_data.data_buffer, fmt, width)
+    displayable = parser.get_displayable(image)
+
+    stages = {
+        "file_read": lambda: RawDataContainer.from_file(path),
+        "resolution_candidates": lambda: [
+            strided_candidate(raw, w, MODEL_SIZE, MODEL_SIZE) for w in [row, *widths]
+        ],
+        "parse": lambda: parser.parse(raw_data.data_buffer, fmt, width),
+        "parse_decimated": lambda: parser.parse_decimated(
+            raw_data.data_buffer, fmt, width, (MODEL_SIZE, MODEL_SIZE)
+        ),
+        "get_displayable": lambda: parser.get_displayable(image),
+        "get_luma": lambda: parser.get_luma(image),
+        "resize": lambda: cv2.resize(displayable, (MODEL_SIZE, MODEL_SIZE), interpolation=cv2.INTER_AREA),
+    }
+    return [
+        {"stage": stage, "size": size, "format": color_format, "bytes": raw.size, **measure(function, repeats)}
+        for stage, function in stages.items()
+    ]
+
+
+def model_stages(backend, repeats):
+    from backend import backend_model_path, load_backend
+    from color_format import color_format_image
+    from raw_image_data_previewer.app.image.image import RawDataContainer
+    from resolution import strided_candidate
+
+    raw_data = RawDataContainer.from_file(SOURCE_IMAGE)
+    raw = np.frombuffer(raw_data.data_buffer, dtype=np.uint8)
+    resolution_batch = np.stack(
+        [strided_candidate(raw, w, MODEL_SIZE, MODEL_SIZE) for w in range(1000, 1000 + CANDIDATES_N)]
+    )
+    color_format_batch = np.stack(
+        [
+            color_format_image(raw_data, color_format, int(640 * 3 / ratio), MODEL_SIZE, MODEL_SIZE)
+            for color_format, ratio in COLOR_FORMATS_RATIOS.items()
+        ]
+    ).astype(np.float32)
+    results = []
+    for stage, model_path, batch in [
+        ("resolution_inference", ImageRecognizer.DEFAULT_RESOLUTION_MODEL_PATH, resolution_batch),
+        ("color_format_inference", ImageRecognizer.DEFAULT_COLOR_FORMAT_MODEL_PATH, color_format_batch),
+    ]:
+        model = load_backend(backend_model_path(model_path, backend), backend)
+        model(batch)
+        timing = measure(lambda model=model, batch=batch: model(batch), repeats)
+        results.append({"stage": stage, "backend": backend, "batch": len(batch), **timing})
+    return results
+
+
+def metadata(backend):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "backend": backend,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--formats", nargs="+", default=list(COLOR_FORMATS_RATIOS), choices=list(COLOR_FORMATS_RATIOS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--backend", default="keras")
+    parser.add_argument("--no-models", action="store_true", help="Skip model stages")
+    parser.add_argument("--output", default="stages.json")
+    args = parser.parse_args()
+
+    results = []
+    # A fresh process for every cell, so peak memory of one cell does not hide the next ones
+    context = get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            for color_format in args.formats:
+                path, width, row = make_raw(size, color_format, tmp_dir)
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    cell = executor.submit(
+                        parser_stages, path, size, color_format, width, row, args.repeats
+                    ).result()
+                os.remove(path)
+                for result in cell:
+                    print(
+                        f"{result['stage']:22} {size:>10} {color_format:8} "
+                        f"{result['wall_s'] * 1000:9.2f} ms {result['peak_tracemalloc_mb']:8.1f} MB"
+                    )
+                results += cell
+    if not args.no_models:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            cell = executor.submit(model_stages, args.backend, args.repeats).result()
+        for result in cell:
+            print(f"{result['stage']:22} {'batch ' + str(result['batch']):>10} {args.backend:8} "
+                  f"{result['wall_s'] * 1000:9.2f} ms {result['peak_rss_growth_mb']:8.1f} MB RSS")
+        results += cell
+
+    with open(args.output, "w") as file:
+        json.dump({"metadata": metadata(args.backend), "results": results}, file, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from app.backend import BackendNotAvailable, backend_model_path, convert_model, load_backend
+from app.resolution import ResolutionFinder
+
+
+class TestBackends(unittest.TestCase):
+    MODEL_SIZE = 32
+    TOLERANCE = 1e-4
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        import keras
+
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.model_path = os.path.join(cls.tmp_dir.name, "model.h5")
+        keras.utils.set_random_seed(0)
+        model = keras.Sequential(
+            [
+                keras.Input((cls.MODEL_SIZE, cls.MODEL_SIZE, 1)),
+                keras.layers.Conv2D(4, 3, activation="relu"),
+                keras.layers.MaxPooling2D(),
+                keras.layers.Flatten(),
+                keras.layers.Dense(1, activation="sigmoid"),
+            ]
+        )
+        model.save(cls.model_path)
+        cls.batch = np.random.default_rng(0).random((5, cls.MODEL_SIZE, cls.MODEL_SIZE, 1), dtype=np.float32) - 0.5
+        cls.expected = load_backend(cls.model_path, "keras")(cls.batch)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def check_parity(self, backend: str):
+        model = load_backend(convert_model(self.model_path, backend), backend)
+        np.testing.assert_allclose(model(self.batch), self.expected, atol=self.TOLERANCE)
+        # Batch size changes between calls
+        np.testing.assert_allclose(model(self.batch[:2]), self.expected[:2], atol=self.TOLERANCE)
+        np.testing.assert_allclose(model(self.batch), self.expected, atol=self.TOLERANCE)
+
+    def test_tflite_parity(self):
+        self.check_parity("tflite")
+
+    @unittest.skipIf(
+        importlib.util.find_spec("onnxruntime") is None or importlib.util.find_spec("tf2onnx") is None,
+        "onnxruntime or tf2onnx is not installed",
+    )
+    def test_onnx_parity(self):
+        self.check_parity("onnx")
+
+    def test_finder_with_backend(self):
+        convert_model(self.model_path, "tflite")
+        raw = np.random.default_rng(1).integers(0, 256, 300 * 300, dtype=np.uint8).tobytes()
+        widths = range(256, 300, 8)
+        keras_finder = ResolutionFinder(self.model_path, self.MODEL_SIZE, self.MODEL_SIZE)
+        tflite_finder = ResolutionFinder(
+            backend_model_path(self.model_path, "tflite"), self.MODEL_SIZE, self.MODEL_SIZE, backend="tflite"
+        )
+        np.testing.assert_allclose(
+            tflite_finder.predict_widths(raw, widths),
+            keras_finder.predict_widths(raw, widths),
+            atol=self.TOLERANCE,
+        )
+
+    def test_invalid_model(self):
+        with self.assertRaises(ResolutionFinder.InvalidModel):
+            ResolutionFinder(os.path.join(self.tmp_dir.name, "missing.tflite"), 32, 32, backend="tflite")
+        with self.assertRaises(ValueError):
+            load_backend(self.model_path, "unknown")
+
+    def test_model_paths(self):
+        self.assertEqual(backend_model_path("models/model.h5", "keras"), "models/model.h5")
+        self.assertEqual(backend_model_path("models/model.h5", "tflite"), "models/model.tflite")
+        self.assertEqual(backend_model_path("models/model.h5", "onnx"), "models/model.onnx")
+
+    @unittest.skipIf(importlib.util.find_spec("onnxruntime") is not None, "onnxruntime is installed")
+    def test_onnx_not_available(self):
+        with self.assertRaises(BackendNotAvailable):
+            load_backend(backend_model_path(self.model_path, "onnx"), "onnx")
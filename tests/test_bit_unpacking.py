@@ -0,0 +1,46 @@
+import math
+import unittest
+import numpy as np
+from parameterized import parameterized
+from app.raw_image_data_previewer.app.image.color_format import (
+    AVAILABLE_FORMATS,
+    Endianness,
+)
+from app.raw_image_data_previewer.app.parser.common import unpack_components
+
+FORMATS = ["ABGR444", "ABGR555", "RGB565", "RGB332", "GRAY10", "GRAY12", "RG10", "RG12"]
+
+
+class TestBitUnpacking(unittest.TestCase):
+    def pack(self, pixels: np.ndarray, comp_bits: tuple, endianness: Endianness) -> bytes:
+        pixel_bits = sum(comp_bits)
+        step = math.lcm(pixel_bits, 8) // 8
+        pixels_per_group = step * 8 // pixel_bits
+        raw = b""
+        for group in range(len(pixels) // pixels_per_group):
+            number = 0
+            for pixel in pixels[group * pixels_per_group : (group + 1) * pixels_per_group][::-1]:
+                for value, bits in zip(pixel, comp_bits):
+                    number = (number << bits) | int(value)
+            raw += number.to_bytes(
+                step, "little" if endianness == Endianness.LITTLE_ENDIAN else "big"
+            )
+        return raw
+
+    @parameterized.expand(
+        [[name, endianness] for name in FORMATS for endianness in Endianness]
+    )
+    def test_unpack(self, name: str, endianness: Endianness):
+        comp_bits = AVAILABLE_FORMATS[name].bits_per_components
+        rng = np.random.default_rng(0)
+        pixels = np.stack(
+            [rng.integers(0, 2**bits, 240) for bits in comp_bits], axis=-1
+        )
+        result = unpack_components(self.pack(pixels, comp_bits, endianness), comp_bits, endianness)
+        self.assertEqual(result.dtype, np.uint8 if max(comp_bits) <= 8 else np.uint16)
+        np.testing.assert_array_equal(result, pixels)
+
+    def test_incomplete_group(self):
+        comp_bits = AVAILABLE_FORMATS["GRAY12"].bits_per_components
+        result = unpack_components(b"\xab\xcd\xef\x12", comp_bits, Endianness.BIG_ENDIAN)
+        np.testing.assert_array_equal(result[:, 0], [0xDEF, 0xABC])
@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+from app.color_format import COLOR_FORMATS_RATIOS
+from app.image_recognizer import ImageRecognizer
+
+
+class CountingModel:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append(len(batch))
+        return np.mean(batch, axis=(1, 2))
+
+    predict_on_batch = __call__
+
+
+class TestColorFormatGrid(unittest.TestCase):
+    IMG_PATH = "tests/test_data/RGB24/picture_nr_20_500x375.raw"
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.model = CountingModel()
+        with mock.patch("image_recognizer.exists", return_value=True), mock.patch(
+            "keras.models.load_model", return_value=self.model
+        ):
+            self.image_recognizer = ImageRecognizer()
+        self.color_format_finder = self.image_recognizer.color_format_finder
+
+    def test_duplicates_are_evaluated_once(self):
+        # 1500 and 1501 differ in widths of formats with ratio 1 only
+        with open(self.IMG_PATH, "rb") as file:
+            raw_data = file.read()
+        requests = [(raw_data, 1500), (raw_data, 1501)]
+        separate = [self.color_format_finder.find_color_format(raw_data, width) for _, width in requests]
+        self.model.batches.clear()
+        grid = self.color_format_finder.find_color_formats(requests)
+
+        self.assertEqual(grid, separate)
+        unique_widths = {
+            (color_format, int(width / ratio))
+            for _, width in requests
+            for color_format, ratio in COLOR_FORMATS_RATIOS.items()
+        }
+        self.assertLess(len(unique_widths), 2 * len(COLOR_FORMATS_RATIOS))
+        self.assertEqual(self.color_format_finder.evaluations, len(unique_widths))
+        self.assertEqual(self.model.batches, [len(unique_widths)])
+
+    def test_equal_paths_are_opened_once(self):
+        import color_format
+
+        requests = [("".join(self.IMG_PATH), 1500), ("".join(self.IMG_PATH), 1501)]
+        self.assertIsNot(requests[0][0], requests[1][0])
+        with mock.patch.object(color_format, "open_raw_data", wraps=color_format.open_raw_data) as opened:
+            grid = self.color_format_finder.find_color_formats(requests)
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(grid[0], self.color_format_finder.find_color_format(self.IMG_PATH, 1500))
+
+    def test_recognize_calls_color_format_model_once(self):
+        self.color_format_finder.model = CountingModel()
+        result = self.image_recognizer.recognize(self.IMG_PATH)
+
+        batches = self.color_format_finder.model.batches
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0], self.color_format_finder.evaluations)
+        self.assertLessEqual(batches[0], ImageRecognizer.RESOLUTION_RESULTS_N * len(COLOR_FORMATS_RATIOS))
+        self.assertEqual(result.hypotheses_evaluated, ImageRecognizer.RESOLUTION_RESULTS_N * len(COLOR_FORMATS_RATIOS))
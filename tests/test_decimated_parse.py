@@ -0,0 +1,62 @@
+import unittest
+
+import cv2
+import numpy as np
+from parameterized import parameterized
+
+from app.raw_image_data_previewer.app.core import get_displayable, load_image
+from app.raw_image_data_previewer.app.image.color_format import AVAILABLE_FORMATS, PixelPlane
+
+TARGET_SIZE = (256, 256)
+
+
+def model_input(image):
+    img = cv2.cvtColor(get_displayable(image), cv2.COLOR_BGR2GRAY)
+    return cv2.resize(img, TARGET_SIZE, interpolation=cv2.INTER_AREA).astype(float)
+
+
+def mean_difference(raw_data, color_format, width):
+    full = model_input(load_image(raw_data, color_format, width))
+    decimated = model_input(load_image(raw_data, color_format, width, TARGET_SIZE))
+    return np.abs(full - decimated).mean() / 255
+
+
+class TestDecimatedParse(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        img = np.fromfile("tests/test_data/RGB24/picture_nr_20_500x375.raw", dtype=np.uint8)
+        cls.img = cv2.resize(img.reshape(375, 500, 3), (2000, 1500), interpolation=cv2.INTER_CUBIC)
+
+    def test_own_format(self):
+        self.assertLess(mean_difference(self.img.tobytes(), "RGB24", 2000), 0.02)
+        gray = cv2.cvtColor(self.img, cv2.COLOR_RGB2GRAY)
+        self.assertLess(mean_difference(gray.tobytes(), "GRAY", 2000), 0.02)
+
+    @parameterized.expand(AVAILABLE_FORMATS.keys())
+    def test_wrong_format(self, color_format):
+        color_format_obj = AVAILABLE_FORMATS[color_format]
+        width = 2000
+        if color_format_obj.pixel_plane == PixelPlane.PACKED:
+            width = 2000 * 3 // max(1, sum(color_format_obj.bits_per_components) // 8) // 2 * 2
+        self.assertLess(mean_difference(self.img.tobytes(), color_format, width), 0.05)
+
+    def test_decimated_size(self):
+        image = load_image(self.img.tobytes(), "RGB24", 2000, TARGET_SIZE)
+        self.assertEqual((image.width, image.height), (1024, 768))
+        self.assertEqual(image.color_format.name, "RGB24")
+
+    def test_small_image_is_not_decimated(self):
+        raw_data = self.img[:375, :500].tobytes()
+        full = load_image(raw_data, "UYVY", 750)
+        decimated = load_image(raw_data, "UYVY", 750, TARGET_SIZE)
+        np.testing.assert_array_equal(full.processed_data, decimated.processed_data)
+
+    def test_color_format_image_parses_whole_image_by_default(self):
+        from app.color_format import color_format_image
+        from raw_image_data_previewer.app.image.image import RawDataContainer
+
+        raw_data = RawDataContainer(self.img.tobytes())
+        expected = model_input(load_image(raw_data.data_buffer, "RGB24", 2000)) / 255 - 0.5
+        np.testing.assert_array_equal(color_format_image(raw_data, "RGB24", 2000, *TARGET_SIZE)[:, :, 0], expected)
+        decimated = color_format_image(raw_data, "RGB24", 2000, *TARGET_SIZE, decimated=True)
+        self.assertFalse(np.array_equal(decimated[:, :, 0], expected))
@@ -0,0 +1,90 @@
+import tracemalloc
+import unittest
+import warnings
+
+import cv2
+import numpy as np
+from parameterized import parameterized
+
+from app.raw_image_data_previewer.app.core import get_displayable, load_image
+from app.raw_image_data_previewer.app.image.color_format import AVAILABLE_FORMATS, PixelFormat
+from app.raw_image_data_previewer.app.parser.common import scaling_lut
+
+LUT_FORMATS = [
+    name
+    for name, color_format in AVAILABLE_FORMATS.items()
+    if color_format.pixel_format
+    in (
+        PixelFormat.RGBA,
+        PixelFormat.BGRA,
+        PixelFormat.ARGB,
+        PixelFormat.ABGR,
+        PixelFormat.BAYER_RG,
+        PixelFormat.MONO,
+    )
+]
+
+
+def float_displayable(image):
+    """get_displayable as it was computed in float64, before lookup tables"""
+    color_format = image.color_format
+    bpcs = color_format.bits_per_components
+    if color_format.pixel_format == PixelFormat.MONO:
+        data = np.reshape(image.processed_data, (image.height, image.width)).astype("float")
+        data[:] = 255 * (data[:] / (2 ** bpcs[0] - 1))
+        return cv2.cvtColor(data.astype("uint8"), cv2.COLOR_GRAY2RGB)
+    if color_format.pixel_format == PixelFormat.BAYER_RG:
+        data = np.reshape(image.processed_data, (image.height, image.width)).astype("float")
+        data[:, :] = (255 * data[:, :]) / (2 ** bpcs[0] - 1)
+        return cv2.cvtColor(data.astype("uint8"), cv2.COLOR_BAYER_BG2RGB)
+    data = np.reshape(image.processed_data.astype("float64"), (image.height, image.width, 4))
+    channels = 4
+    if color_format.pixel_format in (PixelFormat.RGBA, PixelFormat.BGRA) and bpcs[3] == 0:
+        data[:, :, 3] = 255
+        channels = 3
+    for i in range(channels):
+        data[:, :, i] = (255 * data[:, :, i]) / (2 ** bpcs[i] - 1)
+    order = {
+        PixelFormat.RGBA: [0, 1, 2, 3],
+        PixelFormat.BGRA: [2, 1, 0, 3],
+        PixelFormat.ARGB: [1, 2, 3, 0],
+        PixelFormat.ABGR: [3, 2, 1, 0],
+    }[color_format.pixel_format]
+    return data[:, :, order].astype("uint8")
+
+
+class TestDisplayableLut(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        # Random 16 bit components exceed max values of 10 and 12 bit formats
+        self.raw_data = np.random.default_rng(0).integers(0, 256, 97 * 1000 + 3, dtype=np.uint8).tobytes()
+
+    @parameterized.expand(LUT_FORMATS)
+    def test_bit_exact_with_float(self, color_format):
+        for width in [250, 334]:
+            image = load_image(self.raw_data, color_format, width)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                expected = float_displayable(image)
+            displayable = get_displayable(image)
+            self.assertEqual(displayable.dtype, np.uint8)
+            np.testing.assert_array_equal(displayable, expected)
+
+    def test_lut(self):
+        lut = scaling_lut(10, 2**16)
+        self.assertIs(lut, scaling_lut(10, 2**16))
+        self.assertFalse(lut.flags.writeable)
+        self.assertEqual((lut[0], lut[511], lut[1023]), (0, 127, 255))
+        np.testing.assert_array_equal(scaling_lut(8, 256), np.arange(256))
+
+    @parameterized.expand(["RGB24", "RGBA32", "ARGB444", "GRAY10"])
+    def test_no_float_copies(self, color_format):
+        raw_data = np.random.default_rng(0).integers(0, 256, 1000 * 1000 * 3, dtype=np.uint8).tobytes()
+        image = load_image(raw_data, color_format, 1000)
+        get_displayable(image)
+        tracemalloc.start()
+        displayable = get_displayable(image)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        # Float64 copy of components alone took 8 bytes per component
+        self.assertLess(peak, 2.5 * displayable.nbytes)
@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+from app.image_recognizer import ImageRecognizer
+
+
+class FakeResolutionModel:
+    def __call__(self, batch):
+        return np.full((len(batch), 1), 0.5)
+
+    predict_on_batch = __call__
+
+
+class FakeColorFormatModel:
+    """The first color format of every resolution gets high confidence"""
+
+    def __call__(self, batch):
+        confidences = np.full((len(batch), 1), 0.1)
+        confidences[::8] = 0.95
+        return confidences
+
+    predict_on_batch = __call__
+
+
+class TestEarlyExit(unittest.TestCase):
+    IMG_PATH = "tests/test_data/RGB24/picture_nr_20_500x375.raw"
+
+    def make_recognizer(self, early_exit=None) -> ImageRecognizer:
+        def load_model(path):
+            if path == ImageRecognizer.DEFAULT_RESOLUTION_MODEL_PATH:
+                return FakeResolutionModel()
+            return FakeColorFormatModel()
+
+        # Both finders use the same keras models module
+        with mock.patch("image_recognizer.exists", return_value=True), mock.patch(
+            "keras.models.load_model", side_effect=load_model
+        ):
+            return ImageRecognizer(early_exit=early_exit)
+
+    def test_all_hypotheses_without_policy(self):
+        result = self.make_recognizer().recognize(self.IMG_PATH)
+        self.assertEqual(result.hypotheses_evaluated, 5 * 8)
+
+    def test_policy_fires(self):
+        full = self.make_recognizer().recognize(self.IMG_PATH)
+        result = self.make_recognizer(ImageRecognizer.EarlyExitPolicy(0.9, 0.5, 0.5)).recognize(self.IMG_PATH)
+        self.assertEqual(result.hypotheses_evaluated, 8)
+        self.assertEqual(
+            (result.color_format, result.img_width), (full.color_format, full.img_width)
+        )
+
+    def test_policy_does_not_fire(self):
+        for policy in [
+            ImageRecognizer.EarlyExitPolicy(color_format_confidence=0.99),
+            ImageRecognizer.EarlyExitPolicy(resolution_confidence=0.6),
+            # The best hypothesis of the second resolution ties with the first one
+            ImageRecognizer.EarlyExitPolicy(margin=0.9),
+        ]:
+            result = self.make_recognizer(policy).recognize(self.IMG_PATH)
+            self.assertEqual(result.hypotheses_evaluated, 5 * 8, policy)
+
+    def test_recognize_many(self):
+        paths = [self.IMG_PATH] * 3
+        image_recognizer = self.make_recognizer(ImageRecognizer.EarlyExitPolicy())
+        results = image_recognizer.recognize_many(paths)
+        self.assertEqual([result.hypotheses_evaluated for result in results], [8] * 3)
+        self.assertEqual(results[0], image_recognizer.recognize(self.IMG_PATH))
@@ -0,0 +1,104 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+from parameterized import parameterized
+
+from app.raw_image_data_previewer.app.core import get_displayable, get_luma, load_image
+from app.raw_image_data_previewer.app.image.color_format import (
+    AVAILABLE_FORMATS,
+    ColorFormat,
+    Endianness,
+    PixelFormat,
+    PixelPlane,
+)
+from app.raw_image_data_previewer.app.parser.common import (
+    LAYOUT_ALPHA,
+    LAYOUT_UNPACKED,
+    LAYOUT_VIEW,
+    AbstractParser,
+    DecodePlan,
+)
+from app.raw_image_data_previewer.app.parser.factory import FORMAT_REGISTRY, FormatRegistry, ParserFactory
+from app.raw_image_data_previewer.app.parser.rgb import ParserRGBA
+
+
+class ParserInverted(AbstractParser):
+    """Plugin parser of gray formats with inverted values"""
+
+    def compile(self, color_format):
+        return DecodePlan(color_format, self, np.uint8, 1)
+
+    def get_displayable(self, image):
+        gray = 255 - np.reshape(image.processed_data, (image.height, image.width))
+        return np.repeat(gray[:, :, None], 3, axis=2)
+
+
+class TestFormatRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.raw_data = np.random.default_rng(0).integers(0, 256, 240 * 120 * 4 + 5, dtype=np.uint8).tobytes()
+
+    @parameterized.expand(AVAILABLE_FORMATS.keys())
+    def test_plan(self, color_format):
+        color_format_obj = AVAILABLE_FORMATS[color_format]
+        plan = FORMAT_REGISTRY.plan(color_format)
+        self.assertIs(plan, FORMAT_REGISTRY.plan(color_format_obj))
+        self.assertIs(plan.color_format, color_format_obj)
+        self.assertIs(plan.parser, ParserFactory.create_object(color_format_obj))
+        self.assertEqual(load_image(self.raw_data, color_format, 240).processed_data.dtype, plan.dtype)
+
+    def test_layouts(self):
+        layouts = {name: FORMAT_REGISTRY.plan(name).layout for name in ["RGB24", "RGBA32", "RGB565", "UYVY", "GRAY10"]}
+        self.assertEqual(
+            layouts,
+            {
+                "RGB24": LAYOUT_ALPHA,
+                "RGBA32": LAYOUT_VIEW,
+                "RGB565": LAYOUT_UNPACKED,
+                "UYVY": LAYOUT_VIEW,
+                "GRAY10": LAYOUT_VIEW,
+            },
+        )
+        self.assertEqual(FORMAT_REGISTRY.plan("ARGB444").alpha, (0, 15))
+        # Components from the least significant bits: unused fourth one, blue, green
+        fields = FORMAT_REGISTRY.plan("RGB565").unpacking.fields
+        self.assertEqual(
+            [(component, int(shift), int(mask)) for _, component, _, shift, mask in fields][:3],
+            [(3, 0, 0), (2, 0, 31), (1, 5, 63)],
+        )
+
+    def test_compiled_once(self):
+        registry = FormatRegistry(dict(AVAILABLE_FORMATS))
+        with mock.patch.object(ParserRGBA, "compile", autospec=True, side_effect=ParserRGBA.compile) as compile:
+            parser = registry.parser("RGB24")
+            for width in [240, 200, 240]:
+                parser.parse(self.raw_data, AVAILABLE_FORMATS["RGB24"], width)
+            registry.parser("BGR24").parse(self.raw_data, AVAILABLE_FORMATS["BGR24"], 240)
+        self.assertIs(registry.parser("BGR24"), parser)
+        self.assertEqual([call.args[1].name for call in compile.call_args_list], ["RGB24", "BGR24"])
+
+    def test_register_plugin(self):
+        inverted = ColorFormat(PixelFormat.CUSTOM, Endianness.BIG_ENDIAN, PixelPlane.PACKED, 8, 0, 0, name="INV8")
+        FORMAT_REGISTRY.register(inverted, ParserInverted)
+        try:
+            self.assertIs(AVAILABLE_FORMATS["INV8"], inverted)
+            image = load_image(self.raw_data, "INV8", 240)
+            displayable = get_displayable(image)
+            np.testing.assert_array_equal(displayable[:, :, 0], 255 - get_luma(load_image(self.raw_data, "GRAY", 240)))
+            with self.assertRaises(ValueError):
+                FORMAT_REGISTRY.register(inverted, ParserInverted)
+        finally:
+            FORMAT_REGISTRY.unregister("INV8")
+        self.assertNotIn("INV8", AVAILABLE_FORMATS)
+
+    def test_register_default_parser(self):
+        registry = FormatRegistry(dict(AVAILABLE_FORMATS))
+        rgb48 = ColorFormat(PixelFormat.RGBA, Endianness.BIG_ENDIAN, PixelPlane.PACKED, 16, 16, 16, name="RGB48")
+        self.assertIsInstance(registry.register(rgb48), ParserRGBA)
+        self.assertEqual((registry.plan("RGB48").layout, registry.plan("RGB48").dtype), (LAYOUT_ALPHA, np.uint16))
+        custom = ColorFormat(PixelFormat.CUSTOM, Endianness.BIG_ENDIAN, PixelPlane.PACKED, 8, 8, 8, name="CUSTOM")
+        with self.assertRaises(NotImplementedError):
+            registry.register(custom)
+        with self.assertRaises(NotImplementedError):
+            registry.plan("CUSTOM")
@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from app.image_recognizer import ImageRecognizer
+from app.instrumentation import Instrumentation, PrometheusMetrics
+
+
+class CountingModel:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, batch):
+        self.batch_sizes.append(len(batch))
+        return np.mean(batch, axis=(1, 2))
+
+    predict_on_batch = __call__
+
+
+class TestInstrumentation(unittest.TestCase):
+    IMG_PATH = "tests/test_data/RGB24/picture_nr_20_500x375.raw"
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.metrics = PrometheusMetrics()
+        self.instrumentation = Instrumentation(self.metrics, trace=True)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        super().tearDown()
+
+    def make_recognizer(self, **kwargs) -> ImageRecognizer:
+        self.models = {
+            ImageRecognizer.DEFAULT_RESOLUTION_MODEL_PATH: CountingModel(),
+            ImageRecognizer.DEFAULT_COLOR_FORMAT_MODEL_PATH: CountingModel(),
+        }
+        with mock.patch("image_recognizer.exists", return_value=True), mock.patch(
+            "keras.models.load_model", side_effect=lambda path: self.models[path]
+        ):
+            image_recognizer = ImageRecognizer(**kwargs)
+            if image_recognizer.resolution_finder is None:
+                image_recognizer._load_finders()
+        return image_recognizer
+
+    def test_timings(self):
+        result = self.make_recognizer(instrumentation=self.instrumentation).recognize(self.IMG_PATH)
+
+        for stage in [
+            "recognize",
+            "open",
+            "resolution_search",
+            "resolution_candidates",
+            "resolution_inference",
+            "color_format_search",
+            "parse",
+            "luma",
+            "resize",
+            "color_format_inference",
+        ]:
+            self.assertGreater(result.timings[stage], 0, stage)
+        self.assertGreaterEqual(
+            result.timings["recognize"], result.timings["resolution_search"] + result.timings["color_format_search"]
+        )
+        self.assertGreaterEqual(
+            result.timings["resolution_search"],
+            result.timings["resolution_candidates"] + result.timings["resolution_inference"],
+        )
+
+    def test_no_instrumentation(self):
+        self.assertEqual(self.make_recognizer().recognize(self.IMG_PATH).timings, {})
+
+    def test_metrics(self):
+        self.make_recognizer(instrumentation=self.instrumentation).recognize(self.IMG_PATH)
+
+        resolution_calls = self.models[ImageRecognizer.DEFAULT_RESOLUTION_MODEL_PATH].batch_sizes
+        color_format_calls = self.models[ImageRecognizer.DEFAULT_COLOR_FORMAT_MODEL_PATH].batch_sizes
+        self.assertEqual(self.metrics.counters["resolution_model_calls"], len(resolution_calls))
+        self.assertEqual(self.metrics.counters["color_format_model_calls"], len(color_format_calls))
+        batch_sizes = self.metrics.histograms["resolution_batch_size"].to_dict()
+        self.assertEqual(batch_sizes["count"], len(resolution_calls))
+        self.assertEqual(batch_sizes["sum"], sum(resolution_calls))
+
+        text = self.metrics.to_prometheus_text()
+        self.assertIn(f"image_recognizer_color_format_model_calls_total {len(color_format_calls)}\n", text)
+        self.assertIn("# TYPE image_recognizer_recognize_seconds histogram\n", text)
+        self.assertIn('image_recognizer_recognize_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn("image_recognizer_recognize_seconds_count 1\n", text)
+
+    def test_chrome_trace(self):
+        self.make_recognizer(instrumentation=self.instrumentation).recognize(self.IMG_PATH)
+        path = os.path.join(self.tmp_dir.name, "trace.json")
+        self.instrumentation.dump_trace(path)
+
+        with open(path) as file:
+            events = json.load(file)["traceEvents"]
+        names = {event["name"] for event in events}
+        self.assertIn("color_format_inference", names)
+        self.assertTrue(all(event["ph"] == "X" and event["dur"] >= 0 for event in events))
+        recognize = next(event for event in events if event["name"] == "recognize")
+        self.assertTrue(
+            all(recognize["ts"] <= event["ts"] <= recognize["ts"] + recognize["dur"] for event in events)
+        )
+
+    def test_cache_hit(self):
+        cache_path = os.path.join(self.tmp_dir.name, "cache.sqlite")
+        with mock.patch("image_recognizer.ResultCache.file_fingerprint", return_value="model"):
+            image_recognizer = self.make_recognizer(instrumentation=self.instrumentation, cache=cache_path)
+            found = image_recognizer.recognize(self.IMG_PATH)
+            cached = image_recognizer.recognize(self.IMG_PATH)
+
+        self.assertIn("resolution_search", found.timings)
+        self.assertIn("cache_lookup", cached.timings)
+        self.assertNotIn("resolution_search", cached.timings)
+        self.assertEqual(cached.color_format, found.color_format)
@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from parameterized import parameterized
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+HEAVY_MODULES = ["tensorflow", "keras", "onnxruntime", "PIL"]
+
+
+def imported_modules(code: str) -> dict:
+    """Run code in a fresh interpreter, return which heavy modules it imported and how long it took"""
+    probe = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{code}\n"
+        "seconds = time.perf_counter() - start\n"
+        f"print(json.dumps({{'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules], 'seconds': seconds}}))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=APP_DIR)
+    output = subprocess.run(
+        [sys.executable, "-c", probe], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+class TestLazyImports(unittest.TestCase):
+    # Generous, as the budget is meant to catch TensorFlow (several seconds), not small regressions
+    CLI_IMPORT_BUDGET = 1.5
+
+    def test_cli_entry_point(self):
+        # Runs everything __main__.py does before handing command line to fire
+        main_path = os.path.join(APP_DIR, "__main__.py")
+        found = imported_modules(f"import runpy; runpy.run_path({main_path!r}, run_name='cli')")
+        self.assertEqual(found["heavy"], [])
+        self.assertLess(found["seconds"], self.CLI_IMPORT_BUDGET)
+
+    @parameterized.expand(
+        [
+            "client",
+            "batch",
+            "server",
+            "result_cache",
+            "image_recognizer",
+            "resolution",
+            "color_format",
+            "backend",
+            "quantization",
+            "instrumentation",
+            "sampling",
+            "stream",
+            "prefilter",
+        ]
+    )
+    def test_module(self, module):
+        self.assertEqual(imported_modules(f"import {module}")["heavy"], [])
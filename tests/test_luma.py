@@ -0,0 +1,26 @@
+import unittest
+
+import cv2
+import numpy as np
+from parameterized import parameterized
+
+from app.raw_image_data_previewer.app.core import get_displayable, get_luma, load_image
+from app.raw_image_data_previewer.app.image.color_format import AVAILABLE_FORMATS
+
+
+class TestLuma(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.raw_data = np.random.default_rng(0).integers(0, 256, 97 * 1000, dtype=np.uint8).tobytes()
+
+    @parameterized.expand(list(AVAILABLE_FORMATS))
+    def test_same_as_gray_displayable(self, color_format):
+        image = load_image(self.raw_data, color_format, 250)
+        expected = cv2.cvtColor(get_displayable(image), cv2.COLOR_BGR2GRAY)
+        np.testing.assert_array_equal(get_luma(image), expected)
+
+    @parameterized.expand(list(AVAILABLE_FORMATS))
+    def test_odd_width(self, color_format):
+        image = load_image(self.raw_data, color_format, 251)
+        expected = cv2.cvtColor(get_displayable(image), cv2.COLOR_BGR2GRAY)
+        np.testing.assert_array_equal(get_luma(image), expected)
@@ -0,0 +1,78 @@
+import tracemalloc
+import unittest
+
+import numpy as np
+from parameterized import parameterized
+
+from app.raw_image_data_previewer.app.core import load_image
+from app.raw_image_data_previewer.app.parser.common import pad_items, padded_frombuffer
+
+WIDTH = 1000
+HEIGHT = 600
+
+
+def large_allocations(function, min_size):
+    """Calls function, returning its result, sizes of its large allocations still alive and its memory peak"""
+    tracemalloc.start()
+    try:
+        result = function()
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    alive = [trace.size for trace in snapshot.traces if trace.size >= min_size]
+    return result, alive, peak
+
+
+class TestParseCopies(unittest.TestCase):
+    def raw_data(self, size):
+        return np.random.default_rng(0).integers(0, 256, size, dtype=np.uint8).tobytes()
+
+    @parameterized.expand(
+        [
+            ("RGBA32", 4),
+            ("ABGR32", 4),
+            ("GRAY", 1),
+            ("GRAY10", 2),
+            ("RGGB", 1),
+            ("UYVY", 2),
+            ("I420", 1.5),
+        ]
+    )
+    def test_aligned_data_is_viewed(self, color_format, bytes_per_pixel):
+        raw_data = self.raw_data(int(WIDTH * HEIGHT * bytes_per_pixel))
+        image, alive, peak = large_allocations(lambda: load_image(raw_data, color_format, WIDTH), 2**16)
+        self.assertEqual(alive, [])
+        self.assertLess(peak, 2**16)
+        self.assertTrue(np.shares_memory(image.processed_data, np.frombuffer(raw_data, dtype=np.uint8)))
+
+    @parameterized.expand([("RGBA32", 4), ("GRAY10", 2), ("UYVY", 2), ("RG10", 2)])
+    def test_padded_data_is_copied_once(self, color_format, bytes_per_pixel):
+        raw_data = self.raw_data(WIDTH * HEIGHT * bytes_per_pixel - 3)
+        image, alive, peak = large_allocations(lambda: load_image(raw_data, color_format, WIDTH), 2**16)
+        self.assertEqual(alive, [image.processed_data.nbytes])
+        self.assertLess(peak, image.processed_data.nbytes + 2**16)
+        self.assertEqual(image.processed_data.nbytes, WIDTH * HEIGHT * bytes_per_pixel)
+
+    @parameterized.expand(["RGB24", "BGR24"])
+    def test_alpha_is_added_in_one_allocation(self, color_format):
+        raw_data = self.raw_data(WIDTH * HEIGHT * 3 - 1)
+        image, alive, peak = large_allocations(lambda: load_image(raw_data, color_format, WIDTH), 2**16)
+        # Padded components are freed, only the result with alpha is kept
+        self.assertEqual(sorted(alive), [image.processed_data.nbytes])
+        self.assertLess(peak, image.processed_data.nbytes * 7 / 4 + 2**16)
+        self.assertEqual(image.processed_data.dtype, np.uint8)
+
+    def test_padded_frombuffer(self):
+        data = padded_frombuffer(b"\x01\x02\x03", ">u2", 3)
+        np.testing.assert_array_equal(data, [0x0102, 0x0300, 0])
+        self.assertEqual(data.dtype, np.dtype(">u2"))
+        raw_data = b"\x01\x02\x03\x04"
+        self.assertTrue(np.shares_memory(padded_frombuffer(raw_data, np.uint16, 2), np.frombuffer(raw_data, np.uint8)))
+
+    def test_pad_items(self):
+        data = np.arange(5, dtype=np.uint16)
+        self.assertIs(pad_items(data, 5), data)
+        padded = pad_items(data, 4)
+        self.assertEqual(padded.dtype, np.uint16)
+        np.testing.assert_array_equal(padded, [0, 1, 2, 3, 4, 0, 0, 0])
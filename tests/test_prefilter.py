@@ -0,0 +1,151 @@
+import glob
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from parameterized import parameterized
+
+from app.color_format import COLOR_FORMATS_RATIOS
+from app.image_recognizer import ImageRecognizer
+from app.prefilter import FormatPrefilter
+from app.raw_image_data_previewer.app.image.color_format import AVAILABLE_FORMATS
+
+TEST_DATA_LABELS = {
+    "RGB24": "RGB24",
+    "abgr444": "ABGR444",
+    "abgr555": "ABGR555",
+    "gray": "GRAY",
+    "rgb332": "RGB332",
+    "rgb565": "RGB565",
+    "rgba32": "RGBA32",
+    "uyvy": "UYVY",
+}
+
+
+class CountingModel:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append(len(batch))
+        return np.mean(batch, axis=(1, 2))
+
+    predict_on_batch = __call__
+
+
+class TestFormatLayout(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.prefilter = FormatPrefilter()
+
+    def test_bytes_formats(self):
+        rgb24 = self.prefilter.layout("RGB24")
+        self.assertEqual(rgb24.period, 3)
+        self.assertTrue(rgb24.component.all())
+        rgba32 = self.prefilter.layout("RGBA32")
+        self.assertEqual(rgba32.period, 4)
+        self.assertTrue(rgba32.alpha[3].all())
+        self.assertFalse(rgba32.alpha[:3].any())
+        uyvy = self.prefilter.layout("UYVY")
+        self.assertEqual((uyvy.period, uyvy.chroma_lanes), (4, (0, 2)))
+
+    def test_wide_items(self):
+        # Big endian items, the first byte holds the most significant bits
+        gray10 = self.prefilter.layout("GRAY10")
+        self.assertEqual(gray10.period, 2)
+        np.testing.assert_array_equal(gray10.zero[0], [False] * 2 + [True] * 6)
+        self.assertEqual(gray10.significance[0, 1], 1)
+        self.assertEqual(gray10.significance[1, 0], 1 / 10)
+        self.assertEqual(self.prefilter.layout("RG12").period, 4)
+
+    def test_packed_components(self):
+        rgb565 = self.prefilter.layout("RGB565")
+        self.assertEqual(rgb565.period, 2)
+        self.assertTrue(rgb565.component.all())
+        # Little endian: red in the most significant bits of the second byte, blue in the least of the first one
+        self.assertEqual(rgb565.significance[1, 7], 1)
+        self.assertEqual(rgb565.significance[0, 0], 1 / 5)
+        self.assertAlmostEqual(rgb565.weights.sum(), 0)
+        abgr555 = self.prefilter.layout("ABGR555")
+        self.assertEqual(np.argwhere(abgr555.alpha).tolist(), [[1, 7]])
+
+    def test_planar_formats(self):
+        nv12 = self.prefilter.layout("NV12")
+        self.assertEqual((nv12.period, nv12.luma_fraction, nv12.chroma.period), (1, 2 / 3, 2))
+        i422 = self.prefilter.layout("I422")
+        self.assertEqual((i422.luma_fraction, i422.chroma.period), (1 / 2, 1))
+
+
+class TestFormatPrefilter(unittest.TestCase):
+    IMG_PATH = "tests/test_data/RGB24/picture_nr_20_500x375.raw"
+
+    @parameterized.expand(TEST_DATA_LABELS.items())
+    def test_recall_on_test_data(self, directory, color_format):
+        prefilter = FormatPrefilter()
+        for path in sorted(glob.glob(os.path.join("tests", "test_data", directory, "*.raw"))):
+            with open(path, "rb") as file:
+                raw_data = file.read()
+            self.assertIn(color_format, prefilter.select(raw_data, list(COLOR_FORMATS_RATIOS)), path)
+
+    def test_constant_alpha(self):
+        with open(self.IMG_PATH, "rb") as file:
+            rgb = np.frombuffer(file.read(), dtype=np.uint8)[: 500 * 375 * 3].reshape(-1, 3)
+        rgba = np.concatenate([rgb, np.full((len(rgb), 1), 255, dtype=np.uint8)], axis=1)
+        prefilter = FormatPrefilter()
+        self.assertEqual(prefilter.rank(rgba.tobytes(), list(AVAILABLE_FORMATS))[:2], ["RGBA32", "BGRA32"])
+        # Alpha of a few pixels differs, e.g. in a header
+        rgba[:100, 3] = 0
+        self.assertEqual(prefilter.rank(rgba.tobytes(), list(AVAILABLE_FORMATS))[:2], ["RGBA32", "BGRA32"])
+
+    def test_select(self):
+        with open(self.IMG_PATH, "rb") as file:
+            raw_data = file.read()
+        color_formats = list(COLOR_FORMATS_RATIOS)
+        ranking = FormatPrefilter().rank(raw_data, color_formats)
+        self.assertEqual(sorted(ranking), sorted(color_formats))
+        selected = FormatPrefilter(top_k=3).select(raw_data, color_formats)
+        self.assertEqual(set(selected), set(ranking[:3]))
+        self.assertEqual(selected, [color_format for color_format in color_formats if color_format in selected])
+
+    def test_small_data(self):
+        for raw_data in [b"", b"\x01", bytes(100)]:
+            self.assertEqual(len(FormatPrefilter().select(raw_data, list(AVAILABLE_FORMATS))), 4)
+
+
+class TestPrefilteredRecognition(unittest.TestCase):
+    IMG_PATH = "tests/test_data/RGB24/picture_nr_20_500x375.raw"
+
+    def make_recognizer(self, **kwargs) -> ImageRecognizer:
+        with mock.patch("image_recognizer.exists", return_value=True), mock.patch(
+            "keras.models.load_model", return_value=CountingModel()
+        ):
+            return ImageRecognizer(**kwargs)
+
+    def test_model_checks_top_k_formats(self):
+        prefilter = FormatPrefilter(top_k=2)
+        image_recognizer = self.make_recognizer(prefilter=prefilter)
+        color_format_finder = image_recognizer.color_format_finder
+        color_format_finder.model = CountingModel()
+        with open(self.IMG_PATH, "rb") as file:
+            raw_data = file.read()
+        selected = prefilter.select(raw_data, list(COLOR_FORMATS_RATIOS))
+
+        confidences = color_format_finder.find_color_formats([(raw_data, 1500), (raw_data, 1200)])
+        self.assertEqual([list(c) for c in confidences], [selected, selected])
+        self.assertEqual(color_format_finder.evaluations, 4)
+
+        result = image_recognizer.recognize(self.IMG_PATH)
+        self.assertEqual(result.hypotheses_evaluated, ImageRecognizer.RESOLUTION_RESULTS_N * 2)
+        self.assertEqual(color_format_finder.model.batches[-1], color_format_finder.evaluations)
+        self.assertLessEqual(color_format_finder.evaluations, ImageRecognizer.RESOLUTION_RESULTS_N * 2)
+
+    def test_cache_key_depends_on_prefilter(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, "cache.sqlite")
+            contexts = {
+                self.make_recognizer(cache=cache_path, prefilter=prefilter).cache_context
+                for prefilter in [None, FormatPrefilter(top_k=2), FormatPrefilter(top_k=3)]
+            }
+        self.assertEqual(len(contexts), 3)
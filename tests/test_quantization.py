@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from app.backend import backend_model_path, convert_model, load_backend
+
+
+class TestQuantization(unittest.TestCase):
+    MODEL_SIZE = 32
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        import keras
+
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.model_path = os.path.join(cls.tmp_dir.name, "model.h5")
+        keras.utils.set_random_seed(0)
+        model = keras.Sequential(
+            [
+                keras.Input((cls.MODEL_SIZE, cls.MODEL_SIZE, 1)),
+                keras.layers.Conv2D(4, 3, activation="relu"),
+                keras.layers.MaxPooling2D(),
+                keras.layers.Flatten(),
+                keras.layers.Dense(1, activation="sigmoid"),
+            ]
+        )
+        model.save(cls.model_path)
+        cls.batch = np.random.default_rng(0).random((8, cls.MODEL_SIZE, cls.MODEL_SIZE, 1), dtype=np.float32) - 0.5
+        cls.expected = load_backend(cls.model_path, "keras")(cls.batch)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def check_quantized(self, quantization: str, tolerance: float):
+        path = convert_model(self.model_path, "tflite", quantization=quantization)
+        self.assertEqual(path, backend_model_path(self.model_path, "tflite", quantization))
+        self.assertLess(os.path.getsize(path), os.path.getsize(convert_model(self.model_path, "tflite")))
+        np.testing.assert_allclose(load_backend(path, "tflite")(self.batch), self.expected, atol=tolerance)
+
+    def test_float16(self):
+        self.check_quantized("float16", 1e-3)
+
+    def test_int8_not_supported(self):
+        with self.assertRaises(ValueError):
+            convert_model(self.model_path, "tflite", quantization="int8")
+
+    def test_only_tflite_quantized(self):
+        self.assertEqual(backend_model_path("m.h5", "tflite", "float16"), "m.float16.tflite")
+        with self.assertRaises(ValueError):
+            backend_model_path("m.h5", "onnx", "float16")
+        with self.assertRaises(ValueError):
+            backend_model_path("m.h5", "tflite", "int8")
@@ -0,0 +1,20 @@
+import unittest
+import numpy as np
+from app.raw_image_data_previewer.app.image.image import RawDataContainer
+
+
+class TestRawDataContainer(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.IMG_PATH = "tests/test_data/gray/picture_nr_21_640x480_gray.raw"
+
+    def test_mapped_file(self):
+        with open(self.IMG_PATH, "rb") as f:
+            expected = f.read()
+        with RawDataContainer.from_mapped_file(self.IMG_PATH) as container:
+            self.assertTrue(container.data_buffer.readonly)
+            self.assertEqual(bytes(container.data_buffer), expected)
+            array = np.frombuffer(container.data_buffer, dtype=np.uint8)
+            self.assertFalse(array.flags.writeable)
+            self.assertFalse(array.flags.owndata)
+        self.assertEqual(array.tobytes(), expected)
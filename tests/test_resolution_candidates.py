@@ -0,0 +1,119 @@
+import unittest
+import os
+import re
+import tracemalloc
+import numpy as np
+from unittest import mock
+from PIL import Image
+from app.resolution import ResolutionFinder, strided_candidate
+
+
+class MeanModel:
+    def __call__(self, batch):
+        return np.mean(batch, axis=(1, 2))
+
+    predict_on_batch = __call__
+
+
+class TestResolutionCandidates(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.DATA_DIR = "tests/test_data/RGB24"
+        self.REGEX = r".+_.+_.+_(\d+)x(\d+).*"
+        self.model_size = 256
+        self.delta = 0.04
+
+    def pil_candidate(self, raw: bytes, width: int) -> np.ndarray:
+        img = Image.frombytes("L", (width, len(raw) // width), raw)
+        img = img.resize((self.model_size, self.model_size))
+        return np.asarray(img) / 255 - 0.5
+
+    def candidates(self):
+        for im in os.listdir(self.DATA_DIR):
+            with open(f"{self.DATA_DIR}/{im}", "rb") as f:
+                raw = f.read()
+            width = int(re.search(self.REGEX, im).group(1)) * 3
+            yield im, raw, width
+
+    def test_same_as_pil(self):
+        for im, raw, width in self.candidates():
+            for candidate_width in [width, width - 7, width + 20]:
+                candidate = strided_candidate(
+                    np.frombuffer(raw, dtype=np.uint8),
+                    candidate_width,
+                    self.model_size,
+                    self.model_size,
+                )
+                with self.subTest(im, width=candidate_width):
+                    self.assertEqual(candidate.shape, (self.model_size, self.model_size, 1))
+                    self.assertEqual(candidate.dtype, np.float32)
+                    np.testing.assert_array_equal(
+                        candidate[..., 0], self.pil_candidate(raw, candidate_width).astype(np.float32)
+                    )
+
+    def test_taps_close_to_pil(self):
+        diffs = []
+        for im, raw, width in self.candidates():
+            candidate = strided_candidate(
+                np.frombuffer(raw, dtype=np.uint8),
+                width,
+                self.model_size,
+                self.model_size,
+                taps=8,
+            )
+            with self.subTest(im):
+                self.assertEqual(candidate.shape, (self.model_size, self.model_size, 1))
+                diffs.append(np.abs(candidate[..., 0] - self.pil_candidate(raw, width)).mean())
+                self.assertLess(diffs[-1], self.delta)
+        self.assertLess(np.mean(diffs), 0.025)
+
+    def test_enlarge(self):
+        raw = np.arange(300 * 100, dtype=np.uint8)
+        candidate = strided_candidate(raw, 300, self.model_size, self.model_size, taps=8)
+        self.assertEqual(candidate.shape, (self.model_size, self.model_size, 1))
+        self.assertAlmostEqual(candidate[0, 0, 0], raw[0] / 255 - 0.5, places=5)
+        self.assertLessEqual(candidate.max(), 0.5)
+        self.assertGreaterEqual(candidate.min(), -0.5)
+        np.testing.assert_array_equal(
+            strided_candidate(raw, 300, self.model_size, self.model_size)[..., 0],
+            self.pil_candidate(raw.tobytes(), 300).astype(np.float32),
+        )
+
+
+class TestResolutionBatches(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.IMG_PATH = "tests/test_data/RGB24/picture_nr_1_640x427.raw"
+        with open(self.IMG_PATH, "rb") as f:
+            self.raw = f.read()
+
+    def finder(self, **kwargs) -> ResolutionFinder:
+        with mock.patch("keras.models.load_model", return_value=MeanModel()):
+            return ResolutionFinder("model.h5", 256, 256, **kwargs)
+
+    def test_same_ranking(self):
+        expected = self.finder(batch_size=1000).single_prediction_tour(self.raw)
+        for batch_size in [1, 7, 64]:
+            with self.subTest(batch_size=batch_size):
+                result = self.finder(batch_size=batch_size).single_prediction_tour(self.raw)
+                self.assertListEqual(
+                    [(r.width, r.confidence) for r in expected],
+                    [(r.width, r.confidence) for r in result],
+                )
+
+    def test_memory_budget(self):
+        finder = self.finder(memory_budget=4 * 256 * 256 * 4)
+        self.assertEqual(finder.batch_size, 4)
+        with self.assertRaises(ResolutionFinder.MemoryBudgetTooSmall):
+            self.finder(memory_budget=1024)
+
+    def test_constant_memory(self):
+        finder = self.finder(batch_size=8)
+        peaks = []
+        for copies in [6, 12]:
+            raw = self.raw * copies
+            tracemalloc.start()
+            finder.single_prediction_tour(raw)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.assertLess(peaks[1], peaks[0] * 1.1)
@@ -0,0 +1,36 @@
+import unittest
+from parameterized import parameterized
+from app.resolution_search import SEARCH_STRATEGIES, get_search_strategy
+
+
+class TestResolutionSearch(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.peak = 1283
+
+    def confidence(self, width: int) -> float:
+        return 1 / (1 + abs(width - self.peak))
+
+    def drive(self, search):
+        evaluated = set()
+        try:
+            widths = next(search)
+            while True:
+                evaluated.update(widths)
+                widths = search.send({w: self.confidence(w) for w in widths})
+        except StopIteration as stop:
+            return stop.value, len(evaluated)
+
+    @parameterized.expand([[name] for name in SEARCH_STRATEGIES])
+    def test_finds_peak(self, name: str):
+        strategy = get_search_strategy(name)
+        peaks, _ = self.drive(strategy.coarse(256, 2560))
+        (width, confidence), refine_evaluations = self.drive(strategy.refine(peaks[0][0]))
+        self.assertEqual(width, self.peak)
+        self.assertEqual(confidence, 1)
+        if name != "exhaustive":
+            self.assertLess(refine_evaluations, 20)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            get_search_strategy("unknown")
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from app.image_recognizer import ImageRecognizer
+from app.raw_image_data_previewer.app.image.image import RawDataContainer
+from app.result_cache import ResultCache
+
+
+class FakeModel:
+    def __call__(self, batch):
+        return np.full((len(batch), 1), 0.5)
+
+    predict_on_batch = __call__
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, "cache.sqlite")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        super().tearDown()
+
+    def test_hits_and_misses(self):
+        cache = ResultCache(self.cache_path)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", {"img_width": np.int64(640), "resolution_confidence": np.float32(0.5)})
+        self.assertEqual(cache.get("a"), {"img_width": 640, "resolution_confidence": 0.5})
+
+        stats = ResultCache(self.cache_path).stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_lru_eviction(self):
+        cache = ResultCache(self.cache_path, max_entries=2)
+        cache.put("a", {})
+        cache.put("b", {})
+        cache.get("a")
+        cache.put("c", {})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+
+class TestRecognizerCache(unittest.TestCase):
+    IMG_PATH = "tests/test_data/RGB24/picture_nr_20_500x375.raw"
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, "cache.sqlite")
+        self.model_paths = []
+        for name in ["resolution.h5", "color_format.h5"]:
+            self.model_paths.append(os.path.join(self.tmp_dir.name, name))
+            open(self.model_paths[-1], "wb").close()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        super().tearDown()
+
+    def make_recognizer(self, **kwargs) -> ImageRecognizer:
+        return ImageRecognizer(*self.model_paths, cache=self.cache_path, **kwargs)
+
+    def test_hit_does_not_load_models(self):
+        with mock.patch("keras.models.load_model", return_value=FakeModel()):
+            found = self.make_recognizer().recognize(self.IMG_PATH)
+
+        image_recognizer = self.make_recognizer()
+        self.assertEqual(image_recognizer.recognize(self.IMG_PATH), found)
+        self.assertEqual(image_recognizer.recognize_many([self.IMG_PATH]), [found])
+        self.assertIsNone(image_recognizer.resolution_finder)
+        self.assertEqual(image_recognizer.cache.stats()["hits"], 2)
+
+    def test_key_depends_on_content_and_search_parameters(self):
+        image_recognizer = self.make_recognizer()
+        with open(self.IMG_PATH, "rb") as f:
+            data = f.read()
+        key = image_recognizer._cache_key(RawDataContainer(data))
+        self.assertNotEqual(key, image_recognizer._cache_key(RawDataContainer(data[:-1] + b"\0")))
+        other = self.make_recognizer(resolution_search_strategy="multiscale")
+        self.assertNotEqual(key, other._cache_key(RawDataContainer(data)))
+
+    def test_hit_does_not_import_tensorflow(self):
+        code = (
+            "import sys\n"
+            "from image_recognizer import ImageRecognizer\n"
+            "from raw_image_data_previewer.app.image.image import RawDataContainer\n"
+            f"r = ImageRecognizer({self.model_paths[0]!r}, {self.model_paths[1]!r}, cache={self.cache_path!r})\n"
+            "r.cache.put(r._cache_key(RawDataContainer(b'abc')), {'color_format': 'RGB24'})\n"
+            "assert r.recognize(b'abc').color_format == 'RGB24'\n"
+            "assert 'tensorflow' not in sys.modules\n"
+        )
+        env = dict(os.environ, PYTHONPATH="app")
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
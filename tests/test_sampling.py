@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from app.image_recognizer import ImageRecognizer
+from app.resolution import strided_candidate, windowed_candidate
+from app.sampling import SampledRawData, window_offsets
+
+
+class MeanModel:
+    def __call__(self, batch):
+        return np.mean(batch, axis=(1, 2))
+
+    predict_on_batch = __call__
+
+
+class TestSampling(unittest.TestCase):
+    IMG_PATH = "tests/test_data/RGB24/picture_nr_20_500x375.raw"
+    WINDOW_SIZE = 2**16
+
+    def make_recognizer(self, **kwargs) -> ImageRecognizer:
+        with mock.patch("image_recognizer.exists", return_value=True), mock.patch(
+            "keras.models.load_model", return_value=MeanModel()
+        ):
+            return ImageRecognizer(**kwargs)
+
+    def test_window_offsets(self):
+        self.assertEqual(window_offsets(1000, 3, 100), [0, 450, 900])
+        self.assertEqual(window_offsets(1000, 1, 100), [0])
+        self.assertEqual(window_offsets(1000, 3, 100, positions=[1, 0.5]), [450, 900])
+        # Overlapping windows are merged
+        self.assertEqual(window_offsets(250, 3, 100), [0, 150])
+
+    def test_from_file_reads_only_windows(self):
+        with open(self.IMG_PATH, "rb") as file:
+            data = file.read()
+        with mock.patch("os.pread", wraps=os.pread) as pread:
+            sampled = SampledRawData.from_file(self.IMG_PATH, 3, self.WINDOW_SIZE)
+        self.assertEqual(pread.call_count, 3)
+        self.assertEqual(sampled.size, len(data))
+        self.assertEqual(sampled.bytes_read, 3 * self.WINDOW_SIZE)
+        for offset, window in zip(sampled.offsets, sampled.windows):
+            self.assertEqual(window, data[offset : offset + self.WINDOW_SIZE])
+        self.assertEqual(
+            [bytes(window) for window in SampledRawData.from_buffer(data, 3, self.WINDOW_SIZE).windows],
+            sampled.windows,
+        )
+
+    def test_rows_start_at_row_boundaries(self):
+        row_size = 300
+        data = np.tile(np.arange(row_size, dtype=np.uint16) % 256, 1000).astype(np.uint8).tobytes()
+        sampled = SampledRawData.from_buffer(data, 3, 10_000)
+        rows = np.frombuffer(sampled.rows(row_size), dtype=np.uint8).reshape(-1, row_size)
+        self.assertTrue((rows == np.arange(row_size) % 256).all())
+        whole_rows = [(offset + 10_000) // row_size - -(-offset // row_size) for offset in sampled.offsets]
+        self.assertEqual(len(rows), sum(whole_rows))
+        self.assertIs(sampled.rows(row_size), sampled.rows(row_size))
+
+    def test_windowed_candidate(self):
+        raw = np.random.default_rng(0).integers(0, 256, 500 * 400, dtype=np.uint8)
+        np.testing.assert_array_equal(windowed_candidate([raw], 500, 64, 64), strided_candidate(raw, 500, 64, 64))
+        candidate = windowed_candidate([raw[:30_000], raw[100_000:110_000], raw[:100]], 500, 64, 64)
+        self.assertEqual(candidate.shape, (64, 64, 1))
+        # Bands are proportional to windows, the last one is shorter than a row and skipped
+        np.testing.assert_array_equal(candidate[:48], strided_candidate(raw[:30_000], 500, 64, 48))
+
+    def test_windowed_candidate_aligned_to_rows(self):
+        width = 500
+        data = np.tile(np.arange(width, dtype=np.uint16) % 256, 400).astype(np.uint8).tobytes()
+        sampled = SampledRawData.from_buffer(data, 3, 30_001)
+        self.assertTrue(any(offset % width for offset in sampled.offsets))
+        windows = [np.frombuffer(window, dtype=np.uint8) for window in sampled.windows]
+        # Every row of the image is the same, so is every row of the candidate when bands start with rows
+        candidate = windowed_candidate(windows, width, 64, 64, offsets=sampled.offsets)
+        np.testing.assert_array_equal(candidate, np.broadcast_to(candidate[:1], candidate.shape))
+        unaligned = windowed_candidate(windows, width, 64, 64)
+        self.assertFalse((unaligned == unaligned[:1]).all())
+
+    def test_recognize_reads_only_windows(self):
+        policy = ImageRecognizer.SamplingPolicy(window_size=self.WINDOW_SIZE, windows=3)
+        image_recognizer = self.make_recognizer(sampling=policy)
+        with mock.patch("image_recognizer.open_raw_data") as open_raw_data:
+            result = image_recognizer.recognize(self.IMG_PATH)
+        open_raw_data.assert_not_called()
+        self.assertEqual(result.bytes_read, 3 * self.WINDOW_SIZE)
+        self.assertEqual(result.hypotheses_evaluated, 5 * 8)
+
+    def test_height_extrapolated_from_file_size(self):
+        size = os.path.getsize(self.IMG_PATH)
+        policy = ImageRecognizer.SamplingPolicy(window_size=self.WINDOW_SIZE, positions=(0.2, 0.8))
+        image_recognizer = self.make_recognizer(sampling=policy)
+        resolutions = image_recognizer.resolution_finder.find_resolutions([policy.sample(self.IMG_PATH)])[0]
+        self.assertTrue(resolutions)
+        for resolution in resolutions:
+            self.assertLessEqual(resolution.width * resolution.height, size)
+            self.assertGreater((resolution.width + 1) * resolution.height, size)
+
+    def test_small_files_read_whole(self):
+        size = os.path.getsize(self.IMG_PATH)
+        policy = ImageRecognizer.SamplingPolicy(window_size=size)
+        self.assertIsNone(policy.sample(self.IMG_PATH))
+        result = self.make_recognizer(sampling=policy).recognize(self.IMG_PATH)
+        self.assertEqual(result.bytes_read, size)
+        self.assertEqual(result, self.make_recognizer().recognize(self.IMG_PATH))
+
+    def test_recognize_many(self):
+        policy = ImageRecognizer.SamplingPolicy(window_size=self.WINDOW_SIZE, windows=2)
+        image_recognizer = self.make_recognizer(sampling=policy)
+        with open(self.IMG_PATH, "rb") as file:
+            data = file.read()
+        results = image_recognizer.recognize_many([self.IMG_PATH, data])
+        self.assertEqual([result.bytes_read for result in results], [2 * self.WINDOW_SIZE] * 2)
+        self.assertEqual(results[0], results[1])
+        single = image_recognizer.recognize(self.IMG_PATH)
+        self.assertEqual((results[0].color_format, results[0].img_width), (single.color_format, single.img_width))
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch(
+            "image_recognizer.ResultCache.file_fingerprint", return_value="model"
+        ):
+            policy = ImageRecognizer.SamplingPolicy(window_size=self.WINDOW_SIZE)
+            image_recognizer = self.make_recognizer(sampling=policy, cache=os.path.join(tmp_dir, "cache.sqlite"))
+            with mock.patch("keras.models.load_model", return_value=MeanModel()):
+                found = image_recognizer.recognize(self.IMG_PATH)
+            cached = image_recognizer.recognize(self.IMG_PATH)
+            self.assertEqual(cached, found)
+            self.assertEqual(image_recognizer.cache.stats()["hits"], 1)
@@ -0,0 +1,120 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from unittest import mock
+
+import numpy as np
+from app.client import DaemonError, recognize_via_daemon, request_daemon
+from app.server import HTTPRequestHandler, RecognitionService, make_servers
+
+
+class FakeModel:
+    def __call__(self, batch):
+        return np.full((len(batch), 1), 0.5)
+
+    predict_on_batch = __call__
+
+
+class TestServer(unittest.TestCase):
+    IMG_PATH = "tests/test_data/RGB24/picture_nr_20_500x375.raw"
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        with mock.patch("image_recognizer.exists", return_value=True), mock.patch(
+            "keras.models.load_model", return_value=FakeModel()
+        ):
+            cls.service = RecognitionService()
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.socket_path = os.path.join(cls.tmp_dir.name, "test.sock")
+        cls.servers = make_servers(cls.service, cls.socket_path, port=0)
+        # Port 0 disables HTTP in make_servers, so bind to a free port here
+        cls.http_server = ThreadingHTTPServer(("127.0.0.1", 0), HTTPRequestHandler)
+        cls.http_server.service = cls.service
+        cls.servers.append(cls.http_server)
+        for server in cls.servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        for server in cls.servers:
+            server.shutdown()
+            server.server_close()
+        cls.tmp_dir.cleanup()
+
+    def test_path_and_data_give_same_result(self):
+        by_path = recognize_via_daemon(self.IMG_PATH, self.socket_path)
+        with open(self.IMG_PATH, "rb") as f:
+            by_data = recognize_via_daemon(f.read(), self.socket_path)
+        self.assertEqual(by_path, by_data)
+        self.assertIn("format", by_path)
+
+    def test_http_raw_body(self):
+        with open(self.IMG_PATH, "rb") as f:
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{self.http_server.server_port}/recognize", data=f.read()
+            )
+        with urllib.request.urlopen(request) as response:
+            result = json.loads(response.read())
+        self.assertEqual(result, recognize_via_daemon(self.IMG_PATH, self.socket_path))
+
+    def test_http_limits(self):
+        url = f"http://127.0.0.1:{self.http_server.server_port}/recognize"
+        request = urllib.request.Request(
+            url, data=json.dumps({"path": self.IMG_PATH}).encode(), headers={"Content-Type": "application/json"}
+        )
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        self.assertEqual(error.exception.code, 400)
+        with mock.patch.object(HTTPRequestHandler, "MAX_BODY_SIZE", 16):
+            with self.assertRaises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(urllib.request.Request(url, data=bytes(17)))
+        self.assertEqual(error.exception.code, 413)
+
+    def test_error_is_reported(self):
+        with self.assertRaises(DaemonError):
+            recognize_via_daemon("does/not/exist.raw", self.socket_path)
+
+    def test_latency_histograms(self):
+        before = request_daemon({"command": "stats"}, self.socket_path)["path"]["count"]
+        recognize_via_daemon(self.IMG_PATH, self.socket_path)
+        stats = request_daemon({"command": "stats"}, self.socket_path)["path"]
+        self.assertEqual(stats["count"], before + 1)
+        self.assertEqual(stats["buckets"]["inf"], stats["count"])
+
+    def test_prometheus_metrics(self):
+        recognize_via_daemon(self.IMG_PATH, self.socket_path)
+        with urllib.request.urlopen(f"http://127.0.0.1:{self.http_server.server_port}/metrics") as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+            text = response.read().decode()
+        self.assertIn("image_recognizer_resolution_model_calls_total", text)
+        self.assertIn("image_recognizer_color_format_inference_seconds_count", text)
+
+    def test_no_daemon(self):
+        self.assertIsNone(recognize_via_daemon(self.IMG_PATH, self.socket_path + ".missing"))
+
+    def test_running_daemon_socket_is_kept(self):
+        with self.assertRaises(OSError):
+            make_servers(self.service, self.socket_path)
+        self.assertIsNotNone(request_daemon({"command": "stats"}, self.socket_path))
+
+    def test_regular_file_is_kept(self):
+        path = os.path.join(self.tmp_dir.name, "regular")
+        with open(path, "w") as file:
+            file.write("data")
+        with self.assertRaises(OSError):
+            make_servers(self.service, path)
+        self.assertTrue(os.path.isfile(path))
+
+    def test_stale_socket_is_replaced(self):
+        socket_path = os.path.join(self.tmp_dir.name, "stale.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+        servers = make_servers(self.service, socket_path)
+        servers[0].server_close()
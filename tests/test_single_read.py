@@ -0,0 +1,43 @@
+import builtins
+import unittest
+import numpy as np
+from unittest import mock
+from app.image_recognizer import ImageRecognizer
+
+
+class FakeModel:
+    def __call__(self, batch):
+        return np.full((len(batch), 1), 0.5)
+
+    predict_on_batch = __call__
+
+
+class TestSingleRead(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.IMG_PATH = "tests/test_data/RGB24/picture_nr_20_500x375.raw"
+        with mock.patch("image_recognizer.exists", return_value=True), mock.patch(
+            "keras.models.load_model", return_value=FakeModel()
+        ):
+            self.image_recognizer = ImageRecognizer()
+
+    def count_opens(self, use_mmap: bool) -> int:
+        opens = []
+        real_open = builtins.open
+
+        def counting_open(file, *args, **kwargs):
+            if file == self.IMG_PATH:
+                opens.append(file)
+            return real_open(file, *args, **kwargs)
+
+        self.image_recognizer.use_mmap = use_mmap
+        with mock.patch("builtins.open", counting_open):
+            result = self.image_recognizer.recognize(self.IMG_PATH)
+        self.assertTrue(result.color_format)
+        return len(opens)
+
+    def test_single_read(self):
+        self.assertEqual(self.count_opens(use_mmap=False), 1)
+
+    def test_single_mapping(self):
+        self.assertEqual(self.count_opens(use_mmap=True), 1)
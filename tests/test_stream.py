@@ -0,0 +1,92 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+import numpy as np
+from app.image_recognizer import ImageRecognizer
+from app.stream import frame_height, iter_frames, row_alignment_score
+
+
+class TestStream(unittest.TestCase):
+    IMG_PATH = "tests/test_data/RGB24/picture_nr_20_500x375.raw"
+    OTHER_IMG_PATH = "tests/test_data/RGB24/picture_nr_1_640x427.raw"
+    ROW_SIZE = 500 * 3
+    HEIGHT = 375
+    FRAME_SIZE = ROW_SIZE * HEIGHT
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.img = np.fromfile(self.IMG_PATH, dtype=np.uint8)[: self.FRAME_SIZE].reshape(self.HEIGHT, self.ROW_SIZE)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        super().tearDown()
+
+    def frames(self, n: int) -> np.ndarray:
+        # Camera panning by a pixel every frame
+        return np.concatenate([np.roll(self.img, 3 * i, axis=1).ravel() for i in range(n)])
+
+    def write_stream(self, *parts: np.ndarray) -> str:
+        path = os.path.join(self.tmp_dir.name, "stream.raw")
+        np.concatenate(parts).tofile(path)
+        return path
+
+    def test_row_alignment_score(self):
+        raw = self.img.ravel()
+        self.assertLess(row_alignment_score(raw, self.ROW_SIZE), 0.5)
+        for row_size in [self.ROW_SIZE // 2, self.ROW_SIZE * 2 // 3, 640 * 3]:
+            self.assertGreater(row_alignment_score(raw, row_size), 0.8, row_size)
+        self.assertEqual(row_alignment_score(raw[: self.ROW_SIZE], self.ROW_SIZE), float("inf"))
+
+    def test_frame_height(self):
+        heights = [240, 360, 375, 400, 480, 720, 750]
+        self.assertEqual(frame_height(self.frames(3), self.ROW_SIZE, heights), self.HEIGHT)
+        # Still scene
+        self.assertEqual(frame_height(np.tile(self.img.ravel(), 3), self.ROW_SIZE, heights), self.HEIGHT)
+        self.assertEqual(frame_height(self.frames(1), self.ROW_SIZE, heights), 0)
+
+    def test_iter_frames(self):
+        other = np.fromfile(self.OTHER_IMG_PATH, dtype=np.uint8)[: self.FRAME_SIZE]
+        path = self.write_stream(self.frames(3), other, self.frames(2), self.img.ravel()[: self.FRAME_SIZE // 2])
+
+        frames = [
+            (frame.index, frame.offset, len(frame.data), frame.matches)
+            for frame in iter_frames(path, self.FRAME_SIZE, self.ROW_SIZE)
+        ]
+        self.assertEqual(
+            frames,
+            [(i, i * self.FRAME_SIZE, self.FRAME_SIZE, i != 3) for i in range(6)]
+            + [(6, 6 * self.FRAME_SIZE, self.FRAME_SIZE // 2, False)],
+        )
+
+    def test_frame_data(self):
+        path = self.write_stream(self.frames(3))
+        for i, frame in enumerate(iter_frames(path, self.FRAME_SIZE, self.ROW_SIZE)):
+            expected = self.frames(i + 1)[-self.FRAME_SIZE :]
+            np.testing.assert_array_equal(np.frombuffer(frame.data, dtype=np.uint8), expected)
+
+    def test_memory_bounded(self):
+        # 20 frames stream, reading it takes the frame buffer and small arrays of sampled rows
+        path = self.write_stream(*[self.frames(4)] * 5)
+        tracemalloc.start()
+        for _ in iter_frames(path, self.FRAME_SIZE, self.ROW_SIZE):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertLess(peak, 3 * self.FRAME_SIZE)
+
+    def test_recognize_stream(self):
+        path = self.write_stream(self.frames(6))
+        with mock.patch("image_recognizer.exists", return_value=True), mock.patch("keras.models.load_model"):
+            image_recognizer = ImageRecognizer()
+        found = ImageRecognizer.Result("RGB24", self.ROW_SIZE, 4 * self.HEIGHT, 0.9, 0.9, 40)
+        with mock.patch.object(ImageRecognizer, "_recognize", return_value=found) as recognize:
+            result, frames = image_recognizer.recognize_stream(path, probe_size=4 * self.FRAME_SIZE)
+        self.assertEqual(len(recognize.call_args.args[0].data_buffer), 4 * self.FRAME_SIZE)
+        self.assertEqual(
+            (result.color_format, result.img_width, result.img_height), ("RGB24", self.ROW_SIZE, self.HEIGHT)
+        )
+        self.assertEqual([frame.matches for frame in frames], [True] * 6)